@@ -1,50 +1,36 @@
-import os
 from typing import List, Dict, Optional
-from langchain_groq import ChatGroq
+from services.clients import get_llm
+from services.crm_data import CRM_MAX_MATCHES, crm_data as crm_service
+from services.llm_cache import cached_ainvoke
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 
-# =========================
-# LOAD GROQ API KEY
-# =========================
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-
-# =========================
-# SAFE LLM INIT
-# =========================
-llm: Optional[ChatGroq] = None
-
-if GROQ_API_KEY:
-    try:
-        llm = ChatGroq(
-            api_key=GROQ_API_KEY,
-            model="llama-3.1-8b-instant",
-            temperature=0.1,
-            max_tokens=300,
-        )
-    except Exception:
-        llm = None
-
-
 # =========================
 # TOOL FUNCTIONS (MUST HAVE DOCSTRINGS)
 # =========================
-def lookup_customer(name: str, crm_data: List[Dict]) -> str:
+def lookup_customer(name: str, crm_data: Optional[List[Dict]] = None) -> str:
     """
     Look up a customer by name from CRM records.
     Returns customer details if found.
     """
+    if crm_data is None:
+        matches = crm_service.index.find(name, limit=1)
+        return str(matches[0]) if matches else "Customer not found in records."
+
     for c in crm_data:
         if c.get("name", "").lower() == name.lower():
             return str(c)
     return "Customer not found in records."
 
 
-def list_active_customers(crm_data: List[Dict]) -> str:
+def list_active_customers(crm_data: Optional[List[Dict]] = None) -> str:
     """
     List all active customers from CRM records.
     """
-    active = [c for c in crm_data if c.get("status") == "Active"]
+    if crm_data is None:
+        active = crm_service.index.with_status("Active")
+    else:
+        active = [c for c in crm_data if c.get("status") == "Active"]
     return str(active) if active else "No active customers found."
 
 
@@ -57,7 +43,7 @@ tools = [lookup_customer, list_active_customers]
 # =========================
 # AGENT STATE
 # =========================
-def crm_agent(state: Dict) -> Dict:
+async def crm_agent(state: Dict) -> Dict:
     """
     CRM agent logic that decides how to answer the user query.
     """
@@ -68,19 +54,23 @@ def crm_agent(state: Dict) -> Dict:
         return {"output": "Please ask a valid CRM question."}
 
     if not crm_data:
+        if state.get("crm_total"):
+            return {"output": "No matching customer found. Please include a customer ID (e.g., CUST0001), name or phone number."}
         return {"output": "No CRM data available."}
 
+    llm = get_llm(temperature=0.1, max_tokens=300)
     if llm is None:
         return {"output": "CRM service temporarily unavailable."}
 
-    response = llm.invoke(
+    response = await cached_ainvoke(
+        llm,
         f"""
 You are a CRM assistant.
 
 User question:
 {user_input}
 
-Available CRM data:
+Matching CRM records:
 {crm_data}
 
 Respond briefly.
@@ -108,14 +98,26 @@ graph = workflow.compile()
 # PUBLIC ENTRY POINT
 # (USED BY main.py)
 # =========================
-def run_crm_agent(user_input: str, crm_data: List[Dict]) -> str:
+async def run_crm_agent(user_input: str, crm_data: Optional[List[Dict]] = None) -> str:
     """
     Entry point to run the CRM agent workflow.
+    Without crm_data, the few customers the question refers to (by id,
+    name or phone) are looked up in the indexed CRM data service.
     """
-    result = graph.invoke(
+    crm_total = None
+    if crm_data is None:
+        try:
+            crm_data = await crm_service.find_customers(user_input, CRM_MAX_MATCHES)
+        except Exception as e:
+            print(f"[CRM] customer lookup failed: {e}")
+            crm_data = []
+        crm_total = len(crm_service.index)
+
+    result = await graph.ainvoke(
         {
             "input": user_input,
             "crm_data": crm_data,
+            "crm_total": crm_total,
         }
     )
     return result.get("output", "No response generated.")
@@ -1,38 +1,27 @@
-import os
 from typing import Optional
-from langchain_groq import ChatGroq
 
-# =========================
-# LOAD GROQ API KEY
-# =========================
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-
-# =========================
-# INITIALIZE LLM SAFELY
-# =========================
-llm: Optional[ChatGroq] = None
-
-if GROQ_API_KEY:
-    try:
-        llm = ChatGroq(
-            api_key=GROQ_API_KEY,
-            model="llama-3.1-8b-instant",
-            temperature=0.2,
-            max_tokens=400,
-        )
-    except Exception:
-        llm = None
+from services.clients import get_llm
+from services.llm_cache import cached_ainvoke, cached_astream
 
 # =========================
 # MAIN POLICY AGENT
 # (REQUIRED BY supervisor.py)
 # =========================
-def handle_policy_query(user_input: str) -> str:
-    """
-    Handles insurance policy-related questions such as:
-    coverage, benefits, claims, renewal, exclusions, etc.
-    """
+POLICY_PROMPT = """
+You are an insurance policy assistant.
 
+Answer the user's question clearly and briefly.
+Avoid legal jargon.
+Keep the answer short and helpful.
+
+User question:
+{user_input}
+
+Limit the response to a maximum of 4 lines.
+"""
+
+
+def _unavailable_reply(llm, user_input: str) -> Optional[str]:
     # ---------- API key missing or model init failed ----------
     if llm is None:
         return (
@@ -44,21 +33,23 @@ def handle_policy_query(user_input: str) -> str:
     if not user_input or not user_input.strip():
         return "Please ask a valid policy-related question."
 
-    try:
-        response = llm.invoke(
-            f"""
-You are an insurance policy assistant.
+    return None
 
-Answer the user's question clearly and briefly.
-Avoid legal jargon.
-Keep the answer short and helpful.
 
-User question:
-{user_input}
+async def handle_policy_query(user_input: str) -> str:
+    """
+    Handles insurance policy-related questions such as:
+    coverage, benefits, claims, renewal, exclusions, etc.
+    """
 
-Limit the response to a maximum of 4 lines.
-"""
-        )
+    llm = get_llm(temperature=0.2, max_tokens=400)
+
+    reply = _unavailable_reply(llm, user_input)
+    if reply:
+        return reply
+
+    try:
+        response = await cached_ainvoke(llm, POLICY_PROMPT.format(user_input=user_input))
 
         # LangChain safety: ensure content exists
         if hasattr(response, "content") and response.content:
@@ -72,3 +63,23 @@ Limit the response to a maximum of 4 lines.
             "Sorry, I’m unable to answer your policy question right now. "
             "Please try again later."
         )
+
+
+async def stream_policy_query(user_input: str):
+    """Streaming variant of handle_policy_query (text pieces as generated)."""
+    llm = get_llm(temperature=0.2, max_tokens=400)
+
+    reply = _unavailable_reply(llm, user_input)
+    if reply:
+        yield reply
+        return
+
+    try:
+        async for text in cached_astream(llm, POLICY_PROMPT.format(user_input=user_input)):
+            yield text
+
+    except Exception:
+        yield (
+            "Sorry, I’m unable to answer your policy question right now. "
+            "Please try again later."
+        )
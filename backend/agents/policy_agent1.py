@@ -1,27 +1,22 @@
 from langchain_core.prompts import PromptTemplate
-from langchain_groq import ChatGroq
-from services.pdf_parser import read_policy_pdf
-import os
-# Load policy text once (fast)
-POLICY_TEXT = read_policy_pdf(
-    "policy.pdf"
-)
+from services.clients import get_llm
+from services.llm_cache import cached_ainvoke, cached_astream
+from services.policy_retrieval import TOP_K, load_chunk_index
 
-llm = ChatGroq(
-    groq_api_key=os.getenv("GROQ_API_KEY"),
-    model_name="llama-3.1-8b-instant"
-)
+# Chunk index built offline from policy.pdf (milliseconds to load);
+# each question only carries its top-k chunks, not the whole document.
+POLICY_CHUNKS = load_chunk_index("policy.pdf")
 
 POLICY_PROMPT = PromptTemplate(
     input_variables=["question", "policy_text"],
     template="""
 You are a professional insurance policy assistant.
 
-Answer the question strictly using the policy document below.
+Answer the question strictly using the policy document excerpts below.
 If the answer is not present, say:
 "I could not find this information in the policy document."
 
-POLICY DOCUMENT:
+POLICY DOCUMENT EXCERPTS:
 {policy_text}
 
 QUESTION:
@@ -31,11 +26,25 @@ ANSWER:
 """
 )
 
-def handle_policy_query(user_question: str) -> str:
-    prompt = POLICY_PROMPT.format(
+UNAVAILABLE = "Policy information service is temporarily unavailable. Please try again later."
+
+def _prompt(user_question: str) -> str:
+    return POLICY_PROMPT.format(
         question=user_question,
-        policy_text=POLICY_TEXT
+        policy_text=POLICY_CHUNKS.context_for(user_question, TOP_K)
     )
 
-    response = llm.invoke(prompt)
+async def handle_policy_query(user_question: str) -> str:
+    llm = get_llm()
+    if llm is None:
+        return UNAVAILABLE
+    response = await cached_ainvoke(llm, _prompt(user_question))
     return response.content
+
+async def stream_policy_query(user_question: str):
+    llm = get_llm()
+    if llm is None:
+        yield UNAVAILABLE
+        return
+    async for text in cached_astream(llm, _prompt(user_question)):
+        yield text
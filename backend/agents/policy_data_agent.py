@@ -1,32 +1,25 @@
 import re
 import os
-import pdfplumber
+import asyncio
 from typing import Dict, Optional
 from groq import APIStatusError
-from langchain_groq import ChatGroq
+from services.clients import get_llm
+from services.llm_cache import cached_ainvoke, cached_astream
+from services.policy_index import load_policy_store
+from services.policy_extract import iter_policies
+from services.policy_query import PolicyIndexes, answer_query, is_personal
 
 # =========================
 # CONFIG
 # =========================
 PDF_PATH = os.path.join("data", "policies.pdf")
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-
-# =========================
-# LLM (SAFE INIT)
-# =========================
-llm = None
-if GROQ_API_KEY:
-    llm = ChatGroq(
-        api_key=GROQ_API_KEY,
-        model="llama-3.1-8b-instant",
-        temperature=0.2,
-        max_tokens=300,
-    )
 
 # =========================
 # GLOBAL CACHE (IMPORTANT)
 # =========================
 POLICY_STORE: Optional[Dict[str, Dict]] = None
+POLICY_INDEXES: Optional[PolicyIndexes] = None
+_POLICY_STORE_LOCK = asyncio.Lock()
 
 
 # =========================
@@ -39,43 +32,9 @@ def load_policies_from_pdf(pdf_path: str) -> Dict[str, Dict]:
         print("[POLICY_DATA] policies.pdf not found")
         return policies
 
-    # 1️⃣ Read full PDF text
-    with pdfplumber.open(pdf_path) as pdf:
-        full_text = ""
-        for page in pdf.pages:
-            text = page.extract_text()
-            if text:
-                full_text += " " + text
-
-    # 2️⃣ Normalize whitespace
-    full_text = re.sub(r"\s+", " ", full_text)
-
-    # 3️⃣ Robust regex for policy rows
-    pattern = re.compile(
-        r"(POL\d{4})\s+"                   # Policy ID
-        r"\w+\s+"                          # Customer ID (ignored)
-        r"(Health|Life|Vehicle)\s+"        # Policy Type
-        r"(.*?)\s+"                        # Insurer
-        r"(\d{4,6})\s+"                    # Premium
-        r"(\d{2}-\d{2}-\d{2})\s+"          # Start Date
-        r"(\d{2}-\d{2}-\d{2})\s+"          # Expiry Date
-        r"(Active|Expired|Expiring)\s+"    # Status
-        r"([A-Za-z ]+)"                    # Customer Name
-    )
-
-    for match in pattern.finditer(full_text):
-        policy_id = match.group(1)
-
-        policies[policy_id] = {
-            "policy_id": policy_id,
-            "policy_type": match.group(2),
-            "insurer": match.group(3).strip(),
-            "premium": int(match.group(4)),
-            "start_date": match.group(5),
-            "expiry_date": match.group(6),
-            "status": match.group(7),
-            "customer_name": match.group(8).strip(),
-        }
+    # Pages are extracted in parallel and rows streamed out in order
+    for policy in iter_policies(pdf_path):
+        policies[policy["policy_id"]] = policy
 
     print(f"[POLICY_DATA] Loaded {len(policies)} policies from PDF")
     return policies
@@ -92,22 +51,52 @@ def extract_policy_number(text: str) -> Optional[str]:
 # =========================
 # MAIN AGENT
 # =========================
-def handle_policy_data_query(user_input: str) -> str:
-    global POLICY_STORE
+def _load_store_and_indexes():
+    # Columnar, mmap-backed by default (one copy per host, see
+    # services/policy_columns); same get(policy_id) interface as a dict.
+    store = load_policy_store(PDF_PATH)
+    return store, PolicyIndexes(store)
 
-    # 🔥 Lazy-load PDF (fixes Windows reload crash)
+
+async def get_policy_store() -> Dict[str, Dict]:
+    global POLICY_STORE, POLICY_INDEXES
+
+    # 🔥 Lazy-load (fixes Windows reload crash)
+    # Read from the compiled index (data/policies.index.sqlite); the PDF
+    # is only re-parsed when it changed. Blocking, so off the event loop.
     if POLICY_STORE is None:
-        POLICY_STORE = load_policies_from_pdf(PDF_PATH)
+        async with _POLICY_STORE_LOCK:
+            if POLICY_STORE is None:
+                POLICY_STORE, POLICY_INDEXES = await asyncio.to_thread(_load_store_and_indexes)
+
+    return POLICY_STORE
+
+
+async def _plan_policy_data_query(user_input: str):
+    """
+    (answer, llm, prompt): a ready answer for deterministic questions,
+    otherwise the LLM and prompt for a policy summary.
+    """
+    store = await get_policy_store()
 
     policy_number = extract_policy_number(user_input)
 
     if not policy_number:
-        return "Please provide a valid policy number (e.g., POL1025)."
+        # ---------- STRUCTURED QUERIES (no LLM) ----------
+        # e.g. "Health policies expiring in the next 15 days",
+        # "total premium by insurer". A customer's own policy ("is my
+        # policy active?") is only ever looked up by its number.
+        if not is_personal(user_input):
+            answer = answer_query(user_input, POLICY_INDEXES)
+            if answer:
+                return answer, None, None
+
+        return "Please provide a valid policy number (e.g., POL1025).", None, None
 
-    policy = POLICY_STORE.get(policy_number)
+    policy = store.get(policy_number)
 
     if not policy:
-        return f"No policy found with number {policy_number}."
+        return f"No policy found with number {policy_number}.", None, None
 
     text = user_input.lower()
 
@@ -116,24 +105,23 @@ def handle_policy_data_query(user_input: str) -> str:
         return (
             f"Policy {policy_number} is **{policy['status']}** "
             f"and expires on **{policy['expiry_date']}**."
-        )
+        ), None, None
 
     if "premium" in text or "price" in text:
-        return f"The premium for policy {policy_number} is ₹{policy['premium']}."
+        return f"The premium for policy {policy_number} is ₹{policy['premium']}.", None, None
 
     if "owner" in text or "customer" in text or "name" in text:
-        return f"Policy {policy_number} belongs to {policy['customer_name']}."
+        return f"Policy {policy_number} belongs to {policy['customer_name']}.", None, None
 
     # ---------- AI SUMMARY ----------
+    llm = get_llm(temperature=0.2, max_tokens=300)
     if llm is None:
         return (
             f"Policy {policy_number} is a {policy['policy_type']} policy "
             f"issued by {policy['insurer']}."
-        )
+        ), None, None
 
-    try:
-        response = llm.invoke(
-            f"""
+    prompt = f"""
 Policy details:
 {policy}
 
@@ -142,7 +130,16 @@ User question:
 
 Answer briefly (max 4 lines).
 """
-        )
+    return None, llm, prompt
+
+
+async def handle_policy_data_query(user_input: str) -> str:
+    answer, llm, prompt = await _plan_policy_data_query(user_input)
+    if answer is not None:
+        return answer
+
+    try:
+        response = await cached_ainvoke(llm, prompt)
         return response.content.strip()
 
     except APIStatusError:
@@ -150,3 +147,24 @@ Answer briefly (max 4 lines).
 
     except Exception:
         return "Something went wrong while processing the policy."
+
+
+async def stream_policy_data_query(user_input: str):
+    """
+    Streaming variant: fast-path answers are yielded immediately,
+    LLM summaries token by token.
+    """
+    answer, llm, prompt = await _plan_policy_data_query(user_input)
+    if answer is not None:
+        yield answer
+        return
+
+    try:
+        async for text in cached_astream(llm, prompt):
+            yield text
+
+    except APIStatusError:
+        yield "Unable to summarize policy right now. Please try again."
+
+    except Exception:
+        yield "Something went wrong while processing the policy."
@@ -1,29 +1,14 @@
 from typing import TypedDict, Annotated, Sequence
-from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage
-from langchain_groq import ChatGroq
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from services.clients import get_llm
+from services.customer_loader import customer_loader, policy_of_type
+from services.llm_cache import cached_ainvoke
+from services.pricing import premium, quote_id
+from services.quote_cache import quote_cache
 from langgraph.graph import StateGraph, END, START
 import operator
 import re
-import os
 import json
-from datetime import date
-from supabase import create_client
-
-# =========================
-# SUPABASE
-# =========================
-supabase = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
-)
-
-# =========================
-# LLM
-# =========================
-llm = ChatGroq(
-    groq_api_key=os.getenv("GROQ_API_KEY"),
-    model_name="llama-3.1-8b-instant"
-)
 
 # =========================
 # STATE
@@ -34,30 +19,34 @@ class State(TypedDict):
 # =========================
 # PREMIUM CALCULATION NODE
 # =========================
-def calculate_premium(state: State):
-    last_msg = state["messages"][-1]
-    content = last_msg.content.lower()
+CUSTOMER_ID = re.compile(r"cust\d+")
+POLICY_TYPE = re.compile(r"health|life|car")
+QUOTE_KEYWORDS = ("quote", "renew", "premium")
 
-    customer_id = (
-        re.search(r"(cust\d+)", content).group().upper()
-        if re.search(r"(cust\d+)", content)
-        else "CUST0001"
-    )
 
-    policy_type = (
-        re.search(r"(health|life|car)", content).group().title()
-        if re.search(r"(health|life|car)", content)
-        else "Health"
-    )
+def is_quote_request(content: str) -> bool:
+    return any(k in content.lower() for k in QUOTE_KEYWORDS)
+
+
+def quote_subject(content: str):
+    """(customer_id, policy_type) a quote message asks about."""
+    content = content.lower()
+
+    match = CUSTOMER_ID.search(content)
+    customer_id = match.group().upper() if match else "CUST0001"
+
+    match = POLICY_TYPE.search(content)
+    policy_type = match.group().title() if match else "Health"
+    return customer_id, policy_type
+
+
+async def calculate_premium(state: State):
+    last_msg = state["messages"][-1]
+    customer_id, policy_type = quote_subject(last_msg.content)
 
     try:
-        customers = (
-            supabase.table("customers")
-            .select("*")
-            .eq("customer_id", customer_id)
-            .execute()
-        )
-        customer = customers.data[0] if customers.data else None
+        # Customer and policies in one (batched, cached) query
+        customer = await customer_loader.load(customer_id)
 
         if not customer:
             return {
@@ -69,27 +58,17 @@ def calculate_premium(state: State):
                 ]
             }
 
-        policies = (
-            supabase.table("policies")
-            .select("*")
-            .eq("customer_id", customer_id)
-            .eq("policy_type", policy_type)
-            .execute()
-        )
-        existing_policy = policies.data[0] if policies.data else None
+        existing_policy = policy_of_type(customer, policy_type)
 
-        base = {"Health": 15000, "Life": 10000, "Car": 8000}.get(policy_type, 12000)
-        age_f = 1 + max(0, (customer.get("age", 30) - 25) * 0.015)
-        city_f = {"Delhi": 1.10, "Mumbai": 1.15, "Bangalore": 1.05}.get(
-            customer.get("city"), 1.0
+        new_premium = premium(
+            policy_type,
+            customer.get("age"),
+            customer.get("city"),
+            customer.get("claims_history"),
         )
-        claims_f = 1 + customer.get("claims_history", 0) * 0.20
-        inflation = 1.06
-
-        new_premium = round(base * age_f * city_f * claims_f * inflation)
 
         response = {
-            "quote_id": f"Q{customer_id[-3:]}-{date.today().strftime('%y%m')}",
+            "quote_id": quote_id(customer_id),
             "customer": customer["name"],
             "policy_type": policy_type,
             "calculated_premium": f"₹{new_premium:,.0f}/yr",
@@ -113,6 +92,8 @@ def calculate_premium(state: State):
                 }
             )
 
+        quote_cache.set("agent", customer_id, policy_type, response)
+
         return {
             "messages": [
                 ToolMessage(
@@ -136,9 +117,7 @@ def calculate_premium(state: State):
 # ROUTER NODE
 # =========================
 def router_node(state: State) -> dict:
-    msg = state["messages"][-1].content.lower()
-
-    if any(k in msg for k in ["quote", "renew", "premium"]):
+    if is_quote_request(state["messages"][-1].content):
         return {"next": "premium_calc"}
 
     return {"next": "agent"}
@@ -146,9 +125,12 @@ def router_node(state: State) -> dict:
 # =========================
 # FALLBACK AGENT
 # =========================
-def agent_llm(state: State):
+async def agent_llm(state: State):
+    llm = get_llm()
+    if llm is None:
+        return {"messages": [AIMessage(content="Quote service is temporarily unavailable. Please try again later.")]}
     messages = state["messages"][-1:]
-    return {"messages": [llm.invoke(messages)]}
+    return {"messages": [await cached_ainvoke(llm, messages)]}
 
 # =========================
 # BUILD GRAPH
@@ -178,8 +160,16 @@ quote_agent = workflow.compile()
 # =========================
 # INTERNAL RUNNER
 # =========================
-def run_quote(user_input: str) -> str:
-    result = quote_agent.invoke(
+async def run_quote(user_input: str) -> str:
+    # A repeat quote is served from the cache without running the graph
+    if is_quote_request(user_input):
+        customer_id, policy_type = quote_subject(user_input)
+        cached = quote_cache.get("agent", customer_id, policy_type)
+        if cached is not None:
+            # Same price, but the id carries today's month
+            return json.dumps({**cached, "quote_id": quote_id(customer_id)})
+
+    result = await quote_agent.ainvoke(
         {"messages": [HumanMessage(content=user_input)]}
     )
     return result["messages"][-1].content
@@ -187,10 +177,10 @@ def run_quote(user_input: str) -> str:
 # =========================
 # 🔑 PUBLIC API (USED BY main.py)
 # =========================
-def generate_quote(data: dict) -> str:
+async def generate_quote(data: dict) -> str:
     """
     This function is REQUIRED by main.py
     Input: { "message": "string" }
     """
     message = data.get("message", "")
-    return run_quote(message)
+    return await run_quote(message)
@@ -0,0 +1,92 @@
+import asyncio
+import importlib
+import os
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+# =========================
+# AGENT TABLE
+# =========================
+# task -> (module, entry point). Modules are only imported on first
+# dispatch or by the background warm-up, so importing main.py does not
+# pull in langchain/langgraph/groq or compile any graphs.
+AGENTS: Dict[str, Tuple[str, str]] = {
+    "POLICY_DATA": ("agents.policy_data_agent", "handle_policy_data_query"),
+    "POLICY": ("agents.policy_agent", "handle_policy_query"),
+    "QUOTE": ("agents.quote_agent", "generate_quote"),
+    "REMINDER": ("agents.reminder_agent", "run_reminder_agent"),
+    "CRM": ("agents.crm_agent", "run_crm_agent"),
+}
+
+# Optional streaming entry points (async generators of text) living in
+# the same modules; other agents stream their full answer as one piece.
+STREAMING: Dict[str, str] = {
+    "POLICY_DATA": "stream_policy_data_query",
+    "POLICY": "stream_policy_query",
+}
+
+# AGENT_WARMUP=0 disables the background import at startup.
+AGENT_WARMUP = os.getenv("AGENT_WARMUP", "1") == "1"
+
+_loaded: Dict[str, Callable] = {}
+_load_ms: Dict[str, float] = {}
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+# =========================
+# LOADING
+# =========================
+def _import_agent(task: str) -> Callable:
+    module_name, attr = AGENTS[task]
+
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    _load_ms[task] = round((time.perf_counter() - started) * 1000, 1)
+
+    return getattr(module, attr)
+
+
+async def load_agent(task: str) -> Optional[Callable]:
+    """
+    Entry point for a routed task, importing its module off the
+    event loop the first time. Returns None for unknown tasks.
+    """
+    handler = _loaded.get(task)
+    if handler is not None or task not in AGENTS:
+        return handler
+
+    lock = _locks.setdefault(task, asyncio.Lock())
+    async with lock:
+        if task not in _loaded:
+            _loaded[task] = await asyncio.to_thread(_import_agent, task)
+
+    return _loaded[task]
+
+
+async def load_stream_agent(task: str) -> Optional[Callable]:
+    """Streaming entry point for a task, or None if it has none."""
+    if task not in STREAMING or await load_agent(task) is None:
+        return None
+    return getattr(importlib.import_module(AGENTS[task][0]), STREAMING[task], None)
+
+
+async def warm_up() -> None:
+    """
+    Import every agent in the background after startup so the
+    first real request does not pay for it.
+    """
+    for task in AGENTS:
+        try:
+            await load_agent(task)
+        except Exception as e:
+            print(f"[AGENTS] warm-up failed for {task}: {e}")
+
+
+def agent_stats() -> Dict[str, Dict]:
+    return {
+        task: {
+            "loaded": task in _loaded,
+            "load_ms": _load_ms.get(task),
+        }
+        for task in AGENTS
+    }
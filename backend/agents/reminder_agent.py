@@ -1,19 +1,9 @@
-import os
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage, ToolMessage
 from tools.reminder import reminder_tool
+from services.clients import get_llm
 
 
-# ======================
-# LLM (Groq only)
-# ======================
-llm = ChatGroq(
-    groq_api_key=os.getenv("GROQ_API_KEY"),
-    model_name="llama-3.1-8b-instant",
-    temperature=0.1,
-)
-
 # ======================
 # Prompt
 # ======================
@@ -31,20 +21,23 @@ Rules:
     ("human", "{input}")
 ])
 
-# ======================
-# Bind tool
-# ======================
-llm_with_tools = llm.bind_tools([reminder_tool])
-
-
 # ======================
 # Agent Runner
 # ======================
 async def run_reminder_agent(user_input: str, chat_history: list | None = None):
     chat_history = chat_history or []
 
-    # Build prompt messages
-    chain = prompt | llm_with_tools
+    # LLM (Groq only), shared via the client registry
+    llm = get_llm(temperature=0.1)
+    if llm is None:
+        return {
+            "agent": "Reminder Agent",
+            "response": "Reminder service is temporarily unavailable.",
+            "tool_used": False
+        }
+
+    # Build prompt messages with the tool bound
+    chain = prompt | llm.bind_tools([reminder_tool])
     response = await chain.ainvoke({
         "input": user_input,
         "chat_history": chat_history
@@ -53,7 +46,7 @@ async def run_reminder_agent(user_input: str, chat_history: list | None = None):
     # Tool execution
     if response.tool_calls:
         tool_call = response.tool_calls[0]
-        tool_output = reminder_tool.invoke(tool_call["args"])
+        tool_output = await reminder_tool.ainvoke(tool_call["args"])
 
         tool_msg = ToolMessage(
             content=str(tool_output),
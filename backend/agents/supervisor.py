@@ -1,29 +1,264 @@
-def route_task(user_input: str) -> str:
+"""
+Intent router: decides which agent handles a request.
+
+The text is normalized and tokenized once, then scanned by a single
+compiled regex of word-bounded patterns, each adding weight to one or
+more categories. A clear winner is returned directly. Ambiguous input
+falls back to a small TF-IDF nearest-centroid classifier (a linear
+model) built from the labelled examples below. Both run in
+microseconds; routing never calls an LLM.
+
+This file MUST stay dependency-free.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+TASKS = ("POLICY_DATA", "QUOTE", "POLICY", "REMINDER", "CRM")
+
+# Matcher result is trusted when the best score reaches MIN_SCORE and
+# beats the runner-up by MIN_MARGIN; otherwise the classifier decides.
+MIN_SCORE = 2.0
+MIN_MARGIN = 1.0
+# Classifier similarity below this is treated as "no idea"
+MIN_SIMILARITY = 0.08
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+# Ignored as classifier unigrams (still part of bigrams like "how do")
+STOPWORDS = frozenset(
+    "a about am an and are at be can could did do does for from how i in is it me my of on "
+    "or please the this that to what when which who will with would you your".split()
+)
+
+# =========================
+# PATTERNS
+# =========================
+# (pattern, weights) over the normalized text: lowercase tokens joined
+# by single spaces. Earlier patterns win when two start at the same
+# place, so specific phrases come before the single words they contain.
+PATTERNS: List[Tuple[str, Dict[str, float]]] = [
+    # Policy numbers (POL1025, "pol 1025") and customer ids. A customer id
+    # is only a weak CRM hint: quotes name the customer too, and
+    # quote/premium/price must outweigh it.
+    (r"pol ?\d{3,}", {"POLICY_DATA": 4}),
+    (r"cust ?\d{3,}", {"CRM": 1}),
+
+    # Reminder phrasing that also mentions policies
+    (r"send (?:a |the )?(?:\w+ )?(?:reminders?|messages?|msg|notifications?)", {"REMINDER": 5}),
+    (r"(?:due|expiring|expires) soon", {"REMINDER": 1.5}),
+
+    # Structured questions over the policy records
+    (r"(?:how many|number of|count of|count) (?:\w+ )?polic(?:y|ies)", {"POLICY_DATA": 3}),
+    (r"(?:total|sum of|average|avg|mean) premiums?", {"POLICY_DATA": 3}),
+    (r"(?:by|per) (?:insurers?|policy type|types?|status|customers?)", {"POLICY_DATA": 2}),
+    (r"(?:in|within|over) (?:the )?(?:next|last|past) \d+ (?:days?|weeks?|months?|years?)", {"POLICY_DATA": 2}),
+    (r"(?:expiry|expiration|start|issue) dates?", {"POLICY_DATA": 2}),
+    (r"policy (?:number|no|id|status|holder|owner)", {"POLICY_DATA": 2}),
+    (r"(?:status|owner|holder|expiry) of (?:my |the |this |that )?polic(?:y|ies)|who owns (?:my |the |this |that )?polic(?:y|ies)",
+     {"POLICY_DATA": 2}),
+    (r"list (?:all |the |my )?(?:\w+ )?polic(?:y|ies)", {"POLICY_DATA": 2}),
+    (r"(?:active|expired|expiring|lapsed) polic(?:y|ies)", {"POLICY_DATA": 2}),
+    (r"polic(?:y|ies) (?:of|owned by|held by)", {"POLICY_DATA": 1}),
+    # "is my health policy active": one customer's own policy. POLICY_DATA
+    # answers these only by policy number, never from the book-wide query engine.
+    (r"my (?:\w+ )?(?:polic(?:y|ies)|insurance|cover)(?: \w+)? (?:active|valid|status|expired|lapsed|expir(?:e|es|ing|y))",
+     {"POLICY_DATA": 3}),
+    (r"expir(?:e|es|ed|ing|y)", {"POLICY_DATA": 1, "REMINDER": 0.5}),
+    (r"insurers?|owner|holder", {"POLICY_DATA": 1}),
+
+    # New quotes and pricing; "premium for CUST0001" is what quote_agent parses
+    (r"(?:quot(?:e|es)|premiums?|pric(?:e|es|ing)) (?:for|of) cust ?\d{3,}", {"QUOTE": 4}),
+    (r"quot(?:e|es|ation|ations)", {"QUOTE": 3}),
+    (r"how much (?:will|would|does|do|is|for)", {"QUOTE": 2}),
+    (r"(?:buy|purchase|get|new) (?:a |an )?(?:new )?(?:health |life |car |vehicle |motor )?(?:insurance|policy|plan|cover)",
+     {"QUOTE": 2}),
+    (r"(?:health|life|vehicle|car|motor) (?:insurance|polic(?:y|ies))", {"QUOTE": 0.5, "POLICY_DATA": 0.5}),
+    (r"pric(?:e|es|ing)|costs?|estimate", {"QUOTE": 2}),
+    (r"premiums?", {"QUOTE": 1.5, "POLICY_DATA": 1}),
+    (r"\d+ (?:years? old|yrs?)|age \d+", {"QUOTE": 1}),
+
+    # Reminders and notifications
+    (r"remind(?:er|ers|ing|ed)?", {"REMINDER": 3}),
+    (r"notif(?:y|ication|ications|ied)|alerts?|whatsapp|sms", {"REMINDER": 2.5}),
+    (r"messages?|msg|texts?", {"REMINDER": 2}),
+    (r"due (?:soon|date)", {"REMINDER": 1}),
+
+    # Customer records
+    (r"crm", {"CRM": 4}),
+    (r"(?:update|change|edit|modify|correct) (?:my |the |his |her |their )?(?:\w+ )?"
+     r"(?:phone|mobile|number|email|address|contact|name|details)", {"CRM": 4}),
+    (r"customers?|clients?", {"CRM": 2}),
+    (r"phone(?: number)?|mobile(?: number)?|email(?: address)?|contact(?: details| info)?|address", {"CRM": 1.5}),
+    (r"updat(?:e|ed|ing)|chang(?:e|ed|ing)", {"CRM": 1}),
+
+    # General policy questions (coverage, claims, terms)
+    (r"waiting period|grace period|deductibles?|co ?payment|nominee|sum (?:insured|assured)|riders?|free look"
+     r"|terms(?: and conditions)?", {"POLICY": 2}),
+    (r"cover(?:age|ed|s)?", {"POLICY": 2}),
+    (r"benefits?", {"POLICY": 2}),
+    (r"claims?", {"POLICY": 2}),
+    (r"exclu(?:sion|sions|ded|de|des)", {"POLICY": 2}),
+    (r"renew(?:al|als|ed|ing|s)?", {"POLICY": 1, "REMINDER": 1}),
+    (r"polic(?:y|ies)", {"POLICY": 1}),
+    (r"insurance", {"POLICY": 0.5, "QUOTE": 0.5}),
+]
+
+_MATCHER = re.compile(
+    r"\b(?:" + "|".join(f"(?P<p{i}>{pattern})" for i, (pattern, _) in enumerate(PATTERNS)) + r")\b"
+)
+_WEIGHTS = {f"p{i}": weights for i, (_, weights) in enumerate(PATTERNS)}
+
+
+def normalize(text: str) -> List[str]:
+    return TOKEN.findall(text.lower())
+
+
+def match_scores(text: str) -> Dict[str, float]:
+    """Per-category scores from the compiled pattern matcher."""
+    scores: Dict[str, float] = defaultdict(float)
+    for match in _MATCHER.finditer(text):
+        for task, weight in _WEIGHTS[match.lastgroup].items():
+            scores[task] += weight
+    return scores
+
+
+# =========================
+# FALLBACK CLASSIFIER
+# =========================
+EXAMPLES: List[Tuple[str, str]] = [
+    ("Show me details of policy POL1025", "POLICY_DATA"),
+    ("what is the status of my policy", "POLICY_DATA"),
+    ("who owns this policy", "POLICY_DATA"),
+    ("health policies expiring in the next 15 days", "POLICY_DATA"),
+    ("total premium by insurer", "POLICY_DATA"),
+    ("how many expired policies does TrustCover have", "POLICY_DATA"),
+    ("policies of Pooja Sharma", "POLICY_DATA"),
+    ("when does my policy expire", "POLICY_DATA"),
+    ("list all active life policies", "POLICY_DATA"),
+    ("is my health policy active", "POLICY_DATA"),
+    ("is my car insurance still valid", "POLICY_DATA"),
+    ("Can I get a health insurance quote?", "QUOTE"),
+    ("premium for CUST0001 health", "QUOTE"),
+    ("how much would car insurance cost for me", "QUOTE"),
+    ("price for a life plan for a 35 year old in Mumbai", "QUOTE"),
+    ("I want to buy a new vehicle policy", "QUOTE"),
+    ("estimate my premium for health cover", "QUOTE"),
+    ("which plan is cheapest for my family", "QUOTE"),
+    ("what does my policy cover", "POLICY"),
+    ("is hospitalization covered under health insurance", "POLICY"),
+    ("how do I file a claim", "POLICY"),
+    ("what are the exclusions", "POLICY"),
+    ("explain the waiting period for pre existing diseases", "POLICY"),
+    ("what benefits does life insurance give my nominee", "POLICY"),
+    ("how do I renew my policy", "POLICY"),
+    ("what documents are needed for claim settlement", "POLICY"),
+    ("remind me before my policy renewal", "REMINDER"),
+    ("send renewal reminders to customers", "REMINDER"),
+    ("notify me on whatsapp when my policy is due", "REMINDER"),
+    ("set an alert for my renewal date", "REMINDER"),
+    ("message customers whose policies are expiring soon", "REMINDER"),
+    ("Update my phone number to 9876543210", "CRM"),
+    ("change the email address of customer CUST0001", "CRM"),
+    ("show customer details for Aman Gupta", "CRM"),
+    ("list active customers", "CRM"),
+    ("look up the contact info of Neha Verma", "CRM"),
+    ("open the crm record", "CRM"),
+]
+
+
+def _stem(token: str) -> str:
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    for suffix in ("ation", "ing", "ed", "es", "s"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+
+def _features(tokens: List[str]) -> Counter:
+    stems = [_stem(t) for t in tokens]
+    unigrams = [s for s in stems if s not in STOPWORDS]
+    return Counter(unigrams + [f"{a} {b}" for a, b in zip(stems, stems[1:])])
+
+
+class CentroidClassifier:
     """
-    Decide which agent should handle the request.
-    This file MUST stay dependency-free.
+    TF-IDF nearest-centroid classifier: each class is the normalized
+    mean of its examples' TF-IDF vectors, and the score is a dot
+    product with it (a linear model over TF-IDF features).
     """
 
-    text = user_input.lower()
+    def __init__(self, examples: List[Tuple[str, str]]):
+        docs = [(_features(normalize(text)), label) for text, label in examples]
+        df = Counter(f for features, _ in docs for f in features)
+        n = len(docs)
+        self.idf = {f: math.log((1 + n) / (1 + count)) + 1 for f, count in df.items()}
+
+        sums: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        for features, label in docs:
+            for f, weight in self._vector(features).items():
+                sums[label][f] += weight
+        self.centroids = {label: self._unit(vector) for label, vector in sums.items()}
+
+    @staticmethod
+    def _unit(vector: Dict[str, float]) -> Dict[str, float]:
+        norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+        return {f: w / norm for f, w in vector.items()}
+
+    def _vector(self, features: Counter) -> Dict[str, float]:
+        return self._unit({
+            f: (1 + math.log(tf)) * self.idf[f]
+            for f, tf in features.items() if f in self.idf
+        })
 
-    # Policy number specific queries
-    if "pol" in text:
-        return "POLICY_DATA"
+    def scores(self, tokens: List[str]) -> Dict[str, float]:
+        vector = self._vector(_features(tokens))
+        return {
+            label: sum(w * centroid.get(f, 0.0) for f, w in vector.items())
+            for label, centroid in self.centroids.items()
+        }
 
-    # Quote related
-    if any(k in text for k in ["quote", "price", "premium", "cost"]):
-        return "QUOTE"
 
-    # General policy questions
-    if any(k in text for k in ["policy", "coverage", "benefit", "claim", "renew"]):
-        return "POLICY"
+_classifier: Optional[CentroidClassifier] = None
 
-    # Reminder
-    if any(k in text for k in ["remind", "reminder"]):
-        return "REMINDER"
 
-    # CRM
-    if any(k in text for k in ["crm", "customer"]):
-        return "CRM"
+def get_classifier() -> CentroidClassifier:
+    global _classifier
+    if _classifier is None:
+        _classifier = CentroidClassifier(EXAMPLES)
+    return _classifier
 
-    return "UNKNOWN"
+
+# =========================
+# ROUTING
+# =========================
+def explain_route(user_input: str) -> Dict:
+    """Routing decision with the scores behind it (for debugging)."""
+    tokens = normalize(user_input)
+    scores = match_scores(" ".join(tokens))
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+
+    best, best_score = ranked[0] if ranked else ("UNKNOWN", 0.0)
+    runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+
+    # A lone weak match (e.g. just "policy") is still unambiguous
+    if (best_score >= MIN_SCORE and best_score - runner_up >= MIN_MARGIN) or (best_score >= 1 and runner_up == 0):
+        return {"task": best, "source": "matcher", "scores": dict(scores)}
+
+    similarities = get_classifier().scores(tokens)
+    label, similarity = max(similarities.items(), key=lambda kv: kv[1])
+    if similarity >= MIN_SIMILARITY:
+        return {"task": label, "source": "classifier", "scores": dict(scores), "similarity": similarities}
+
+    # Weak matcher signal beats no signal at all
+    return {"task": best if best_score > 0 else "UNKNOWN", "source": "matcher", "scores": dict(scores)}
+
+
+def route_task(user_input: str) -> str:
+    """
+    Decide which agent should handle the request:
+    POLICY_DATA, QUOTE, POLICY, REMINDER, CRM or UNKNOWN.
+    """
+    return explain_route(user_input)["task"]
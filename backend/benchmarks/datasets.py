@@ -0,0 +1,179 @@
+"""
+Synthetic datasets for the benchmarks, shaped like data/customers.csv,
+data/policies.csv, data/policies.pdf and the rows the app reads from
+Supabase. Everything is generated from a seed, so runs compare like
+with like; generated PDFs are cached under benchmarks/.cache.
+"""
+import os
+import random
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+FIRST = ["Pooja", "Vikas", "Aman", "Neha", "Rahul", "Priya", "Arjun", "Sneha", "Karan", "Anita"]
+LAST = ["Sharma", "Malhotra", "Gupta", "Verma", "Iyer", "Reddy", "Nair", "Singh", "Mehta", "Das"]
+POLICY_TYPES = ["Health", "Life", "Car"]
+INSURERS = ["TrustCover Ltd", "SecureLife Insurance", "AutoShield Inc", "Demo Insurer"]
+PHONES = ["9.17E+11", "9.18E+11", "9.19E+11", "9.20E+11"]
+
+CHAT_TEMPLATES = [
+    "check policy POL{n:04d}",
+    "when does policy POL{n:04d} expire",
+    "premium for policy POL{n:04d}",
+    "what is the phone number of {name}",
+    "update phone of customer CUST{n:04d} to 9876543210",
+    "give me a quote for CUST{n:04d} {ptype} insurance",
+    "send renewal reminders to all expiring customers",
+    "what does a {ptype} policy cover for hospitalization",
+    "explain the claim process and waiting period",
+    "hello there",
+]
+
+
+def _name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+
+
+def customer_id(i: int) -> str:
+    return f"CUST{i:04d}"
+
+
+def customers_frame(n: int, seed: int = 1) -> pd.DataFrame:
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        "customer_id": [customer_id(i + 1) for i in range(n)],
+        "name": [_name(rng) for _ in range(n)],
+        "phone": [rng.choice(PHONES) for _ in range(n)],
+    })
+
+
+def policies_frame(n: int, seed: int = 1, customers: int = 5000) -> pd.DataFrame:
+    rng = random.Random(seed)
+    today = date.today()
+    starts = [today - timedelta(days=rng.randint(0, 700)) for _ in range(n)]
+    return pd.DataFrame({
+        "policy_id": [f"POL{1000 + i}" for i in range(n)],
+        "customer_id": [customer_id(rng.randint(1, customers)) for _ in range(n)],
+        "policy_type": [rng.choice(POLICY_TYPES) for _ in range(n)],
+        "insurer": [rng.choice(INSURERS) for _ in range(n)],
+        "premium": [rng.randint(5000, 30000) for _ in range(n)],
+        "start_date": [f"{d.month}/{d.day}/{d.year}" for d in starts],
+        "expiry_date": [f"{d.month}/{d.day}/{d.year + 1}" if not (d.month == 2 and d.day == 29)
+                        else f"2/28/{d.year + 1}" for d in starts],
+        "status": ["status"] * n,
+    })
+
+
+def dashboard_input(n: int, seed: int = 1) -> List[Dict]:
+    """Rows as /crm-dashboard reads them (policies joined with customers)."""
+    rng = random.Random(seed)
+    today = date.today()
+    return [
+        {
+            "policy_id": f"POL{1000 + i}",
+            "policy_type": rng.choice(POLICY_TYPES),
+            "policy_expiry": (today + timedelta(days=rng.randint(-60, 365))).isoformat(),
+            "status": "Active",
+            "customers": {"name": _name(rng), "phone": f"+9198{rng.randint(0, 99999999):08d}"},
+        }
+        for i in range(n)
+    ]
+
+
+def chat_messages(n: int, seed: int = 1) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        rng.choice(CHAT_TEMPLATES).format(
+            n=rng.randint(1, 9999), name=_name(rng), ptype=rng.choice(POLICY_TYPES).lower()
+        )
+        for _ in range(n)
+    ]
+
+
+def quote_messages(n: int, customers: int, seed: int = 1) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        f"renewal quote for {customer_id(rng.randint(1, customers)).lower()} {rng.choice(POLICY_TYPES).lower()}"
+        for _ in range(n)
+    ]
+
+
+# =========================
+# PDF
+# =========================
+ROWS_PER_PAGE = 60
+
+
+def _pdf_lines(n: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    lines = []
+    for i in range(n):
+        start = date(2025, 1, 1) + timedelta(days=rng.randint(0, 364))
+        expiry = start + timedelta(days=365)
+        lines.append(
+            f"POL{1000 + i % 9000} {customer_id(rng.randint(1, 5000))} "
+            f"{rng.choice(POLICY_TYPES)} {rng.choice(INSURERS)} "
+            f"{rng.randint(5000, 30000)} {start:%d-%m-%y} {expiry:%d-%m-%y} "
+            f"{rng.choice(['Active', 'Expired', 'Expiring'])} {_name(rng)} "
+            f"9.{rng.randint(17000, 20999)}E+11"
+        )
+    return lines
+
+
+def policies_pdf(n: int, seed: int = 1) -> str:
+    """Path to a policies.pdf-style table with n rows (generated once)."""
+    path = os.path.join(CACHE_DIR, f"policies-{n}-{seed}.pdf")
+    if os.path.exists(path):
+        return path
+
+    import fitz
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    lines = _pdf_lines(n, seed)
+    doc = fitz.open()
+    for start in range(0, len(lines), ROWS_PER_PAGE):
+        page = doc.new_page(width=842, height=595)   # A4 landscape, like the export
+        y = 30
+        for line in lines[start:start + ROWS_PER_PAGE]:
+            page.insert_text((20, y), line, fontsize=7)
+            y += 9
+    tmp = path + ".tmp"
+    doc.save(tmp)
+    doc.close()
+    os.replace(tmp, path)
+    return path
+
+
+# =========================
+# BULK QUOTES
+# =========================
+CITIES = ["Delhi", "Mumbai", "Bangalore", "Pune", "Chennai"]
+
+
+def quote_frames(n: int, seed: int = 1, customers: Optional[int] = None):
+    """(customers, policies) frames as services.bulk_quotes.fetch_frames returns them."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    customers = customers or max(1, n // 2)
+    ids = np.array([customer_id(i + 1) for i in range(customers)], dtype=object)
+    today = np.datetime64(date.today())
+    return (
+        pd.DataFrame({
+            "customer_id": ids,
+            "name": [f"Customer {i + 1}" for i in range(customers)],
+            "age": rng.integers(18, 80, customers),
+            "city": np.array(CITIES, dtype=object)[rng.integers(0, len(CITIES), customers)],
+            "claims_history": rng.integers(0, 4, customers),
+        }),
+        pd.DataFrame({
+            "policy_id": [f"POL{1000 + i}" for i in range(n)],
+            "customer_id": ids[rng.integers(0, customers, n)],
+            "policy_type": np.array(POLICY_TYPES, dtype=object)[rng.integers(0, len(POLICY_TYPES), n)],
+            "premium": rng.integers(5000, 30000, n),
+            "policy_expiry": (today + rng.integers(-60, 365, n)).astype(str),
+        }),
+    )
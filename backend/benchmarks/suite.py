@@ -0,0 +1,380 @@
+"""
+Microbenchmarks for the backend hot paths, with tracked baselines.
+
+Each case runs at several dataset sizes (10^3 .. 10^6 items) so the
+scaling curve is visible; the reported figure is the best of --repeat
+runs (more for cases under a second), in microseconds per item.
+--check exits non-zero when a case is slower than its baseline
+(benchmarks/baseline.json, tracked) by more than --threshold (default
+25%) on the first run and on re-measuring, or has no baseline at all.
+
+Every run also times a fixed reference workload, and cases are
+compared as multiples of it, so a baseline recorded on one machine
+still gates a faster or slower one (single-threaded speed; core counts
+are not normalized).
+
+Usage (from backend/):
+    python -m benchmarks.suite                          # 1e3, 1e4, 1e5
+    python -m benchmarks.suite --sizes 1e5,1e6 --case route_task
+    python -m benchmarks.suite --check                  # CI gate
+    python -m benchmarks.suite --update                 # record new baselines
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_SIZES = "1e3,1e4,1e5"
+DEFAULT_THRESHOLD = float(os.getenv("BENCH_THRESHOLD", "0.25"))
+MIN_MEASURE_SECONDS = 1.0
+MAX_RUNS = 200
+# A case over the threshold is re-measured this many times before it counts
+CONFIRM_RUNS = 2
+
+# A case returns (run, items): run() does the measured work once
+Setup = Callable[[int], Tuple[Callable[[], None], int]]
+CASES: Dict[str, Tuple[Setup, int]] = {}
+
+
+def case(name: str, max_size: int = 10 ** 6):
+    """Register a benchmark; sizes above max_size are skipped unless --no-cap."""
+    def register(setup: Setup) -> Setup:
+        CASES[name] = (setup, max_size)
+        return setup
+    return register
+
+
+# =========================
+# CASES
+# =========================
+@case("route_task")
+def bench_route_task(n: int):
+    from agents.supervisor import route_task
+    from benchmarks.datasets import chat_messages
+
+    messages = chat_messages(n)
+    route_task(messages[0])   # build the matcher and classifier outside the timing
+
+    def run():
+        for message in messages:
+            route_task(message)
+    return run, n
+
+
+@case("extract_policy_number")
+def bench_extract_policy_number(n: int):
+    from agents.policy_data_agent import extract_policy_number
+    from benchmarks.datasets import chat_messages
+
+    messages = chat_messages(n)
+
+    def run():
+        for message in messages:
+            extract_policy_number(message)
+    return run, n
+
+
+@case("load_policies_from_pdf", max_size=10 ** 4)
+def bench_load_policies_from_pdf(n: int):
+    from agents.policy_data_agent import load_policies_from_pdf
+    from benchmarks.datasets import policies_pdf
+
+    path = policies_pdf(n)
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            load_policies_from_pdf(path)
+    return run, n
+
+
+@case("read_policy_pdf", max_size=10 ** 5)
+def bench_read_policy_pdf(n: int):
+    from benchmarks.datasets import policies_pdf
+    from services.pdf_parser import read_policy_pdf
+
+    path = policies_pdf(n)
+
+    def run():
+        read_policy_pdf(path)
+    return run, n
+
+
+class _StubQuery:
+    """Just enough of the Supabase query builder for the customer loader."""
+
+    def __init__(self, customers: Dict[str, Dict]):
+        self.customers, self.ids = customers, []
+
+    def select(self, *_):
+        return self
+
+    def in_(self, column, values):
+        self.ids = list(values)
+        return self
+
+    def eq(self, column, value):
+        self.ids = [value]
+        return self
+
+    async def execute(self):
+        data = [self.customers[i] for i in self.ids if i in self.customers]
+        return type("Response", (), {"data": data})
+
+
+class _StubSupabase:
+    def __init__(self, customers):
+        self.customers = customers
+
+    def table(self, name):
+        return _StubQuery(self.customers)
+
+
+@case("calculate_premium", max_size=10 ** 5)
+def bench_calculate_premium(n: int):
+    from langchain_core.messages import HumanMessage
+
+    import agents.quote_agent as quote_agent
+    import services.customer_loader as loader_module
+    from benchmarks.datasets import customer_id, quote_messages
+
+    customers = 1000
+    rows: Dict[str, Dict] = {}
+    for i in range(1, customers + 1):
+        cid = customer_id(i)
+        rows[cid] = {"customer_id": cid, "name": f"Customer {i}", "age": 20 + i % 50,
+                     "city": ["Delhi", "Mumbai", "Pune"][i % 3], "claims_history": i % 3,
+                     "policies": [{"policy_id": f"POL{i}", "policy_type": "Health", "premium": 12000 + i}]}
+
+    stub = _StubSupabase(rows)
+
+    async def get_stub():
+        return stub
+
+    states = [{"messages": [HumanMessage(content=m)]} for m in quote_messages(n, customers)]
+
+    def run():
+        # Fresh cache per run: one miss per customer, hits afterwards
+        loader = loader_module.CustomerLoader(window_ms=0)
+
+        async def all_calls():
+            for state in states:
+                await quote_agent.calculate_premium(state)
+
+        originals = quote_agent.customer_loader, loader_module.get_async_supabase
+        quote_agent.customer_loader, loader_module.get_async_supabase = loader, get_stub
+        try:
+            asyncio.run(all_calls())
+        finally:
+            quote_agent.customer_loader, loader_module.get_async_supabase = originals
+    return run, n
+
+
+@case("crm_dashboard_rows")
+def bench_crm_dashboard_rows(n: int):
+    from benchmarks.datasets import dashboard_input
+    from services.listing import dashboard_rows
+
+    rows = dashboard_input(n)
+
+    def run():
+        dashboard_rows(rows)
+    return run, n
+
+
+@case("bulk_quotes")
+def bench_bulk_quotes(n: int):
+    from benchmarks.datasets import quote_frames
+    from services.bulk_quotes import quote_frame
+
+    customers, policies = quote_frames(n)
+
+    def run():
+        quote_frame(customers, policies)
+    return run, n
+
+
+def _load_data():
+    sys.path.insert(0, os.path.join(BACKEND_DIR, "data"))
+    import load_data
+    return load_data
+
+
+@case("load_customers_transform", max_size=10 ** 5)
+def bench_load_customers(n: int):
+    from benchmarks.datasets import customers_frame
+
+    load_data = _load_data()
+    frame = customers_frame(n)
+
+    def run():
+        load_data.customer_records(frame)
+    return run, n
+
+
+@case("load_policies_transform", max_size=10 ** 5)
+def bench_load_policies(n: int):
+    from benchmarks.datasets import policies_frame
+
+    load_data = _load_data()
+    frame = policies_frame(n)
+
+    def run():
+        load_data.policy_records(frame)
+    return run, n
+
+
+# =========================
+# RUNNER
+# =========================
+def measure(name: str, n: int, repeat: int) -> Dict:
+    setup, _ = CASES[name]
+    run, items = setup(n)
+    best = float("inf")
+    runs = 0
+    spent = 0.0
+    # Short cases keep going for MIN_MEASURE_SECONDS: their best of 3 is mostly noise
+    while runs < repeat or (spent < MIN_MEASURE_SECONDS and runs < MAX_RUNS):
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        best = min(best, elapsed)
+        spent += elapsed
+        runs += 1
+    return {"total_ms": round(best * 1000, 2), "us_per_item": round(best * 1e6 / items, 3)}
+
+
+def reference_us(repeat: int = 20) -> float:
+    """Best time of a fixed pure-Python workload, the unit cases are compared in."""
+    import random
+
+    rng = random.Random(0)
+    values = [rng.random() for _ in range(100_000)]
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        index = {f"{v:.6f}": i for i, v in enumerate(sorted(values))}
+        sum(index[k] for k in list(index)[::7])
+        best = min(best, time.perf_counter() - started)
+    return best * 1e6
+
+
+def relative_change(result: Dict, base: Dict) -> float:
+    if "relative" in result and "relative" in base:
+        return result["relative"] / base["relative"] - 1
+    return result["us_per_item"] / base["us_per_item"] - 1
+
+
+def machine() -> Dict:
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+def load_baseline(path: str) -> Dict:
+    if not os.path.exists(path):
+        return {"cases": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def parse_sizes(sizes: str) -> List[int]:
+    return [int(float(s)) for s in sizes.split(",") if s.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="run only these cases")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma list of dataset sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (best is kept)")
+    parser.add_argument("--no-cap", action="store_true", help="ignore per-case size caps")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--check", action="store_true", help="exit 1 on regressions against the baseline")
+    parser.add_argument("--update", action="store_true", help="write the results into the baseline")
+    parser.add_argument("--output", help="write the JSON results here")
+    args = parser.parse_args(argv)
+
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+
+    baseline = load_baseline(args.baseline)
+    if args.check and not args.update and not baseline["cases"]:
+        print(f"no baseline at {args.baseline}; record one with --update and commit it")
+        return 2
+    # Timed before and after the cases; the faster run is kept
+    reference = reference_us()
+    results: Dict[str, Dict[str, Dict]] = {}
+    for name in args.case or sorted(CASES):
+        _, max_size = CASES[name]
+        for n in parse_sizes(args.sizes):
+            if n > max_size and not args.no_cap:
+                continue
+            results.setdefault(name, {})[str(n)] = measure(name, n, args.repeat)
+    reference = min(reference, reference_us())
+
+    line = f"reference workload: {reference / 1000:.1f} ms"
+    if baseline.get("reference_us"):
+        line += f" (baseline: {baseline['reference_us'] / 1000:.1f} ms)"
+    print(line)
+
+    regressions = []
+    missing = []
+    print(f"{'case':<28}{'n':>9}{'total ms':>12}{'us/item':>11}{'baseline':>11}{'change':>9}")
+    for name, sizes in results.items():
+        for n, result in sizes.items():
+            result["relative"] = round(result["us_per_item"] / reference, 9)
+            base = baseline["cases"].get(name, {}).get(n)
+            change = ""
+            if base:
+                ratio = relative_change(result, base)
+                for _ in range(CONFIRM_RUNS if ratio > args.threshold else 0):
+                    again = measure(name, int(n), args.repeat)
+                    if again["us_per_item"] < result["us_per_item"]:
+                        again["relative"] = round(again["us_per_item"] / reference, 9)
+                        result.update(again)
+                        ratio = relative_change(result, base)
+                    if ratio <= args.threshold:
+                        break
+                change = f"{ratio:+.0%}"
+                if ratio > args.threshold:
+                    regressions.append((name, n, ratio))
+                    change += " !"
+            else:
+                missing.append((name, n))
+            print(f"{name:<28}{n:>9}{result['total_ms']:>12}{result['us_per_item']:>11}"
+                  f"{base['us_per_item'] if base else '-':>11}{change:>9}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"cases": results}, f, indent=2)
+
+    if args.update:
+        for name, sizes in results.items():
+            baseline["cases"].setdefault(name, {}).update(sizes)
+        baseline["machine"] = machine()
+        baseline["reference_us"] = round(reference, 1)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline updated: {args.baseline}")
+
+    if missing and args.check and not args.update:
+        print(f"{len(missing)} case(s) without a baseline: "
+              + ", ".join(f"{name} n={n}" for name, n in missing))
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}:")
+        for name, n, ratio in regressions:
+            print(f"  {name} n={n}: {ratio:+.0%}")
+    if args.check and (regressions or (missing and not args.update)):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,24 @@
 import pandas as pd
 from datetime import date, timedelta
 import os
+import sys
 from supabase import create_client
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.invalidation import bump_data_version
+
 load_dotenv()
 
-supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+_supabase = None
+
+
+def get_supabase():
+    # Created on first load so the transforms below import without credentials
+    global _supabase
+    if _supabase is None:
+        _supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+    return _supabase
 
 def fix_phone(phone_raw):
     """Convert 9.18138E+11 → +919181380000"""
@@ -19,10 +31,8 @@ def fix_phone(phone_raw):
         return f"+91{phone_str}"
     return phone_str
 
-def load_customers(csv_path: str):
-    """Fix phone + load customers"""
-    df = pd.read_csv(csv_path)
-    
+def customer_records(df: pd.DataFrame) -> list:
+    """customers.csv rows -> customers table records"""
     data = []
     for _, row in df.iterrows():
         data.append({
@@ -30,16 +40,24 @@ def load_customers(csv_path: str):
             'name': row['name'],
             'phone': fix_phone(row['phone'])  # Magic fix!
         })
+    return data
+
+
+def load_customers(csv_path: str):
+    """Fix phone + load customers"""
+    data = customer_records(pd.read_csv(csv_path))
     
     # Clear + upsert
+    supabase = get_supabase()
     supabase.table("customers").delete().neq("customer_id", "").execute()
     supabase.table("customers").insert(data).execute()
+    bump_data_version()   # running servers drop cached quotes and customers
     print(f"Loaded {len(data)} customers with fixed phones")
 
 
-def load_policies(csv_path: str):
-    df = pd.read_csv(csv_path)
-    today = date.today()
+def policy_records(df: pd.DataFrame, today: date = None) -> list:
+    """policies.csv rows -> policies table records with a status as of today"""
+    today = today or date.today()
     expiry_threshold = today + timedelta(days=30)
 
     data = []
@@ -64,11 +82,18 @@ def load_policies(csv_path: str):
             'policy_expiry': expiry_date.strftime('%Y-%m-%d'),
             'status': status  # Dynamic!
         })
+    return data
+
+
+def load_policies(csv_path: str):
+    data = policy_records(pd.read_csv(csv_path))
     
     # Clear + batch insert
+    supabase = get_supabase()
     supabase.table("policies").delete().neq("policy_id", "").execute()
     for i in range(0, len(data), 100):
         supabase.table("policies").insert(data[i:i+100]).execute()
+    bump_data_version()
     
 
 if __name__ == "__main__":
@@ -1,9 +1,13 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import date
-import os
+from contextlib import asynccontextmanager
+import asyncio
+import json
+import time
 from dotenv import load_dotenv
 
 # =========================
@@ -14,23 +18,55 @@ load_dotenv()
 # =========================
 # AGENTS
 # =========================
+# Agents are imported lazily through the registry (first dispatch
+# or background warm-up), keeping cold start off the LLM stack.
 from agents.supervisor import route_task
-from agents.policy_agent import handle_policy_query
-from agents.policy_data_agent import handle_policy_data_query
-from agents.quote_agent import generate_quote
-from agents.reminder_agent import run_reminder_agent
-from agents.crm_agent import run_crm_agent
+from agents.registry import AGENT_WARMUP, agent_stats, load_agent, load_stream_agent, warm_up
 
 # =========================
 # SERVICES
 # =========================
-from services.whatsapp import send_whatsapp_message
-from supabase import create_client
+from services.whatsapp import queue_reminders, send_whatsapp_message
+from services.dispatcher import dispatcher
+from services.outbox import outbox
+from services.renewals import RENEWAL_SCHEDULER, renewal_scheduler
+from services.concurrency import agent_limit
+from services.llm_cache import llm_cache_stats, llm_flight
+from services.policy_retrieval import retrieval_stats
+from services.singleflight import SingleFlight
+from services.crm_data import crm_data
+from services.customer_loader import customer_loader
+from services.quote_cache import quote_cache
+from services.invalidation import change_log
+from services.listing import (
+    cached_page, dashboard_rows, decode_cursor, page_size, parse_fields, policy_status, split_page,
+)
+from services.batch import BATCH_CONCURRENCY, BATCH_MAX_ITEMS, group_by_task, iter_batch
+from services.clients import get_async_supabase, aclose_clients
 
 # =========================
 # APP
 # =========================
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup = asyncio.create_task(warm_up()) if AGENT_WARMUP else None
+    # Resume reminders left in the outbox by a previous run
+    outbox.start()
+    # Replay CRM/policy changes made by the other workers
+    change_log.start()
+    if RENEWAL_SCHEDULER:
+        renewal_scheduler.start()
+    yield
+    await renewal_scheduler.stop()
+    if warmup is not None:
+        warmup.cancel()
+    await outbox.stop()
+    await change_log.stop()
+    # Close pooled Groq/Twilio HTTP sessions on shutdown
+    await aclose_clients()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # =========================
 # CORS
@@ -41,6 +77,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the frontend read pagination cursors and validators
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 # =========================
@@ -61,95 +99,208 @@ class WhatsAppMessage(BaseModel):
 def root():
     return {"status": "Insurance AI Copilot Backend Running"}
 
+# =========================
+# STATS
+# =========================
+@app.get("/stats")
+def stats():
+    # Imported here so numpy isn't loaded at startup
+    from services.pinecone_client import search_stats
+
+    return {
+        "agents": agent_stats(),
+        "llm_cache": llm_cache_stats(),
+        "policy_retrieval": retrieval_stats.snapshot(),
+        "embeddings": search_stats(),
+        "crm_data": crm_data.stats(),
+        "customer_loader": customer_loader.stats(),
+        "quote_cache": quote_cache.stats(),
+        "invalidation": change_log.stats(),
+        "dispatcher": dispatcher.stats(),
+        "outbox": outbox.stats(),
+        "renewals": renewal_scheduler.stats(),
+        "singleflight": [llm_flight.stats(), db_flight.stats()],
+    }
+
 # =========================
 # CHAT (MAIN ENTRY)
 # =========================
-@app.post("/chat")
-def chat(request: ChatRequest):
-    task = route_task(request.message)
-    message = request.message
+async def run_agent(task: str, request: ChatRequest):
+    """
+    Dispatch one routed request to its agent, bounded by the
+    per-agent concurrency limit.
+    """
+    handler = await load_agent(task)
 
-    if task == "POLICY_DATA":
-        return {
-            "task_type": "POLICY_DATA",
-            "response": handle_policy_data_query(message),
-        }
+    if handler is None:
+        return "I can help with policy details, policy numbers, or insurance quotes."
 
-    if task == "POLICY":
-        return {
-            "task_type": "POLICY",
-            "response": handle_policy_query(message),
-        }
+    async with agent_limit(task):
+        if task == "QUOTE":
+            return await handler(request.model_dump())
 
-    if task == "QUOTE":
-        return {
-            "task_type": "QUOTE",
-            "response": generate_quote(request.model_dump()),
-        }
+        return await handler(request.message)
 
-    if task == "REMINDER":
-        return {
-            "task_type": "REMINDER",
-            "response": run_reminder_agent(message),
-        }
 
-    if task == "CRM":
-        return {
-            "task_type": "CRM",
-            "response": run_crm_agent(message),
-        }
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    task = route_task(request.message)
 
     return {
-        "task_type": "UNKNOWN",
-        "response": "I can help with policy details, policy numbers, or insurance quotes.",
+        "task_type": task,
+        "response": await run_agent(task, request),
     }
 
+# =========================
+# CHAT STREAMING (SSE)
+# =========================
+async def stream_agent(task: str, request: ChatRequest):
+    """
+    Text pieces of the answer: token by token for agents with a
+    streaming entry point, the full answer in one piece otherwise.
+    """
+    stream = await load_stream_agent(task)
+
+    if stream is None:
+        yield await run_agent(task, request)
+        return
+
+    async with agent_limit(task):
+        async for text in stream(request.message):
+            yield text
+
+
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def chat_events(request: ChatRequest) -> StreamingResponse:
+    task = route_task(request.message)
+
+    async def events():
+        started = time.perf_counter()
+        first_ms = None
+        parts = []
+
+        yield sse("meta", {"task_type": task})
+        try:
+            async for text in stream_agent(task, request):
+                if first_ms is None:
+                    first_ms = round((time.perf_counter() - started) * 1000, 2)
+                parts.append(text)
+                yield sse("token", {"text": text})
+        except Exception as e:
+            yield sse("error", {"error": str(e)})
+            return
+
+        yield sse("done", {
+            "task_type": task,
+            "response": "".join(parts),
+            "first_token_ms": first_ms,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        })
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Stop proxies (nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    return chat_events(request)
+
+
+@app.get("/chat/stream")
+async def chat_stream_get(message: str, policy_number: Optional[str] = None):
+    # For browser EventSource, which can only issue GET requests
+    return chat_events(ChatRequest(message=message, policy_number=policy_number))
+
+# =========================
+# CHAT BATCH
+# =========================
+@app.post("/chat/batch")
+async def chat_batch(
+    requests: List[ChatRequest],
+    ordered: bool = True,
+    concurrency: int = Query(BATCH_CONCURRENCY, ge=1, le=BATCH_CONCURRENCY),
+):
+    """
+    Route and answer many messages in one call. Streams one NDJSON line
+    per message ({index, task_type, response | error, latency_ms}), in
+    request order unless ordered=false, then a summary line.
+    """
+    if len(requests) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ITEMS} messages per batch")
+
+    tasks = [route_task(r.message) for r in requests]
+    groups = group_by_task(tasks)
+
+    # Load every agent the batch needs up front, once each
+    await asyncio.gather(*(load_agent(task) for task in groups))
+
+    async def lines():
+        started = time.perf_counter()
+        errors = 0
+        async for result in iter_batch(requests, tasks, run_agent, concurrency, ordered):
+            errors += "error" in result
+            yield json.dumps(result, default=str) + "\n"
+
+        yield json.dumps({
+            "summary": {
+                "count": len(requests),
+                "errors": errors,
+                "agents": {task: len(indexes) for task, indexes in groups.items()},
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            }
+        }) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 # =========================
 # SUPABASE
 # =========================
-supabase = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
-)
+# Identical reads in flight at the same moment (dashboard polling,
+# campaign bursts) share one Supabase query.
+db_flight = SingleFlight("supabase")
 
 # =========================
 # CRM DASHBOARD
 # =========================
-@app.get("/crm-dashboard")
-def crm_dashboard():
-    try:
-        response = (
-            supabase.table("policies")
-            .select("*, customers(*)")
-            .limit(50)
-            .execute()
-        )
+DASHBOARD_COLUMNS = "policy_id, policy_type, policy_expiry, status, customers(name, phone)"
 
-        data = response.data or []
-        today = date.today()
-        table_data = []
 
-        for row in data:
-            expiry = row.get("expiry_date")
-            status = row.get("status", "Active")
+@app.get("/crm-dashboard")
+async def crm_dashboard(request: Request, limit: int = 50, cursor: Optional[str] = None):
+    limit = page_size(limit)
+    after = decode_cursor(cursor)
+    today = date.today()
 
-            if expiry and str(expiry) < str(today):
-                status = "Expired"
+    async def build():
+        supabase = await get_async_supabase()
+        query = supabase.table("policies").select(DASHBOARD_COLUMNS)
+        if after is not None:
+            query = query.gt("policy_id", after)
+        response = await query.order("policy_id").limit(limit + 1).execute()
 
-            customer = row.get("customers") or {}
-            table_data.append({
-                "name": customer.get("name", "Unknown"),
-                "phone": customer.get("phone", "N/A"),
-                "policy_type": row.get("policy_type", "N/A"),
-                "policy_id": row.get("policy_id", "N/A"),
-                "status": status,
-            })
+        rows, next_cursor = split_page(response.data or [], limit, "policy_id")
+        table_data = dashboard_rows(rows, today)
 
-        return {
+        payload = {
             "data": table_data,
             "total": len(table_data),
             "updated": str(today),
+            "next_cursor": next_cursor,
         }
+        return payload, {}
+
+    try:
+        # Status depends on today's date, so it is part of the key
+        return await cached_page(request, f"crm-dashboard:{limit}:{cursor}:{today}", lambda: db_flight.do(
+            f"crm-dashboard:{limit}:{cursor}", build
+        ))
 
     except Exception as e:
         return {"error": str(e), "data": []}
@@ -157,57 +308,163 @@ def crm_dashboard():
 # =========================
 # CUSTOMERS
 # =========================
+CUSTOMER_FIELDS = ("customer_id", "name", "phone", "email")
+
+
 @app.get("/customers")
-def get_customers(limit: int = 10):
-    return supabase.table("customers").select("*").limit(limit).execute().data
+async def get_customers(request: Request, limit: int = 10, cursor: Optional[str] = None, fields: Optional[str] = None):
+    """
+    Customers ordered by customer_id. The body is the page (a list);
+    the next page's cursor is in the X-Next-Cursor header.
+    """
+    limit = page_size(limit)
+    after = decode_cursor(cursor)
+    columns = parse_fields(fields, CUSTOMER_FIELDS, "customer_id")
+
+    async def build():
+        supabase = await get_async_supabase()
+        query = supabase.table("customers").select(columns)
+        if after is not None:
+            query = query.gt("customer_id", after)
+        response = await query.order("customer_id").limit(limit + 1).execute()
+
+        rows, next_cursor = split_page(response.data or [], limit, "customer_id")
+        return rows, {"X-Next-Cursor": next_cursor} if next_cursor else {}
+
+    key = f"customers:{limit}:{cursor}:{columns}"
+    return await cached_page(request, key, lambda: db_flight.do(key, build))
 
 # =========================
 # POLICIES
 # =========================
+POLICY_FIELDS = (
+    "policy_id", "customer_id", "policy_type", "insurer",
+    "premium", "policy_start", "policy_expiry", "status",
+)
+
+
 @app.get("/policies")
-def get_policies(limit: int = 10):
-    return supabase.table("policies").select("*").limit(limit).execute().data
+async def get_policies(request: Request, limit: int = 10, cursor: Optional[str] = None, fields: Optional[str] = None):
+    """
+    Policies ordered by policy_id, with status computed from
+    policy_expiry. Next page cursor in the X-Next-Cursor header.
+    """
+    limit = page_size(limit)
+    after = decode_cursor(cursor)
+    columns = parse_fields(fields, POLICY_FIELDS, "policy_id")
+    today = date.today()
+
+    async def build():
+        supabase = await get_async_supabase()
+        query = supabase.table("policies").select(columns)
+        if after is not None:
+            query = query.gt("policy_id", after)
+        response = await query.order("policy_id").limit(limit + 1).execute()
+
+        rows, next_cursor = split_page(response.data or [], limit, "policy_id")
+        for row in rows:
+            if "policy_expiry" in row and "status" in row:
+                row["status"] = policy_status(row["policy_expiry"], today, row.get("status") or "Active")
+        return rows, {"X-Next-Cursor": next_cursor} if next_cursor else {}
+
+    key = f"policies:{limit}:{cursor}:{columns}"
+    return await cached_page(request, f"{key}:{today}", lambda: db_flight.do(key, build))
+
+# =========================
+# BULK QUOTES
+# =========================
+@app.get("/quotes/bulk")
+async def quotes_bulk(format: str = "ndjson", policy_type: Optional[str] = None):
+    """
+    Renewal quotes for every policy (or every policy of policy_type),
+    priced column-wise. NDJSON and CSV are streamed; Parquet needs pyarrow.
+    """
+    # pandas is only imported when bulk quotes are asked for
+    from services import bulk_quotes
+
+    media_type = bulk_quotes.FORMATS.get(format)
+    if media_type is None:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(bulk_quotes.FORMATS)}")
+
+    frame = await db_flight.do(
+        f"bulk-quotes:{policy_type}:{date.today()}", lambda: bulk_quotes.fetch_quotes(policy_type)
+    )
+    headers = {"Content-Disposition": f'attachment; filename="renewal-quotes-{date.today()}.{format}"'}
+
+    if format == "parquet":
+        try:
+            body = await asyncio.to_thread(bulk_quotes.parquet_bytes, frame)
+        except RuntimeError as e:
+            raise HTTPException(status_code=501, detail=str(e))
+        return Response(content=body, media_type=media_type, headers=headers)
+
+    chunks = bulk_quotes.iter_csv(frame) if format == "csv" else bulk_quotes.iter_ndjson(frame)
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
 
 # =========================
 # WHATSAPP
 # =========================
 @app.post("/send-reminder")
-def send_reminder(msg: WhatsAppMessage):
-    send_whatsapp_message(msg)
+async def send_reminder(msg: WhatsAppMessage):
+    await send_whatsapp_message(msg)
     return {"status": "sent"}
-@app.post("/batch-reminders")
-def batch_reminders():
-    expiring = (
-        supabase.table("policies")
-        .select("*, customers(phone, name)")
-        .eq("status", "Expiring")
-        .execute()
-    )
+@app.post("/batch-reminders", status_code=202)
+async def batch_reminders():
+    """
+    Queue reminders for expiring policies in the outbox; poll
+    /jobs/{job_id} for progress. Policies already reminded for their
+    current expiry are skipped, so calling this twice sends nothing new.
+    """
+    if renewal_scheduler.loaded:
+        expiring = renewal_scheduler.expiring()
+    else:
+        supabase = await get_async_supabase()
+        expiring = (await (
+            supabase.table("policies")
+            .select("*, customers(phone, name)")
+            .eq("status", "Expiring")
+            .execute()
+        )).data
 
-    results = []
-    for p in expiring.data:
+    items = []
+    for p in expiring:
         msg = (
             f"Hello {p['customers']['name']}, "
             f"your {p['policy_type']} policy {p['policy_id']} "
             f"expires {p['policy_expiry']}."
         )
+        items.append({
+            "ref": p["policy_id"],
+            "expiry": p["policy_expiry"],
+            "phone": p["customers"]["phone"],
+            "message": msg,
+        })
 
-        send_whatsapp_message(
-            WhatsAppMessage(
-                phone=p["customers"]["phone"],
-                message=msg
-            )
-        )
-        results.append(p["policy_id"])
+    queued = await queue_reminders(items)
+    return {**queued, "policies": [item["ref"] for item in items]}
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    snapshot = outbox.job(job_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return snapshot
+
+
+@app.post("/jobs/{job_id}/retry")
+async def job_retry(job_id: str):
+    """Send a job's failed reminders again."""
+    if await asyncio.to_thread(outbox.job, job_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return {"job_id": job_id, "requeued": await outbox.retry(job_id)}
 
-    return {"sent_to": len(results), "policies": results}
 # =========================
 # CRM (CHAT-BASED)
 # =========================
 @app.post("/crm")
-def crm_endpoint(request: dict):
+async def crm_endpoint(request: dict):
     message = request.get("message", "")
     return {
         "task_type": "CRM",
-        "response": run_crm_agent(message),
+        "response": await run_agent("CRM", ChatRequest(message=message)),
     }
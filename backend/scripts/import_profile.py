@@ -0,0 +1,128 @@
+"""
+Startup import-time report for the backend.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter,
+aggregates the per-module timings by top-level package and prints the
+slowest ones. With --budget-ms it exits non-zero when the total import
+time of main.py exceeds the budget, so it can gate CI; --output writes
+a JSON report that can be kept per release to track regressions.
+
+Usage (from backend/):
+    python scripts/import_profile.py
+    python scripts/import_profile.py --top 15 --budget-ms 800
+    python scripts/import_profile.py --module agents.quote_agent --output importtime.json
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "0"))
+
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+# =========================
+# COLLECT
+# =========================
+def run_importtime(module: str) -> List[Dict]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(f"import {module} failed")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        rows.append({
+            "module": match.group(4),
+            "self_us": int(match.group(1)),
+            "cumulative_us": int(match.group(2)),
+            "depth": len(match.group(3)) // 2,
+        })
+    return rows
+
+
+def summarize(rows: List[Dict], module: str, top: int) -> Dict:
+    total_us = next(
+        (r["cumulative_us"] for r in rows if r["module"] == module),
+        sum(r["self_us"] for r in rows),
+    )
+
+    # Self time rolled up per top-level package
+    by_package: Dict[str, int] = defaultdict(int)
+    for r in rows:
+        by_package[r["module"].split(".")[0]] += r["self_us"]
+
+    packages = sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)
+    slowest = sorted(rows, key=lambda r: r["self_us"], reverse=True)
+
+    return {
+        "module": module,
+        "total_ms": round(total_us / 1000, 1),
+        "modules_imported": len(rows),
+        "packages": [
+            {"package": name, "self_ms": round(us / 1000, 1)}
+            for name, us in packages[:top]
+        ],
+        "slowest_modules": [
+            {"module": r["module"], "self_ms": round(r["self_us"] / 1000, 1)}
+            for r in slowest[:top]
+        ],
+    }
+
+
+# =========================
+# REPORT
+# =========================
+def print_report(report: Dict) -> None:
+    print(f"import {report['module']}: {report['total_ms']} ms "
+          f"({report['modules_imported']} modules)\n")
+
+    print(f"{'package':<32}{'self ms':>10}")
+    for p in report["packages"]:
+        print(f"{p['package']:<32}{p['self_ms']:>10}")
+
+    print(f"\n{'module':<48}{'self ms':>10}")
+    for m in report["slowest_modules"]:
+        print(f"{m['module']:<48}{m['self_ms']:>10}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="module to import (default: main)")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="fail if total import time exceeds this (0 = no budget)")
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+
+    report = summarize(run_importtime(args.module), args.module, args.top)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.budget_ms and report["total_ms"] > args.budget_ms:
+        print(f"\nFAIL: startup import {report['total_ms']} ms > budget {args.budget_ms} ms")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
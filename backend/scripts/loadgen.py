@@ -0,0 +1,221 @@
+"""
+End-to-end load generator for the backend.
+
+Drives /chat, /crm-dashboard and /batch-reminders with a weighted mix
+of requests from a fixed number of concurrent clients and reports, per
+endpoint, p50/p95/p99/max latency, errors and requests per second.
+Chat messages and dashboard pages are built from data/customers.csv
+and data/policies.csv so requests hit real ids and names.
+
+Runs against a server (--url) or in-process (--in-process), which
+starts the app with FAKE_SERVICES=all unless FAKE_SERVICES is already
+set, so a run needs no Supabase, Groq or Twilio account.
+
+Usage (from backend/):
+    python scripts/loadgen.py --in-process --duration 20 --concurrency 32
+    python scripts/loadgen.py --url http://127.0.0.1:8000 --mix chat=6,dashboard=10,reminders=1
+    FAKE_GROQ_LATENCY_MS=800 python scripts/loadgen.py --in-process --output load.json
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHAT_TEMPLATES = [
+    "check policy {policy_id}",
+    "when does policy {policy_id} expire",
+    "premium for policy {policy_id}",
+    "what is the phone number of {name}",
+    "show customer {customer_id}",
+    "give me a quote for {customer_id} health",
+    "what does a {policy_type} policy cover",
+    "explain policy renewal rules",
+]
+
+
+# =========================
+# REQUESTS
+# =========================
+def load_samples() -> Tuple[List[Dict], List[Dict]]:
+    with open(os.path.join(BACKEND_DIR, "data", "customers.csv"), newline="", encoding="utf-8") as f:
+        customers = list(csv.DictReader(f))
+    with open(os.path.join(BACKEND_DIR, "data", "policies.csv"), newline="", encoding="utf-8") as f:
+        policies = list(csv.DictReader(f))
+    return customers, policies
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = int(weight or 1)
+    unknown = set(weights) - {"chat", "dashboard", "reminders"}
+    if unknown:
+        raise SystemExit(f"Unknown endpoints in --mix: {', '.join(sorted(unknown))}")
+    return weights
+
+
+class RequestFactory:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.customers, self.policies = load_samples()
+        self.cursors: List[str] = []
+
+    def chat(self) -> Tuple[str, str, Dict]:
+        policy = self.rng.choice(self.policies)
+        customer = self.rng.choice(self.customers)
+        message = self.rng.choice(CHAT_TEMPLATES).format(
+            policy_id=policy["policy_id"],
+            policy_type=policy["policy_type"].lower(),
+            customer_id=customer["customer_id"],
+            name=customer["name"],
+        )
+        return "POST", "/chat", {"json": {"message": message}}
+
+    def dashboard(self) -> Tuple[str, str, Dict]:
+        params = {"limit": 50}
+        # Mostly the first page, like a polling dashboard; sometimes deeper
+        if self.cursors and self.rng.random() < 0.3:
+            params["cursor"] = self.rng.choice(self.cursors)
+        return "GET", "/crm-dashboard", {"params": params}
+
+    def reminders(self) -> Tuple[str, str, Dict]:
+        return "POST", "/batch-reminders", {}
+
+    def observe(self, path: str, response) -> None:
+        if path == "/crm-dashboard" and response.status_code == 200:
+            cursor = response.json().get("next_cursor")
+            if cursor and cursor not in self.cursors:
+                self.cursors.append(cursor)
+
+
+# =========================
+# RUN
+# =========================
+async def run_load(client, factory: RequestFactory, weights: Dict[str, int],
+                   concurrency: int, duration: float, max_requests: int):
+    names = list(weights)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    issued = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal issued
+        while time.perf_counter() < deadline and (not max_requests or issued < max_requests):
+            issued += 1
+            name = factory.rng.choices(names, weights=[weights[n] for n in names])[0]
+            method, path, kwargs = getattr(factory, name)()
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                if response.status_code >= 400:
+                    errors[path] += 1
+                factory.observe(path, response)
+            except Exception:
+                errors[path] += 1
+            latencies[path].append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: Dict[str, List[float]], errors: Dict[str, int], elapsed: float) -> Dict:
+    endpoints = {}
+    for path, values in sorted(latencies.items()):
+        endpoints[path] = {
+            "requests": len(values),
+            "errors": errors.get(path, 0),
+            "rps": round(len(values) / elapsed, 1),
+            "p50_ms": round(percentile(values, 50), 1),
+            "p95_ms": round(percentile(values, 95), 1),
+            "p99_ms": round(percentile(values, 99), 1),
+            "max_ms": round(max(values), 1),
+        }
+    total = sum(len(v) for v in latencies.values())
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "requests": total,
+        "errors": sum(errors.values()),
+        "rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report: Dict) -> None:
+    print(f"{'endpoint':<18}{'reqs':>7}{'errs':>6}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for path, row in report["endpoints"].items():
+        print(
+            f"{path:<18}{row['requests']:>7}{row['errors']:>6}{row['rps']:>8}"
+            f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}{row['max_ms']:>9}"
+        )
+    print(f"total: {report['requests']} requests, {report['errors']} errors, "
+          f"{report['rps']} req/s over {report['elapsed_s']}s (latencies in ms)")
+
+
+async def main_async(args) -> Dict:
+    import httpx
+
+    factory = RequestFactory(args.seed)
+    weights = parse_mix(args.mix)
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.concurrency)
+
+    if not args.in_process:
+        async with httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits) as client:
+            return summarize(*await run_load(
+                client, factory, weights, args.concurrency, args.duration, args.requests
+            ))
+
+    os.environ.setdefault("FAKE_SERVICES", "all")
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadgen", timeout=timeout) as client:
+            return summarize(*await run_load(
+                client, factory, weights, args.concurrency, args.duration, args.requests
+            ))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="server to load (ignored with --in-process)")
+    parser.add_argument("--in-process", action="store_true", help="run the app in this process on the fakes")
+    parser.add_argument("--mix", default="chat=6,dashboard=10,reminders=1", help="endpoint weights")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=15, help="seconds to run")
+    parser.add_argument("--requests", type=int, default=0, help="stop after N requests (0 = no limit)")
+    parser.add_argument("--timeout", type=float, default=60, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
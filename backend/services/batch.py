@@ -0,0 +1,74 @@
+import asyncio
+import os
+import time
+from collections import defaultdict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Sequence
+
+# =========================
+# CONFIG
+# =========================
+# Items of one batch running at once (per-agent limits still apply)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "16"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+
+
+def group_by_task(tasks: Sequence[str]) -> Dict[str, List[int]]:
+    groups: Dict[str, List[int]] = defaultdict(list)
+    for i, task in enumerate(tasks):
+        groups[task].append(i)
+    return groups
+
+
+async def iter_batch(
+    items: Sequence[Any],
+    tasks: Sequence[str],
+    run: Callable[[str, Any], Awaitable[Any]],
+    concurrency: int = BATCH_CONCURRENCY,
+    ordered: bool = True,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run items[i] with run(tasks[i], items[i]), at most `concurrency`
+    at a time, and yield one result dict per item as soon as it (and,
+    when ordered, every item before it) has finished.
+
+    Items are dispatched agent by agent, so each agent is loaded once
+    and its requests share its concurrency limit back to back. One
+    failing item is reported in its own result, not raised.
+    """
+    limit = asyncio.Semaphore(max(1, concurrency))
+    done: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+
+    async def run_one(i: int) -> None:
+        async with limit:
+            started = time.perf_counter()
+            result: Dict[str, Any] = {"index": i, "task_type": tasks[i]}
+            try:
+                result["response"] = await run(tasks[i], items[i])
+            except Exception as exc:
+                result["error"] = f"{type(exc).__name__}: {exc}"
+            result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        await done.put(result)
+
+    workers = [
+        asyncio.ensure_future(run_one(i))
+        for indexes in group_by_task(tasks).values()
+        for i in indexes
+    ]
+
+    try:
+        buffered: Dict[int, Dict[str, Any]] = {}
+        next_index = 0
+        for _ in range(len(workers)):
+            result = await done.get()
+            if not ordered:
+                yield result
+                continue
+
+            buffered[result["index"]] = result
+            while next_index in buffered:
+                yield buffered.pop(next_index)
+                next_index += 1
+    finally:
+        # Client went away: don't keep spending LLM calls on its batch
+        for worker in workers:
+            worker.cancel()
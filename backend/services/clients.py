@@ -0,0 +1,221 @@
+import asyncio
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+# =========================
+# CONFIG
+# =========================
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+
+# FAKE_SERVICES: all | comma list of supabase,twilio,groq (see services/fakes.py)
+_FAKE = {s.strip() for s in os.getenv("FAKE_SERVICES", "").lower().split(",") if s.strip()}
+if _FAKE & {"1", "all", "true", "yes"}:
+    _FAKE = {"supabase", "twilio", "groq"}
+
+
+def use_fake(service: str) -> bool:
+    return service in _FAKE
+
+# =========================
+# CLIENT REGISTRY
+# =========================
+# Every external client is built on first use and reused for the
+# life of the process, so each worker pays for one TCP/TLS pool per
+# provider instead of one per module. Heavy SDKs are imported inside
+# the getters to keep them off the startup path.
+_lock = threading.RLock()
+_async_supabase_lock = asyncio.Lock()
+
+_http_client = None
+_http_async_client = None
+_supabase = None
+_async_supabase = None
+_twilio = None
+_llms: Dict[Tuple[str, Optional[float], Optional[int]], Any] = {}
+
+
+def _http_limits():
+    import httpx
+
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_http_client():
+    """Shared keep-alive httpx.Client for sync SDK calls."""
+    global _http_client
+    if _http_client is None:
+        import httpx
+
+        with _lock:
+            if _http_client is None:
+                _http_client = httpx.Client(limits=_http_limits(), timeout=HTTP_TIMEOUT)
+    return _http_client
+
+
+def get_http_async_client():
+    """Shared keep-alive httpx.AsyncClient for async SDK calls."""
+    global _http_async_client
+    if _http_async_client is None:
+        import httpx
+
+        with _lock:
+            if _http_async_client is None:
+                _http_async_client = httpx.AsyncClient(limits=_http_limits(), timeout=HTTP_TIMEOUT)
+    return _http_async_client
+
+
+# =========================
+# SUPABASE
+# =========================
+# The Supabase SDK keeps its own HTTP/2 keep-alive session per client,
+# so reusing one client instance is what gives connection reuse.
+def get_supabase():
+    """Sync Supabase client (LangChain tools, scripts)."""
+    global _supabase
+    if _supabase is None:
+        if use_fake("supabase"):
+            from services.fakes import fake_supabase
+
+            _supabase = fake_supabase(is_async=False)
+            return _supabase
+
+        from supabase import create_client
+
+        with _lock:
+            if _supabase is None:
+                _supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+    return _supabase
+
+
+async def get_async_supabase():
+    """Async Supabase client (FastAPI handlers, async agents)."""
+    global _async_supabase
+    if _async_supabase is None:
+        if use_fake("supabase"):
+            from services.fakes import fake_supabase
+
+            _async_supabase = fake_supabase(is_async=True)
+            return _async_supabase
+
+        from supabase import acreate_client
+
+        async with _async_supabase_lock:
+            if _async_supabase is None:
+                _async_supabase = await acreate_client(
+                    os.getenv("SUPABASE_URL"),
+                    os.getenv("SUPABASE_KEY"),
+                )
+    return _async_supabase
+
+
+# =========================
+# GROQ
+# =========================
+def get_llm(temperature: Optional[float] = None, max_tokens: Optional[int] = None):
+    """
+    Shared ChatGroq instance per (model, temperature, max_tokens).
+    All instances ride the same pooled HTTP clients.
+    Returns None when GROQ_API_KEY is missing or init fails.
+    """
+    key = (GROQ_MODEL, temperature, max_tokens)
+    llm = _llms.get(key)
+    if llm is not None:
+        return llm
+
+    if use_fake("groq"):
+        from services.fakes import fake_llm
+
+        with _lock:
+            return _llms.setdefault(key, fake_llm(temperature, max_tokens))
+
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        return None
+
+    from langchain_groq import ChatGroq
+
+    kwargs: Dict[str, Any] = {}
+    if temperature is not None:
+        kwargs["temperature"] = temperature
+    if max_tokens is not None:
+        kwargs["max_tokens"] = max_tokens
+
+    with _lock:
+        llm = _llms.get(key)
+        if llm is None:
+            try:
+                llm = ChatGroq(
+                    api_key=api_key,
+                    model=GROQ_MODEL,
+                    http_client=get_http_client(),
+                    http_async_client=get_http_async_client(),
+                    **kwargs,
+                )
+            except Exception:
+                return None
+            _llms[key] = llm
+    return llm
+
+
+# =========================
+# TWILIO
+# =========================
+def get_twilio():
+    """
+    Twilio client on the async HTTP client (one pooled aiohttp
+    session). It must first be requested from inside the running
+    event loop.
+    """
+    global _twilio
+    if _twilio is None:
+        if use_fake("twilio"):
+            from services.fakes import FakeTwilio
+
+            _twilio = FakeTwilio()
+            return _twilio
+
+        from twilio.rest import Client
+        from twilio.http.async_http_client import AsyncTwilioHttpClient
+
+        with _lock:
+            if _twilio is None:
+                _twilio = Client(
+                    os.getenv("ACC_SID"),
+                    os.getenv("AUTH_TOKEN"),
+                    http_client=AsyncTwilioHttpClient(pool_connections=True, timeout=HTTP_TIMEOUT),
+                )
+    return _twilio
+
+
+# =========================
+# SHUTDOWN
+# =========================
+async def aclose_clients() -> None:
+    """Close pooled sessions (FastAPI shutdown hook)."""
+    global _http_client, _http_async_client, _twilio
+
+    if _http_async_client is not None:
+        await _http_async_client.aclose()
+        _http_async_client = None
+
+    if _http_client is not None:
+        _http_client.close()
+        _http_client = None
+
+    if _twilio is not None:
+        session = getattr(getattr(_twilio, "http_client", None), "session", None)
+        if session is not None:
+            await session.close()
+        _twilio = None
+
+    # Cached LLMs hold the closed HTTP clients; rebuild on next use.
+    _llms.clear()
@@ -0,0 +1,31 @@
+import asyncio
+import os
+from typing import Dict
+
+# =========================
+# CONFIG
+# =========================
+# AGENT_CONCURRENCY caps in-flight requests per agent.
+# AGENT_CONCURRENCY_<TASK> overrides it for one agent,
+# e.g. AGENT_CONCURRENCY_POLICY=100 or AGENT_CONCURRENCY_QUOTE=20.
+DEFAULT_AGENT_CONCURRENCY = int(os.getenv("AGENT_CONCURRENCY", "64"))
+
+_limits: Dict[str, asyncio.Semaphore] = {}
+
+
+# =========================
+# PER-AGENT LIMITS
+# =========================
+def agent_limit(task: str) -> asyncio.Semaphore:
+    """
+    Semaphore bounding concurrent calls into one agent.
+    Usage: `async with agent_limit("POLICY"): ...`
+    """
+    limit = _limits.get(task)
+
+    if limit is None:
+        size = int(os.getenv(f"AGENT_CONCURRENCY_{task}", DEFAULT_AGENT_CONCURRENCY))
+        limit = _limits[task] = asyncio.Semaphore(size)
+
+    return limit
+
@@ -0,0 +1,232 @@
+"""
+In-memory customer index for the CRM agent.
+
+Customers are loaded from Supabase once and indexed by customer id,
+normalized name (and name tokens) and phone number, so the agent gets
+only the handful of records a question refers to instead of the whole
+table. The index is refreshed in the background when it is older than
+CRM_REFRESH_SECONDS: incrementally (rows with a newer updated_at) when
+the table has that column, otherwise by a full reload diffed into the
+existing index. Requests never wait for a refresh once data is loaded.
+"""
+import asyncio
+import os
+import re
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from services.clients import get_async_supabase
+from services.invalidation import CUSTOMER, subscribe
+
+# =========================
+# CONFIG
+# =========================
+CRM_REFRESH_SECONDS = float(os.getenv("CRM_REFRESH_SECONDS", "60"))
+CRM_MAX_MATCHES = int(os.getenv("CRM_MAX_MATCHES", "5"))
+CRM_PAGE_SIZE = 1000
+# Incremental refreshes can't see deleted rows; reload fully every N
+CRM_FULL_REFRESH_EVERY = 10
+
+CUSTOMER_ID = re.compile(r"\bCUST\d+\b", re.IGNORECASE)
+PHONE = re.compile(r"\+?\d[\d\s-]{8,}\d")
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize_name(name: Optional[str]) -> str:
+    return " ".join(WORD.findall((name or "").casefold()))
+
+
+def normalize_phone(phone) -> str:
+    # Last 10 digits: "+91 98765-43210", "919876543210" and "9876543210" agree
+    digits = re.sub(r"\D", "", str(phone or ""))
+    return digits[-10:] if len(digits) >= 10 else digits
+
+
+# =========================
+# INDEX
+# =========================
+class CustomerIndex:
+    def __init__(self):
+        self.by_id: Dict[str, Dict] = {}
+        self.by_name: Dict[str, Set[str]] = defaultdict(set)
+        self.by_token: Dict[str, Set[str]] = defaultdict(set)
+        self.by_phone: Dict[str, Set[str]] = defaultdict(set)
+        self.by_status: Dict[str, Set[str]] = defaultdict(set)
+        self.name_size: Dict[str, int] = {}     # tokens in each customer's name
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def _keys(self, record: Dict):
+        name = normalize_name(record.get("name"))
+        return name, name.split(), normalize_phone(record.get("phone"))
+
+    def remove(self, customer_id: str) -> None:
+        record = self.by_id.pop(customer_id, None)
+        if record is None:
+            return
+        self.name_size.pop(customer_id, None)
+        name, tokens, phone = self._keys(record)
+        self.by_name[name].discard(customer_id)
+        for token in tokens:
+            self.by_token[token].discard(customer_id)
+        if phone:
+            self.by_phone[phone].discard(customer_id)
+        self.by_status[record.get("status")].discard(customer_id)
+
+    def upsert(self, record: Dict) -> None:
+        customer_id = record.get("customer_id")
+        if not customer_id:
+            return
+        self.remove(customer_id)
+        self.by_id[customer_id] = record
+
+        name, tokens, phone = self._keys(record)
+        self.name_size[customer_id] = len(tokens)
+        self.by_name[name].add(customer_id)
+        for token in tokens:
+            self.by_token[token].add(customer_id)
+        if phone:
+            self.by_phone[phone].add(customer_id)
+        self.by_status[record.get("status")].add(customer_id)
+
+    def find(self, text: str, limit: int = CRM_MAX_MATCHES) -> List[Dict]:
+        """
+        Records the text refers to, best first: exact ids and phone
+        numbers, then full names, then partial name matches.
+        """
+        scores: Dict[str, float] = defaultdict(float)
+
+        for match in CUSTOMER_ID.findall(text):
+            if match.upper() in self.by_id:
+                scores[match.upper()] += 10
+
+        for match in PHONE.findall(text):
+            for customer_id in self.by_phone.get(normalize_phone(match), ()):
+                scores[customer_id] += 10
+
+        words = normalize_name(text).split()
+        matched_tokens: Dict[str, int] = defaultdict(int)
+        for word in set(words):
+            for customer_id in self.by_token.get(word, ()):
+                matched_tokens[customer_id] += 1
+
+        for customer_id, hits in matched_tokens.items():
+            size = self.name_size[customer_id]
+            # Full name: 2 points per token; partial: fraction of the name
+            scores[customer_id] += 2 * hits if hits == size else hits / size
+
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        if ranked and ranked[0][1] >= 1:
+            # Drop weak partial matches once something solid was found
+            ranked = [kv for kv in ranked if kv[1] >= 1]
+        return [self.by_id[customer_id] for customer_id, _ in ranked[:limit]]
+
+    def with_status(self, status: str) -> List[Dict]:
+        return [self.by_id[customer_id] for customer_id in sorted(self.by_status.get(status, ()))]
+
+    def values(self) -> List[Dict]:
+        return list(self.by_id.values())
+
+
+# =========================
+# SERVICE
+# =========================
+class CRMDataService:
+    def __init__(self, refresh_seconds: float = CRM_REFRESH_SECONDS):
+        self.index = CustomerIndex()
+        self.refresh_seconds = refresh_seconds
+        self.loaded_at: Optional[float] = None
+        self.updated_since: Optional[str] = None   # high-water mark of updated_at
+        self.incremental = False
+        self.refreshes = 0
+        self.last_error: Optional[str] = None
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def _fetch(self, since: Optional[str] = None) -> List[Dict]:
+        supabase = await get_async_supabase()
+        rows: List[Dict] = []
+        start = 0
+        while True:
+            query = supabase.table("customers").select("*")
+            if since is not None:
+                # gte: rows sharing the last timestamp are re-applied, never missed
+                query = query.gte("updated_at", since)
+            page = (
+                await query.order("customer_id")
+                .range(start, start + CRM_PAGE_SIZE - 1)
+                .execute()
+            ).data or []
+            rows.extend(page)
+            if len(page) < CRM_PAGE_SIZE:
+                return rows
+            start += CRM_PAGE_SIZE
+
+    def _track_updated_at(self, rows: List[Dict]) -> None:
+        stamps = [r["updated_at"] for r in rows if r.get("updated_at")]
+        if stamps:
+            self.updated_since = max([self.updated_since or ""] + stamps)
+
+    async def refresh(self, full: bool = False, initial: bool = False) -> None:
+        async with self._lock:
+            if initial and self.loaded_at is not None:
+                return  # loaded by a concurrent request while we waited
+
+            try:
+                full = full or self.refreshes % CRM_FULL_REFRESH_EVERY == 0
+                if self.loaded_at is None or full or not self.incremental:
+                    rows = await self._fetch()
+                    seen = {r.get("customer_id") for r in rows}
+                    for customer_id in set(self.index.by_id) - seen:
+                        self.index.remove(customer_id)
+                    self.incremental = any("updated_at" in r for r in rows)
+                else:
+                    rows = await self._fetch(self.updated_since)
+
+                for row in rows:
+                    self.index.upsert(row)
+                self._track_updated_at(rows)
+
+                self.loaded_at = time.monotonic()
+                self.refreshes += 1
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                if self.loaded_at is None:
+                    raise
+                print(f"[CRM_DATA] refresh failed, serving cached customers: {e}")
+
+    async def ensure_loaded(self) -> CustomerIndex:
+        if self.loaded_at is None:
+            await self.refresh(initial=True)
+        elif time.monotonic() - self.loaded_at > self.refresh_seconds:
+            # Stale: refresh in the background and answer from what we have
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.ensure_future(self.refresh())
+        return self.index
+
+    async def find_customers(self, text: str, limit: int = CRM_MAX_MATCHES) -> List[Dict]:
+        index = await self.ensure_loaded()
+        return index.find(text, limit)
+
+    def apply_update(self, record: Dict) -> None:
+        """Reflect a write made through this process (e.g. crm_update) immediately."""
+        if self.loaded_at is not None:
+            current = self.index.by_id.get(record.get("customer_id"), {})
+            self.index.upsert({**current, **record})
+
+    def stats(self) -> Dict:
+        return {
+            "customers": len(self.index),
+            "loaded": self.loaded_at is not None,
+            "age_s": round(time.monotonic() - self.loaded_at, 1) if self.loaded_at else None,
+            "incremental": self.incremental,
+            "refreshes": self.refreshes,
+            "last_error": self.last_error,
+        }
+
+
+crm_data = CRMDataService()
+subscribe(CUSTOMER, crm_data.apply_update)
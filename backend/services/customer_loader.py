@@ -0,0 +1,152 @@
+"""
+Customer + policies lookups for quoting.
+
+One joined query (`customers` with embedded `policies`) replaces the
+customer-then-policy round trips. Lookups made within
+CUSTOMER_BATCH_WINDOW_MS of each other are sent together as one
+`in_("customer_id", ...)` query, DataLoader-style, and results are
+cached for CUSTOMER_CACHE_TTL seconds. A customer's entry is dropped
+as soon as a "customer" or "policy" change is published for it, and
+the whole cache when the data loaders bump the data version (see
+services/invalidation).
+"""
+import asyncio
+import os
+from typing import Dict, List, Optional
+
+from services.clients import get_async_supabase, get_supabase
+from services.invalidation import CUSTOMER, POLICY, data_version, subscribe
+from services.llm_cache import MemoryCache
+
+# =========================
+# CONFIG
+# =========================
+CUSTOMER_CACHE_TTL = int(os.getenv("CUSTOMER_CACHE_TTL", "30"))             # seconds
+CUSTOMER_BATCH_WINDOW_MS = float(os.getenv("CUSTOMER_BATCH_WINDOW_MS", "2"))
+CUSTOMER_MAX_BATCH = 100
+
+CUSTOMER_WITH_POLICIES = "*, policies(*)"
+
+# Cached "not found", so unknown ids don't hit the database every time
+MISSING: Dict = {}
+
+
+def policy_of_type(customer: Dict, policy_type: Optional[str]) -> Optional[Dict]:
+    """The customer's first policy, of policy_type when given."""
+    for policy in customer.get("policies") or []:
+        if not policy_type or str(policy.get("policy_type", "")).lower() == policy_type.lower():
+            return policy
+    return None
+
+
+class CustomerLoader:
+    def __init__(self, ttl: int = CUSTOMER_CACHE_TTL, window_ms: float = CUSTOMER_BATCH_WINDOW_MS):
+        self.cache = MemoryCache(max_size=4096, ttl=ttl)
+        self.window = window_ms / 1000
+        self.queries = 0
+        self.batched = 0
+        self.reloads = 0
+        self._version = data_version()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._scheduled = False
+        self._tasks: set = set()
+
+    # ---------- async (agents) ----------
+    async def load(self, customer_id: str) -> Optional[Dict]:
+        """Customer record with a "policies" list, or None."""
+        self._check_data_version()
+        cached = self.cache.get(customer_id)
+        if cached is not None:
+            return cached or None
+
+        future = self._pending.get(customer_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[customer_id] = future
+            if not self._scheduled:
+                self._scheduled = True
+                asyncio.get_running_loop().call_later(self.window, self._dispatch)
+        return await asyncio.shield(future) or None
+
+    def _dispatch(self) -> None:
+        pending, self._pending, self._scheduled = self._pending, {}, False
+        ids = list(pending)
+        for i in range(0, len(ids), CUSTOMER_MAX_BATCH):
+            batch = {cid: pending[cid] for cid in ids[i:i + CUSTOMER_MAX_BATCH]}
+            task = asyncio.ensure_future(self._fetch_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch_batch(self, batch: Dict[str, asyncio.Future]) -> None:
+        try:
+            supabase = await get_async_supabase()
+            response = await (
+                supabase.table("customers")
+                .select(CUSTOMER_WITH_POLICIES)
+                .in_("customer_id", list(batch))
+                .execute()
+            )
+            found = self._store(list(batch), response.data or [])
+            self.queries += 1
+            self.batched += len(batch)
+            for customer_id, future in batch.items():
+                if not future.done():
+                    future.set_result(found.get(customer_id, MISSING))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # Cancelled (e.g. at shutdown): fail the waiters rather than leave them hanging
+            for future in batch.values():
+                if not future.done():
+                    future.cancel()
+
+    # ---------- sync (LangChain tools) ----------
+    def load_sync(self, customer_id: str) -> Optional[Dict]:
+        self._check_data_version()
+        cached = self.cache.get(customer_id)
+        if cached is not None:
+            return cached or None
+
+        response = (
+            get_supabase().table("customers")
+            .select(CUSTOMER_WITH_POLICIES)
+            .eq("customer_id", customer_id)
+            .execute()
+        )
+        self.queries += 1
+        self.batched += 1
+        return self._store([customer_id], response.data or []).get(customer_id) or None
+
+    # ---------- cache ----------
+    def _store(self, ids: List[str], rows: List[Dict]) -> Dict[str, Dict]:
+        found = {row["customer_id"]: row for row in rows}
+        for customer_id in ids:
+            self.cache.set(customer_id, found.get(customer_id, MISSING))
+        return found
+
+    def invalidate(self, record: Dict) -> None:
+        customer_id = record.get("customer_id") if isinstance(record, dict) else record
+        if customer_id:
+            self.cache.delete(customer_id)
+
+    def _check_data_version(self) -> None:
+        version = data_version()
+        if version != self._version:
+            self._version = version
+            self.cache.clear()
+            self.reloads += 1
+
+    def stats(self) -> Dict:
+        return {
+            **self.cache.stats(),
+            "reloads": self.reloads,
+            "queries": self.queries,
+            "avg_batch": round(self.batched / self.queries, 2) if self.queries else 0.0,
+        }
+
+
+customer_loader = CustomerLoader()
+subscribe(CUSTOMER, customer_loader.invalidate)
+subscribe(POLICY, customer_loader.invalidate)
@@ -0,0 +1,190 @@
+"""
+Concurrent, rate-limited WhatsApp sends.
+
+The outbox workers (services/outbox) and one-off sends
+(POST /send-reminder) go through dispatcher.send(). Each send first takes a token from a bucket sized
+to the provider's messages-per-second limit, and at most
+WHATSAPP_CONCURRENCY sends are in flight. Transient failures (429,
+5xx, timeouts, dropped connections) are retried with full-jitter
+exponential backoff.
+
+The bucket lives in a SQLite file (WHATSAPP_RATE_PATH) shared by every
+uvicorn worker on the host, so the workers together stay under the
+provider's limit instead of each sending at the full rate.
+
+Throughput is min(WHATSAPP_RATE_PER_SEC, WHATSAPP_CONCURRENCY / latency)
+instead of 1 / latency for one-by-one sending.
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from services.clients import use_fake
+
+# =========================
+# CONFIG
+# =========================
+WHATSAPP_CONCURRENCY = int(os.getenv("WHATSAPP_CONCURRENCY", "20"))
+WHATSAPP_RATE_PER_SEC = float(os.getenv("WHATSAPP_RATE_PER_SEC", "20"))
+WHATSAPP_BURST = int(os.getenv("WHATSAPP_BURST", str(int(WHATSAPP_RATE_PER_SEC) or 1)))
+WHATSAPP_MAX_RETRIES = int(os.getenv("WHATSAPP_MAX_RETRIES", "4"))
+WHATSAPP_BACKOFF_BASE = float(os.getenv("WHATSAPP_BACKOFF_BASE", "0.5"))   # seconds
+WHATSAPP_BACKOFF_MAX = float(os.getenv("WHATSAPP_BACKOFF_MAX", "30"))
+# Fake sends get their own file so they never use up the real sender's rate
+WHATSAPP_RATE_PATH = os.getenv(
+    "WHATSAPP_RATE_PATH",
+    os.path.join("data", "rate_limit.fake.sqlite" if use_fake("twilio") else "rate_limit.sqlite"),
+)
+
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+# =========================
+# RATE LIMIT
+# =========================
+class TokenBucket:
+    """
+    Refills `rate` tokens per second up to `capacity`. The level is kept
+    in SQLite (WAL) and updated under BEGIN IMMEDIATE, so every process
+    using the same path draws from one bucket.
+    """
+
+    def __init__(self, rate: float, capacity: int, path: str = WHATSAPP_RATE_PATH, name: str = "whatsapp"):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.path = path
+        self.name = name
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._waiter: Optional[asyncio.Lock] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened on first use so importing the module touches no files
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets "
+                "(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def take(self) -> float:
+        """Take a token if one is left; otherwise seconds until one is."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+                now = time.time()
+                tokens = float(self.capacity)
+                if row is not None:
+                    tokens = min(tokens, row[0] + max(0.0, now - row[1]) * self.rate)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self.rate
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                    (self.name, tokens, now),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        # One waiter per process polls the shared bucket; the rest queue here
+        if self._waiter is None:
+            self._waiter = asyncio.Lock()
+        async with self._waiter:
+            while True:
+                wait = await asyncio.to_thread(self.take)
+                if wait <= 0:
+                    return
+                await asyncio.sleep(wait)
+
+
+def is_transient(exc: BaseException) -> bool:
+    status = getattr(exc, "status", None) or getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        return status in TRANSIENT_STATUS
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    # aiohttp / httpx connection and timeout errors without a shared base
+    name = type(exc).__name__
+    return "Timeout" in name or "Connection" in name
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full jitter: uniform(0, min(max, base * 2^attempt))."""
+    return random.uniform(0, min(WHATSAPP_BACKOFF_MAX, WHATSAPP_BACKOFF_BASE * 2 ** attempt))
+
+
+# =========================
+# DISPATCHER
+# =========================
+class Dispatcher:
+    def __init__(
+        self,
+        concurrency: int = WHATSAPP_CONCURRENCY,
+        rate_per_sec: float = WHATSAPP_RATE_PER_SEC,
+        burst: int = WHATSAPP_BURST,
+        max_retries: int = WHATSAPP_MAX_RETRIES,
+    ):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate_per_sec, burst)
+        self.sends = 0
+        self.retries = 0
+        self._limit: Optional[asyncio.Semaphore] = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running loop
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self.concurrency)
+        return self._limit
+
+    async def send(self, send_fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        One rate-limited send with retries on transient errors.
+        Raises the last error once retries are exhausted.
+        """
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            try:
+                async with self._semaphore():
+                    result = await send_fn()
+                self.sends += 1
+                return result
+            except Exception as e:
+                if attempt >= self.max_retries or not is_transient(e):
+                    raise
+                self.retries += 1
+                await asyncio.sleep(backoff_delay(attempt))
+                attempt += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "rate_per_s": self.bucket.rate,
+            "burst": self.bucket.capacity,
+            "rate_path": self.bucket.path,
+            "sends": self.sends,
+            "retries": self.retries,
+        }
+
+
+dispatcher = Dispatcher()
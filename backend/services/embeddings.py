@@ -0,0 +1,205 @@
+"""
+Cached, micro-batched query embeddings for policy search.
+
+- Embeddings are cached by model + normalized text (memory LRU, or the
+  SQLite cache shared by every worker on the host), reusing the
+  backends from services/llm_cache.
+- Concurrent async callers are gathered for EMBED_BATCH_WINDOW_MS (or
+  until EMBED_MAX_BATCH texts are waiting) and encoded in one
+  `model.encode` call on a dedicated worker thread, so the forward pass
+  never runs on the event loop and MiniLM sees batches instead of
+  single sentences.
+"""
+import asyncio
+import base64
+import hashlib
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from services.llm_cache import BaseCache, MemoryCache, SQLiteCache, cache_get, cache_set
+
+# =========================
+# CONFIG
+# =========================
+# EMBEDDING_CACHE_BACKEND: memory (default) | sqlite | none
+EMBEDDING_CACHE_BACKEND = os.getenv("EMBEDDING_CACHE_BACKEND", "memory").lower()
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_CACHE_TTL = int(os.getenv("EMBEDDING_CACHE_TTL", str(30 * 24 * 3600)))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join("data", "embedding_cache.sqlite"))
+
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "5"))
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))
+
+
+def normalize_text(text: str) -> str:
+    # all-MiniLM-L6-v2 is uncased, so case folding doesn't change the vector
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+def embedding_key(model_name: str, text: str) -> str:
+    return hashlib.sha256(f"{model_name}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+def _pack(vector: np.ndarray) -> str:
+    # float32 bytes as base64: exact round trip, ~4x smaller than a JSON list
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+
+
+def _unpack(value: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(value), dtype=np.float32)
+
+
+# =========================
+# CACHE
+# =========================
+_cache: Optional[BaseCache] = None
+_cache_ready = False
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[BaseCache]:
+    global _cache, _cache_ready
+    with _cache_lock:
+        if not _cache_ready:
+            if EMBEDDING_CACHE_BACKEND == "sqlite":
+                _cache = SQLiteCache(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_TTL)
+            elif EMBEDDING_CACHE_BACKEND == "memory":
+                _cache = MemoryCache(EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_TTL)
+            else:
+                _cache = None
+            _cache_ready = True
+    return _cache
+
+
+def encode_cached(model: Any, model_name: str, text: str) -> np.ndarray:
+    """Synchronous encode through the cache (for non-async callers)."""
+    cache = get_embedding_cache()
+    key = embedding_key(model_name, text)
+
+    if cache is not None:
+        value = cache.get(key)
+        if value is not None:
+            return _unpack(value)
+
+    vector = np.asarray(model.encode(normalize_text(text)), dtype=np.float32)
+    if cache is not None:
+        cache.set(key, _pack(vector))
+    return vector
+
+
+# =========================
+# MICRO-BATCHING ENCODER
+# =========================
+class BatchEncoder:
+    """
+    Gathers concurrent encode() calls into one model.encode batch.
+    Identical texts in flight share a single slot in the batch.
+    """
+
+    def __init__(self, load_model, model_name: str,
+                 window_ms: float = EMBED_BATCH_WINDOW_MS, max_batch: int = EMBED_MAX_BATCH):
+        self._load_model = load_model
+        self.model_name = model_name
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+
+        # One thread: torch already parallelises inside a batch
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+        self._pending: Dict[str, "asyncio.Future"] = {}
+        self._texts: Dict[str, str] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+        self.requests = 0
+        self.batches = 0
+        self.encoded = 0
+        self.max_batch_seen = 0
+
+    async def encode(self, text: str) -> np.ndarray:
+        self.requests += 1
+        cache = get_embedding_cache()
+        key = embedding_key(self.model_name, text)
+
+        if cache is not None:
+            value = await cache_get(cache, key)
+            if value is not None:
+                return _unpack(value)
+
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+            self._texts[key] = normalize_text(text)
+
+            if len(self._texts) >= self.max_batch:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.window, self._flush)
+
+        # Shield so one cancelled caller doesn't cancel the shared result
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._texts:
+            return
+
+        batch, self._texts = self._texts, {}
+        futures = {key: self._pending.pop(key) for key in batch}
+        task = asyncio.ensure_future(self._run(batch, futures))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        model = self._load_model()
+        return np.asarray(model.encode(texts, batch_size=len(texts)), dtype=np.float32)
+
+    async def _run(self, batch: Dict[str, str], futures: Dict[str, "asyncio.Future"]) -> None:
+        keys = list(batch)
+        loop = asyncio.get_running_loop()
+        try:
+            vectors = await loop.run_in_executor(self._executor, self._encode_batch, [batch[k] for k in keys])
+        except Exception as exc:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        self.batches += 1
+        self.encoded += len(keys)
+        self.max_batch_seen = max(self.max_batch_seen, len(keys))
+
+        for key, vector in zip(keys, vectors):
+            if not futures[key].done():
+                futures[key].set_result(vector)
+
+        cache = get_embedding_cache()
+        if cache is not None:
+            for key, vector in zip(keys, vectors):
+                await cache_set(cache, key, _pack(vector))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "encoded": self.encoded,
+            "avg_batch": round(self.encoded / self.batches, 2) if self.batches else None,
+            "max_batch": self.max_batch_seen,
+            "window_ms": self.window * 1000,
+        }
+
+
+def embedding_stats(encoder: Optional[BatchEncoder] = None) -> Dict[str, Any]:
+    cache = get_embedding_cache()
+    stats = {"cache": cache.stats() if cache is not None else {"backend": "none"}}
+    if encoder is not None:
+        stats["encoder"] = encoder.stats()
+    return stats
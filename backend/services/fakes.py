@@ -0,0 +1,455 @@
+"""
+Local stand-ins for Supabase, Twilio and Groq.
+
+Enabled through the client registry with FAKE_SERVICES (all, or a
+comma list of supabase,twilio,groq), so the whole backend runs and can
+be load-tested offline. Each fake sleeps for a configurable latency
+and fails at a configurable rate:
+
+    FAKE_<SERVICE>_LATENCY_MS    mean latency per call (±50% jitter)
+    FAKE_<SERVICE>_ERROR_RATE    fraction of calls raising a 503
+    FAKE_GROQ_TOKEN_MS           delay between streamed tokens
+
+The fake database is seeded from data/customers.csv,
+data/policies.csv and data/quotes.json and supports the query builder
+calls the app makes (select with embedded relations, filters, order,
+limit/range, insert/update/upsert/delete).
+"""
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.listing import policy_status
+
+# =========================
+# CONFIG
+# =========================
+DATA_DIR = os.getenv("FAKE_DATA_DIR", "data")
+FAKE_SEED = int(os.getenv("FAKE_SEED", "7"))
+
+
+def _setting(service: str, name: str, default: float) -> float:
+    return float(os.getenv(f"FAKE_{service.upper()}_{name}", default))
+
+
+LATENCY_MS = {
+    "supabase": _setting("supabase", "LATENCY_MS", 15),
+    "twilio": _setting("twilio", "LATENCY_MS", 120),
+    "groq": _setting("groq", "LATENCY_MS", 400),
+}
+ERROR_RATE = {
+    "supabase": _setting("supabase", "ERROR_RATE", 0),
+    "twilio": _setting("twilio", "ERROR_RATE", 0),
+    "groq": _setting("groq", "ERROR_RATE", 0),
+}
+GROQ_TOKEN_MS = _setting("groq", "TOKEN_MS", 15)
+
+_rng = random.Random(FAKE_SEED)
+_rng_lock = threading.Lock()
+
+
+class FakeServiceError(Exception):
+    """Injected failure; `status` lets retry logic treat it as transient."""
+
+    def __init__(self, service: str, status: int = 503, message: str = "injected failure"):
+        super().__init__(f"{service}: {status} {message}")
+        self.status = status
+
+
+def _delay(service: str) -> float:
+    with _rng_lock:
+        jitter = _rng.uniform(0.5, 1.5)
+        failed = _rng.random() < ERROR_RATE[service]
+    if failed:
+        raise FakeServiceError(service)
+    return LATENCY_MS[service] * jitter / 1000
+
+
+async def simulate(service: str) -> None:
+    await asyncio.sleep(_delay(service))
+
+
+def simulate_sync(service: str) -> None:
+    time.sleep(_delay(service))
+
+
+# =========================
+# SEED DATA
+# =========================
+def _iso(value: str) -> str:
+    return datetime.strptime(value, "%m/%d/%Y").date().isoformat()
+
+
+def _phone(customer_id: str) -> str:
+    # The CSV holds phones in lossy scientific notation ("9.18E+11");
+    # give every customer a distinct, stable number instead
+    digits = int(hashlib.sha1(customer_id.encode("utf-8")).hexdigest(), 16) % 10 ** 9
+    return f"+919{digits:09d}"
+
+
+def load_seed(data_dir: str = DATA_DIR) -> Dict[str, List[Dict]]:
+    today = date.today()
+    tables: Dict[str, List[Dict]] = {"customers": [], "policies": [], "quotes": []}
+
+    with open(os.path.join(data_dir, "customers.csv"), newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            tables["customers"].append({
+                "customer_id": row["customer_id"],
+                "name": row["name"],
+                "phone": _phone(row["customer_id"]),
+            })
+
+    with open(os.path.join(data_dir, "policies.csv"), newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            expiry = _iso(row["expiry_date"])
+            tables["policies"].append({
+                "policy_id": row["policy_id"],
+                "customer_id": row["customer_id"],
+                "policy_type": row["policy_type"],
+                "insurer": row.get("insurer") or "Demo Insurer",
+                "premium": float(row["premium"]),
+                "policy_start": _iso(row["start_date"]),
+                "policy_expiry": expiry,
+                "status": policy_status(expiry, today),
+            })
+
+    quotes_path = os.path.join(data_dir, "quotes.json")
+    if os.path.exists(quotes_path):
+        with open(quotes_path, encoding="utf-8") as f:
+            tables["quotes"] = json.load(f)
+
+    return tables
+
+
+# =========================
+# SUPABASE
+# =========================
+# Embedded relations: (table, column) -> (related table, key, one-to-many)
+RELATIONS = {
+    ("policies", "customers"): ("customers", "customer_id", False),
+    ("customers", "policies"): ("policies", "customer_id", True),
+}
+EMBED = re.compile(r"^(\w+)\((.*)\)$", re.S)
+
+
+def _split_columns(columns: str) -> List[str]:
+    parts, depth, current = [], 0, ""
+    for ch in columns:
+        if ch == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        depth += ch == "("
+        depth -= ch == ")"
+        current += ch
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+class FakeResponse:
+    def __init__(self, data: List[Dict], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    def __init__(self, db: "FakeDatabase", table: str, is_async: bool):
+        self.db = db
+        self.table = table
+        self.is_async = is_async
+        self.action = "select"
+        self.columns = "*"
+        self.payload: Any = None
+        self.filters: List[Callable[[Dict], bool]] = []
+        self.ordering: List[Tuple[str, bool]] = []
+        self.offset = 0
+        self.count: Optional[int] = None
+
+    # ---------- actions ----------
+    def select(self, columns: str = "*", **_):
+        self.columns = columns
+        return self
+
+    def insert(self, rows, **_):
+        self.action, self.payload = "insert", rows
+        return self
+
+    def upsert(self, rows, **_):
+        self.action, self.payload = "upsert", rows
+        return self
+
+    def update(self, values: Dict, **_):
+        self.action, self.payload = "update", values
+        return self
+
+    def delete(self, **_):
+        self.action = "delete"
+        return self
+
+    # ---------- filters ----------
+    def _filter(self, column: str, test: Callable[[Any], bool]):
+        self.filters.append(lambda row: row.get(column) is not None and test(row.get(column)))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, lambda v: str(v) == str(value))
+
+    def neq(self, column, value):
+        self.filters.append(lambda row: str(row.get(column)) != str(value))
+        return self
+
+    def gt(self, column, value):
+        return self._filter(column, lambda v: v > type(v)(value))
+
+    def gte(self, column, value):
+        return self._filter(column, lambda v: v >= type(v)(value))
+
+    def lt(self, column, value):
+        return self._filter(column, lambda v: v < type(v)(value))
+
+    def lte(self, column, value):
+        return self._filter(column, lambda v: v <= type(v)(value))
+
+    def in_(self, column, values):
+        wanted = {str(v) for v in values}
+        return self._filter(column, lambda v: str(v) in wanted)
+
+    def ilike(self, column, pattern):
+        regex = re.compile("^" + re.escape(pattern).replace("%", ".*").replace("_", ".") + "$", re.I)
+        return self._filter(column, lambda v: bool(regex.match(str(v))))
+
+    def order(self, column, desc: bool = False, **_):
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, size: int, **_):
+        self.count = size
+        return self
+
+    def range(self, start: int, end: int, **_):
+        self.offset, self.count = start, end - start + 1
+        return self
+
+    # ---------- execution ----------
+    def _project(self, row: Dict) -> Dict:
+        if self.columns.strip() == "*":
+            return dict(row)
+
+        out: Dict[str, Any] = {}
+        for column in _split_columns(self.columns):
+            embed = EMBED.match(column)
+            if column == "*":
+                out.update(row)
+            elif embed:
+                name, inner = embed.groups()
+                related, key, many = RELATIONS.get((self.table, name), (name, None, False))
+                pick = (lambda r: dict(r)) if inner.strip() == "*" else (
+                    lambda r: {c: r.get(c) for c in _split_columns(inner)}
+                )
+                if many:
+                    out[name] = [pick(r) for r in self.db.lookup_all(related, key, row.get(key))]
+                else:
+                    match = self.db.lookup(related, key, row.get(key)) if key else None
+                    out[name] = pick(match) if match is not None else None
+            else:
+                if column not in row:
+                    raise FakeServiceError("supabase", 400, f"column {self.table}.{column} does not exist")
+                out[column] = row[column]
+        return out
+
+    def _run(self) -> FakeResponse:
+        rows = self.db.tables.setdefault(self.table, [])
+        matches = [r for r in rows if all(f(r) for f in self.filters)]
+
+        if self.action == "insert" or self.action == "upsert":
+            new = self.payload if isinstance(self.payload, list) else [self.payload]
+            with self.db.lock:
+                for record in new:
+                    self.db.write(self.table, dict(record), replace=self.action == "upsert")
+            return FakeResponse([dict(r) for r in new])
+
+        if self.action == "update":
+            with self.db.lock:
+                for row in matches:
+                    row.update(self.payload)
+            return FakeResponse([dict(r) for r in matches])
+
+        if self.action == "delete":
+            with self.db.lock:
+                self.db.tables[self.table] = [r for r in rows if r not in matches]
+                self.db.reindex(self.table)
+            return FakeResponse([dict(r) for r in matches])
+
+        for column, desc in reversed(self.ordering):
+            matches.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=desc)
+        end = None if self.count is None else self.offset + self.count
+        return FakeResponse([self._project(r) for r in matches[self.offset:end]])
+
+    def _execute_sync(self) -> FakeResponse:
+        simulate_sync("supabase")
+        return self._run()
+
+    async def _execute_async(self) -> FakeResponse:
+        await simulate("supabase")
+        return self._run()
+
+    def execute(self):
+        return self._execute_async() if self.is_async else self._execute_sync()
+
+
+class FakeDatabase:
+    KEYS = {"customers": "customer_id", "policies": "policy_id", "quotes": "quote_id"}
+
+    def __init__(self, tables: Optional[Dict[str, List[Dict]]] = None):
+        self.lock = threading.Lock()
+        self.tables = tables if tables is not None else load_seed()
+        self._by_key: Dict[str, Dict[Any, Dict]] = {}
+        self._groups: Dict[Tuple[str, str], Dict[Any, List[Dict]]] = {}
+        for table in self.tables:
+            self.reindex(table)
+
+    def reindex(self, table: str) -> None:
+        self._groups = {k: v for k, v in self._groups.items() if k[0] != table}
+        key = self.KEYS.get(table)
+        if key:
+            self._by_key[table] = {r.get(key): r for r in self.tables[table]}
+
+    def lookup(self, table: str, key: str, value: Any) -> Optional[Dict]:
+        if key == self.KEYS.get(table):
+            return self._by_key.get(table, {}).get(value)
+        return next((r for r in self.tables.get(table, []) if r.get(key) == value), None)
+
+    def lookup_all(self, table: str, key: str, value: Any) -> List[Dict]:
+        if (table, key) not in self._groups:
+            groups: Dict[Any, List[Dict]] = {}
+            for r in self.tables.get(table, []):
+                groups.setdefault(r.get(key), []).append(r)
+            self._groups[(table, key)] = groups
+        return self._groups[(table, key)].get(value, [])
+
+    def write(self, table: str, record: Dict, replace: bool) -> None:
+        key = self.KEYS.get(table)
+        rows = self.tables.setdefault(table, [])
+        existing = self._by_key.get(table, {}).get(record.get(key)) if key else None
+        if existing is not None and replace:
+            existing.update(record)
+            return
+        rows.append(record)
+        self._groups = {k: v for k, v in self._groups.items() if k[0] != table}
+        if key:
+            self._by_key.setdefault(table, {})[record.get(key)] = record
+
+
+class FakeSupabase:
+    def __init__(self, db: FakeDatabase, is_async: bool):
+        self.db = db
+        self.is_async = is_async
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self.db, name, self.is_async)
+
+    from_ = table
+
+
+_db: Optional[FakeDatabase] = None
+_db_lock = threading.Lock()
+
+
+def fake_database() -> FakeDatabase:
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                _db = FakeDatabase()
+    return _db
+
+
+def fake_supabase(is_async: bool) -> FakeSupabase:
+    return FakeSupabase(fake_database(), is_async)
+
+
+# =========================
+# TWILIO
+# =========================
+class FakeMessages:
+    def __init__(self):
+        self.sent: List[Dict] = []
+
+    def _message(self, body: str, from_: str, to: str):
+        message = {"sid": "SM" + uuid.uuid4().hex, "body": body, "from_": from_, "to": to}
+        self.sent.append(message)
+        del self.sent[:-1000]
+        return type("FakeMessage", (), message)()
+
+    def create(self, body: str, from_: str, to: str, **_):
+        simulate_sync("twilio")
+        return self._message(body, from_, to)
+
+    async def create_async(self, body: str, from_: str, to: str, **_):
+        await simulate("twilio")
+        return self._message(body, from_, to)
+
+
+class FakeTwilio:
+    def __init__(self):
+        self.messages = FakeMessages()
+        self.http_client = None
+
+
+# =========================
+# GROQ
+# =========================
+def fake_llm(temperature: Optional[float] = None, max_tokens: Optional[int] = None):
+    # langchain_core is only imported when the fake LLM is requested
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, AIMessageChunk
+    from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+    def answer(messages) -> str:
+        prompt = "\n".join(str(m.content) for m in messages)
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        words = re.findall(r"\w+", prompt)[-12:]
+        text = f"[fake-groq {digest}] Based on the details provided: {' '.join(words)}."
+        if max_tokens:
+            text = " ".join(text.split()[:max_tokens])
+        return text
+
+    class FakeChatGroq(BaseChatModel):
+        model_name: str = "fake-groq"
+        temperature: Optional[float] = None
+        max_tokens: Optional[int] = None
+
+        @property
+        def _llm_type(self) -> str:
+            return "fake-groq"
+
+        def bind_tools(self, tools, **kwargs):
+            # Never calls tools: agents take their no-tool path
+            return self
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            simulate_sync("groq")
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=answer(messages)))])
+
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+            await simulate("groq")
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=answer(messages)))])
+
+        async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+            await simulate("groq")   # time to first token
+            for i, word in enumerate(answer(messages).split()):
+                if i:
+                    await asyncio.sleep(GROQ_TOKEN_MS / 1000)
+                yield ChatGenerationChunk(message=AIMessageChunk(content=("" if i == 0 else " ") + word))
+
+    return FakeChatGroq(temperature=temperature, max_tokens=max_tokens)
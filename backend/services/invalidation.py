@@ -0,0 +1,203 @@
+"""
+Change notifications for cached data.
+
+Caches subscribe to a topic when their module is imported; writers
+publish the changed record once, instead of knowing every cache that
+holds a copy of it.
+
+    subscribe("customer", lambda record: cache.delete(record["customer_id"]))
+    publish("customer", updated_row)
+
+Handlers in this process run at once. While the change log is running
+(started with the app), published changes are also appended to a
+shared SQLite log and every other worker on the host replays them
+within INVALIDATION_POLL_SECONDS, so a CRM update handled by one
+uvicorn worker evicts the copies held by the others.
+
+Bulk reloads (data/load_data.py) run in their own process, so they
+bump a data version file instead; caches compare data_version().
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+CUSTOMER = "customer"
+POLICY = "policy"
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+DATA_VERSION_PATH = os.getenv("DATA_VERSION_PATH", os.path.join(DATA_DIR, ".data_version"))
+
+# =========================
+# CONFIG
+# =========================
+INVALIDATION_PATH = os.getenv("INVALIDATION_PATH", os.path.join(DATA_DIR, "invalidation.sqlite"))
+INVALIDATION_POLL_SECONDS = float(os.getenv("INVALIDATION_POLL_SECONDS", "1"))
+INVALIDATION_KEEP_SECONDS = 3600       # log rows older than this are trimmed
+
+_handlers: Dict[str, List[Callable[[Any], None]]] = defaultdict(list)
+
+
+def subscribe(topic: str, handler: Callable[[Any], None]) -> None:
+    if handler not in _handlers[topic]:
+        _handlers[topic].append(handler)
+
+
+def _deliver(topic: str, payload: Any) -> None:
+    """Call every handler; one failing handler doesn't stop the rest."""
+    for handler in list(_handlers[topic]):
+        try:
+            handler(payload)
+        except Exception as e:
+            print(f"[INVALIDATION] {topic} handler {getattr(handler, '__qualname__', handler)} failed: {e}")
+
+
+def publish(topic: str, payload: Any) -> None:
+    """Notify this process now and, through the change log, the other workers."""
+    _deliver(topic, payload)
+    change_log.add(topic, payload)
+
+
+# =========================
+# SHARED CHANGE LOG
+# =========================
+class ChangeLogStore:
+    """Append-only SQLite (WAL) table of changes, shared by the workers on a host."""
+
+    def __init__(self, path: str = INVALIDATION_PATH):
+        self.origin = uuid.uuid4().hex
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS changes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                origin TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        # Only changes made after this worker started are replayed
+        self.last_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM changes").fetchone()[0]
+
+    def append(self, changes: List[Tuple[str, Any]]) -> None:
+        now = time.time()
+        self._conn.executemany(
+            "INSERT INTO changes (origin, topic, payload, created_at) VALUES (?, ?, ?, ?)",
+            [(self.origin, topic, json.dumps(payload, default=str), now) for topic, payload in changes],
+        )
+
+    def read(self) -> List[Tuple[str, Any]]:
+        """Changes published by other workers since the last read."""
+        rows = self._conn.execute(
+            "SELECT id, origin, topic, payload FROM changes WHERE id > ? ORDER BY id", (self.last_id,)
+        ).fetchall()
+        if rows:
+            self.last_id = rows[-1][0]
+        return [(topic, json.loads(payload)) for _, origin, topic, payload in rows if origin != self.origin]
+
+    def trim(self, older_than: float = INVALIDATION_KEEP_SECONDS) -> None:
+        self._conn.execute("DELETE FROM changes WHERE created_at < ?", (time.time() - older_than,))
+
+
+class ChangeLog:
+    def __init__(self, path: str = INVALIDATION_PATH, poll_seconds: float = INVALIDATION_POLL_SECONDS):
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self.store: Optional[ChangeLogStore] = None
+        self.sent = 0
+        self.received = 0
+        self.last_error: Optional[str] = None
+        self._outgoing: Deque[Tuple[str, Any]] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+
+    def add(self, topic: str, payload: Any) -> None:
+        # publish() runs on the loop and in tool threads; the poller writes in batches
+        if self._task is not None:
+            self._outgoing.append((topic, payload))
+
+    def _sync(self) -> List[Tuple[str, Any]]:
+        with self._lock:
+            if self.store is None:
+                self.store = ChangeLogStore(self.path)
+            outgoing = []
+            while self._outgoing:
+                outgoing.append(self._outgoing.popleft())
+            if outgoing:
+                self.store.append(outgoing)
+                self.sent += len(outgoing)
+            return self.store.read()
+
+    async def poll(self) -> None:
+        """Write queued changes and replay the other workers' ones."""
+        for topic, payload in await asyncio.to_thread(self._sync):
+            self.received += 1
+            _deliver(topic, payload)
+
+    async def _run(self) -> None:
+        polls = 0
+        while True:
+            try:
+                await self.poll()
+                polls += 1
+                if polls % 600 == 0:
+                    await asyncio.to_thread(self.store.trim)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"[INVALIDATION] change log failed: {e}")
+            await asyncio.sleep(self.poll_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        try:
+            await self.poll()   # flush what this worker published last
+        except Exception as e:
+            print(f"[INVALIDATION] final flush failed: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            "running": self._task is not None,
+            "sent": self.sent,
+            "received": self.received,
+            "pending": len(self._outgoing),
+            "last_error": self.last_error,
+        }
+
+
+change_log = ChangeLog()
+
+
+# =========================
+# BULK RELOADS
+# =========================
+def bump_data_version() -> None:
+    """Mark every cached customer and policy stale, in every process on the host."""
+    with open(DATA_VERSION_PATH, "a"):
+        pass
+    os.utime(DATA_VERSION_PATH)
+
+
+def data_version() -> int:
+    try:
+        return os.stat(DATA_VERSION_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return 0
@@ -0,0 +1,176 @@
+"""
+Helpers for the list endpoints (/customers, /policies, /crm-dashboard):
+keyset cursors, column projection, policy status from real dates, and
+ETag-validated responses backed by a short-lived page cache.
+
+Polling clients send If-None-Match and get an empty 304 while the page
+is unchanged. Pages are cached for LIST_CACHE_TTL seconds, so any
+number of pollers cost at most one Supabase query per page per TTL.
+"""
+import base64
+import hashlib
+import json
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+
+from services.invalidation import CUSTOMER, POLICY, subscribe
+from services.llm_cache import MemoryCache
+
+# =========================
+# CONFIG
+# =========================
+LIST_CACHE_TTL = int(os.getenv("LIST_CACHE_TTL", "10"))     # seconds
+MAX_PAGE_SIZE = 500
+EXPIRING_WINDOW_DAYS = 30
+
+# Browsers keep the body and revalidate with If-None-Match every time
+CACHE_CONTROL = "no-cache"
+
+page_cache = MemoryCache(max_size=256, ttl=LIST_CACHE_TTL)
+
+
+def _drop_pages(record: Dict) -> None:
+    # Pages embed customer names and phones; they are cheap to rebuild
+    page_cache.clear()
+
+
+subscribe(CUSTOMER, _drop_pages)
+subscribe(POLICY, _drop_pages)
+
+
+# =========================
+# STATUS
+# =========================
+def to_date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def policy_status(expiry: Any, today: Optional[date] = None, fallback: str = "Active") -> str:
+    """Expired / Expiring (within EXPIRING_WINDOW_DAYS) / Active, from the expiry date."""
+    expires = to_date(expiry)
+    if expires is None:
+        return fallback
+
+    today = today or date.today()
+    if expires < today:
+        return "Expired"
+    if expires <= today + timedelta(days=EXPIRING_WINDOW_DAYS):
+        return "Expiring"
+    return "Active"
+
+
+def dashboard_rows(rows: List[Dict], today: Optional[date] = None) -> List[Dict]:
+    """/crm-dashboard table rows from policies joined with customers(name, phone)."""
+    today = today or date.today()
+    table_data = []
+    for row in rows:
+        customer = row.get("customers") or {}
+        table_data.append({
+            "name": customer.get("name", "Unknown"),
+            "phone": customer.get("phone", "N/A"),
+            "policy_type": row.get("policy_type", "N/A"),
+            "policy_id": row.get("policy_id", "N/A"),
+            "status": policy_status(row.get("policy_expiry"), today, row.get("status") or "Active"),
+        })
+    return table_data
+
+
+# =========================
+# CURSORS & PROJECTION
+# =========================
+def encode_cursor(key: Any) -> str:
+    raw = json.dumps({"after": key}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Any]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded))["after"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page_size(limit: int) -> int:
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str], key: str) -> str:
+    """
+    Validated select() column list for ?fields=a,b. The key column is
+    always included since the cursor is built from it.
+    """
+    if not fields:
+        return "*"
+
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = sorted(set(requested) - set(allowed))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    if key not in requested:
+        requested.insert(0, key)
+    return ",".join(requested)
+
+
+def split_page(rows: List[Dict], limit: int, key: str) -> Tuple[List[Dict], Optional[str]]:
+    """Rows were fetched with limit + 1: trim and build the next cursor."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1][key])
+
+
+# =========================
+# ETAG RESPONSES
+# =========================
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Compare weakly: W/"x" and "x" are the same representation here
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+async def cached_page(
+    request: Request,
+    key: str,
+    build: Callable[[], Awaitable[Tuple[Any, Dict[str, str]]]],
+) -> Response:
+    """
+    Serve a JSON page with an ETag, from the page cache when possible.
+    build() returns (payload, extra headers).
+    """
+    entry = page_cache.get(key)
+    if entry is None:
+        payload, headers = await build()
+        body = json.dumps(payload, default=str, separators=(",", ":"))
+        etag = f'W/"{hashlib.sha1(body.encode("utf-8")).hexdigest()}"'
+        entry = [etag, body, headers]
+        page_cache.set(key, entry)
+
+    etag, body, headers = entry
+    headers = {**headers, "ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
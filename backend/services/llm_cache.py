@@ -0,0 +1,344 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from services.singleflight import SingleFlight
+
+# =========================
+# CONFIG
+# =========================
+# LLM_CACHE_BACKEND: memory (default) | sqlite | none
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory").lower()
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "3600"))          # seconds
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "2048"))        # entries
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join("data", "llm_cache.sqlite"))
+SQLITE_TRIM_EVERY = 64      # writes between size checks of an on-disk cache
+
+
+# =========================
+# BACKENDS
+# =========================
+class BaseCache:
+    """
+    Key/value cache with TTL, LRU eviction and hit/miss counters.
+    Values must be JSON-serializable. Async callers go through
+    cache_get/cache_set, which move blocking backends off the loop.
+    """
+
+    blocking = False
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> bool:
+        """Remove key; True if it was there."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "size": len(self),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class MemoryCache(BaseCache):
+    """In-process LRU cache (per worker)."""
+
+    def __init__(self, max_size: int = LLM_CACHE_SIZE, ttl: int = LLM_CACHE_TTL):
+        super().__init__(max_size, ttl)
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache(BaseCache):
+    """
+    On-disk cache shared by every worker on the host and kept
+    across restarts. Every SQLITE_TRIM_EVERY writes, least recently
+    used rows past max_size are trimmed.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_size: int = LLM_CACHE_SIZE, ttl: int = LLM_CACHE_TTL):
+        super().__init__(max_size, ttl)
+        self.path = path
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache(accessed_at)")
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + self.ttl, now),
+            )
+            self._writes += 1
+            if self._writes % SQLITE_TRIM_EVERY == 0:
+                self._trim(now)
+
+    def _trim(self, now: float) -> None:
+        overflow = self._count() - self.max_size
+        if overflow > 0:
+            self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+            overflow = self._count() - self.max_size
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN "
+                "(SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += overflow
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._conn.execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount > 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count()
+
+
+async def cache_get(cache: BaseCache, key: str) -> Optional[Any]:
+    if cache.blocking:
+        return await asyncio.to_thread(cache.get, key)
+    return cache.get(key)
+
+
+async def cache_set(cache: BaseCache, key: str, value: Any) -> None:
+    if cache.blocking:
+        await asyncio.to_thread(cache.set, key, value)
+    else:
+        cache.set(key, value)
+
+
+# =========================
+# LLM CACHE (SHARED BY ALL AGENTS)
+# =========================
+_cache: Optional[BaseCache] = None
+_cache_ready = False
+
+# Identical prompts already on their way to Groq share one call.
+llm_flight = SingleFlight("llm")
+
+
+def get_llm_cache() -> Optional[BaseCache]:
+    """
+    Cache selected by LLM_CACHE_BACKEND, built on first use.
+    Returns None when caching is disabled.
+    """
+    global _cache, _cache_ready
+    if not _cache_ready:
+        if LLM_CACHE_BACKEND == "sqlite":
+            _cache = SQLiteCache()
+        elif LLM_CACHE_BACKEND == "memory":
+            _cache = MemoryCache()
+        else:
+            _cache = None
+        _cache_ready = True
+    return _cache
+
+
+def normalize_prompt(prompt: Any) -> str:
+    """
+    Collapse whitespace so trivially different prompts share one
+    entry; case is kept, it can change the answer. Message lists are
+    flattened as "role: content".
+    """
+    if isinstance(prompt, (list, tuple)):
+        prompt = "\n".join(
+            f"{getattr(m, 'type', 'human')}: {getattr(m, 'content', m)}" for m in prompt
+        )
+    return re.sub(r"\s+", " ", str(prompt)).strip()
+
+
+def llm_cache_key(llm: Any, prompt: Any) -> str:
+    """
+    Key on model, sampling settings, bound call arguments (tools,
+    stop, ...) and the normalized prompt. Runnables from .bind() or
+    .bind_tools() are unwrapped to the chat model they call.
+    """
+    bound: Dict[str, Any] = {}
+    while hasattr(llm, "bound") and hasattr(llm, "kwargs"):
+        bound = {**llm.kwargs, **bound}     # outer bindings win, as at call time
+        llm = llm.bound
+    model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+    raw = json.dumps(
+        [
+            model,
+            bound.get("temperature", getattr(llm, "temperature", None)),
+            bound.get("max_tokens", getattr(llm, "max_tokens", None)),
+            bound,
+            normalize_prompt(prompt),
+        ],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def cached_ainvoke(llm: Any, prompt: Any):
+    """
+    Drop-in for `await llm.ainvoke(prompt)` that serves repeated
+    prompts from the shared cache and coalesces identical
+    concurrent misses into one upstream call.
+    """
+    cache = get_llm_cache()
+    key = llm_cache_key(llm, prompt)
+
+    if cache is not None:
+        content = await cache_get(cache, key)
+        if content is not None:
+            from langchain_core.messages import AIMessage
+
+            return AIMessage(content=content)
+
+    async def invoke():
+        response = await llm.ainvoke(prompt)
+
+        # Only plain text answers are reusable; tool calls must re-run.
+        if (
+            cache is not None
+            and isinstance(response.content, str)
+            and response.content
+            and not getattr(response, "tool_calls", None)
+        ):
+            await cache_set(cache, key, response.content)
+
+        return response
+
+    return await llm_flight.do(key, invoke)
+
+
+async def cached_astream(llm: Any, prompt: Any):
+    """
+    Streaming counterpart of cached_ainvoke: yields text pieces from
+    `llm.astream(prompt)`, or the whole cached answer at once on a hit.
+    The complete answer is cached when the stream finishes.
+    """
+    cache = get_llm_cache()
+    key = llm_cache_key(llm, prompt)
+
+    if cache is not None:
+        content = await cache_get(cache, key)
+        if content is not None:
+            yield content
+            return
+
+    parts = []
+    async for chunk in llm.astream(prompt):
+        if isinstance(chunk.content, str) and chunk.content:
+            parts.append(chunk.content)
+            yield chunk.content
+
+    if cache is not None and parts:
+        await cache_set(cache, key, "".join(parts))
+
+
+def llm_cache_stats() -> Dict[str, Any]:
+    cache = get_llm_cache()
+    return cache.stats() if cache is not None else {"backend": "none"}
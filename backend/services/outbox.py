@@ -0,0 +1,350 @@
+"""
+Durable outbox for WhatsApp reminders.
+
+Messages are written to a local SQLite (WAL) table before anything is
+sent, keyed by an idempotency key (policy_id:expiry:campaign), so
+enqueueing the same campaign twice adds nothing. A pool of workers
+claims pending rows under a lease, sends them through the rate-limited
+dispatcher and marks each row sent once. After a crash, rows whose
+lease expired are claimed again, so a campaign resumes where it
+stopped instead of starting over.
+
+A crash between Twilio accepting a message and the row being marked
+sent can still resend that one message; rows marked sent never are.
+
+Failed rows are queued again by POST /jobs/{job_id}/retry, or by
+enqueueing the same key again (e.g. re-running the campaign).
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.clients import use_fake
+from services.dispatcher import WHATSAPP_CONCURRENCY, dispatcher
+
+# =========================
+# CONFIG
+# =========================
+# Fake sends get their own file so they never mark real reminders as sent
+OUTBOX_PATH = os.getenv(
+    "OUTBOX_PATH",
+    os.path.join("data", "outbox.fake.sqlite" if use_fake("twilio") else "outbox.sqlite"),
+)
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", str(WHATSAPP_CONCURRENCY)))
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+OUTBOX_CLAIM_BATCH = 50
+
+
+def idempotency_key(policy_id: Any, expiry: Any, campaign: str) -> str:
+    return f"{policy_id}:{str(expiry)[:10]}:{campaign}"
+
+
+# =========================
+# STORE
+# =========================
+class OutboxStore:
+    def __init__(self, path: str = OUTBOX_PATH, lease_seconds: float = OUTBOX_LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT NOT NULL UNIQUE,
+                campaign TEXT NOT NULL,
+                job_id TEXT NOT NULL,
+                ref TEXT,
+                phone TEXT NOT NULL,
+                message TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                sid TEXT,
+                error TEXT,
+                lease_until REAL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS outbox_status ON outbox(status, id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS outbox_job ON outbox(job_id, status)")
+
+    def enqueue(self, items: List[Dict[str, Any]], campaign: str, job_id: str) -> Tuple[int, int]:
+        """
+        Insert items ({"key", "ref", "phone", "message"}). Keys already
+        pending or sent are skipped; failed ones are queued again under
+        this job. Returns (added, duplicates).
+        """
+        now = time.time()
+        rows = [
+            (item["key"], campaign, job_id, item.get("ref"), str(item["phone"]), item["message"], now, now)
+            for item in items
+        ]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO outbox "
+                    "(key, campaign, job_id, ref, phone, message, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.executemany(
+                    "UPDATE outbox SET status = 'pending', campaign = ?, job_id = ?, ref = ?, phone = ?, "
+                    "message = ?, error = NULL, updated_at = ? WHERE key = ? AND status = 'failed'",
+                    [(campaign, job_id, ref, phone, message, updated, key)
+                     for key, _, _, ref, phone, message, _, updated in rows],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            added = self._conn.total_changes - before
+        return added, len(rows) - added
+
+    def claim(self, limit: int = OUTBOX_CLAIM_BATCH) -> List[Dict[str, Any]]:
+        """
+        Lease up to `limit` pending rows (or rows whose lease expired,
+        i.e. whose worker died). BEGIN IMMEDIATE keeps two processes
+        from claiming the same row.
+        """
+        now = time.time()
+        lease_until = now + self.lease_seconds
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, key, ref, phone, message, attempts FROM outbox "
+                    "WHERE status = 'pending' OR (status = 'sending' AND lease_until < ?) "
+                    "ORDER BY id LIMIT ?",
+                    (now, limit),
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE outbox SET status = 'sending', attempts = attempts + 1, "
+                    "lease_until = ?, updated_at = ? WHERE id = ?",
+                    [(lease_until, now, row[0]) for row in rows],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return [
+            {"id": r[0], "key": r[1], "ref": r[2], "phone": r[3], "message": r[4],
+             "attempts": r[5] + 1, "lease_until": lease_until}
+            for r in rows
+        ]
+
+    def owns(self, row: Dict[str, Any]) -> bool:
+        """True while the claim on `row` is current (not expired and re-claimed)."""
+        if time.time() >= row["lease_until"]:
+            return False
+        with self._lock:
+            found = self._conn.execute(
+                "SELECT 1 FROM outbox WHERE id = ? AND status = 'sending' AND lease_until = ?",
+                (row["id"], row["lease_until"]),
+            ).fetchone()
+        return found is not None
+
+    def mark_sent(self, row: Dict[str, Any], sid: str) -> bool:
+        # Recorded even if the lease ran out meanwhile: the message went
+        # out, and a later claimant must not send it again
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE outbox SET status = 'sent', sid = ?, error = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND status != 'sent'",
+                (sid, time.time(), row["id"]),
+            )
+            return cur.rowcount == 1
+
+    def mark_failed(self, row: Dict[str, Any], error: str) -> bool:
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE outbox SET status = 'failed', error = ?, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'sending' AND lease_until = ?",
+                (error, time.time(), row["id"], row["lease_until"]),
+            )
+            return cur.rowcount == 1
+
+    def retry_failed(self, job_id: Optional[str] = None) -> int:
+        """Put failed rows (of one job, or all) back in the queue."""
+        query = "UPDATE outbox SET status = 'pending', error = NULL, updated_at = ? WHERE status = 'failed'"
+        params: List[Any] = [time.time()]
+        if job_id:
+            query += " AND job_id = ?"
+            params.append(job_id)
+        with self._lock:
+            return self._conn.execute(query, params).rowcount
+
+    def counts(self, job_id: Optional[str] = None) -> Dict[str, int]:
+        query = "SELECT status, COUNT(*) FROM outbox"
+        params: Tuple = ()
+        if job_id:
+            query += " WHERE job_id = ?"
+            params = (job_id,)
+        with self._lock:
+            rows = self._conn.execute(query + " GROUP BY status", params).fetchall()
+        counts = {"pending": 0, "sending": 0, "sent": 0, "failed": 0}
+        counts.update(dict(rows))
+        return counts
+
+    def errors(self, job_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ref, error FROM outbox WHERE job_id = ? AND status = 'failed' "
+                "ORDER BY updated_at DESC LIMIT ?",
+                (job_id, limit),
+            ).fetchall()
+        return [{"item": ref, "error": error} for ref, error in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# =========================
+# WORKERS
+# =========================
+class Outbox:
+    """
+    Outbox store plus the worker pool draining it. Store calls from the
+    event loop go through asyncio.to_thread; the store serialises them.
+    """
+
+    def __init__(self, path: str = OUTBOX_PATH, workers: int = OUTBOX_WORKERS):
+        self.path = path
+        self.workers = workers
+        self._store: Optional[OutboxStore] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self.duplicates = 0
+
+    @property
+    def store(self) -> OutboxStore:
+        # Opened on first use so importing the module touches no files
+        if self._store is None:
+            self._store = OutboxStore(self.path)
+        return self._store
+
+    def start(self) -> None:
+        """Start the workers (idempotent). Leftover rows from a crash are picked up."""
+        if self._tasks:
+            return
+        self._wake = asyncio.Event()
+        self._queue = asyncio.Queue(maxsize=self.workers * 2)
+        self._tasks = [asyncio.ensure_future(self._feed())]
+        self._tasks += [asyncio.ensure_future(self._work()) for _ in range(max(1, self.workers))]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Rows leased but not sent go back to pending after the lease
+
+    async def submit(self, items: List[Dict[str, Any]], campaign: str) -> Dict[str, Any]:
+        """Enqueue a campaign; returns its job id and how many were new."""
+        self.start()
+        job_id = uuid.uuid4().hex
+        added, duplicates = await asyncio.to_thread(self.store.enqueue, items, campaign, job_id)
+        self.duplicates += duplicates
+        self._wake.set()
+        return {"job_id": job_id, "campaign": campaign, "queued": added, "duplicates": duplicates}
+
+    async def _feed(self) -> None:
+        """Claim rows in batches and hand them to the workers."""
+        while True:
+            rows = await asyncio.to_thread(self.store.claim, min(OUTBOX_CLAIM_BATCH, self._queue.maxsize))
+            for row in rows:
+                await self._queue.put(row)
+            if rows:
+                continue
+
+            # Not wait_for: on 3.11 it swallows a cancel that lands as the
+            # event fires, and stop() would then wait forever
+            self._wake.clear()
+            waiter = asyncio.ensure_future(self._wake.wait())
+            try:
+                await asyncio.wait({waiter}, timeout=OUTBOX_POLL_SECONDS)
+            finally:
+                waiter.cancel()
+
+    async def _work(self) -> None:
+        # Imported here: whatsapp imports this module for its enqueue helpers
+        from services.whatsapp import deliver_whatsapp
+
+        while True:
+            row = await self._queue.get()
+
+            async def send_row():
+                # Checked after waiting for a rate-limit token: a row whose
+                # lease ran out meanwhile belongs to whoever claimed it next
+                if not await asyncio.to_thread(self.store.owns, row):
+                    return None
+                return await deliver_whatsapp(row["phone"], row["message"])
+
+            try:
+                sid = await dispatcher.send(send_row)
+                if sid is not None:
+                    await asyncio.to_thread(self.store.mark_sent, row, sid)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await asyncio.to_thread(self.store.mark_failed, row, str(e))
+
+    async def retry(self, job_id: str) -> int:
+        """Queue a job's failed rows again; returns how many."""
+        self.start()
+        requeued = await asyncio.to_thread(self.store.retry_failed, job_id)
+        if requeued:
+            self._wake.set()
+        return requeued
+
+    def job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        counts = self.store.counts(job_id)
+        total = sum(counts.values())
+        if not total:
+            return None
+        pending = counts["pending"] + counts["sending"]
+        return {
+            "job_id": job_id,
+            "kind": "outbox",
+            "status": "running" if pending else "completed",
+            "total": total,
+            "sent": counts["sent"],
+            "failed": counts["failed"],
+            "pending": pending,
+            "errors": self.store.errors(job_id),
+        }
+
+    async def wait(self, job_id: str, timeout: float = 60, interval: float = 0.2) -> Optional[Dict[str, Any]]:
+        """Poll a job until nothing is pending or the timeout passes."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await asyncio.to_thread(self.job, job_id)
+            if job is None or job["status"] == "completed" or time.monotonic() > deadline:
+                return job
+            await asyncio.sleep(interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "workers": self.workers if self._tasks else 0,
+            "duplicates_skipped": self.duplicates,
+            **self.store.counts(),
+        }
+
+
+outbox = Outbox()
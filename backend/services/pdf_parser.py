@@ -1,7 +1,7 @@
 import fitz  # PyMuPDF
 
 def read_policy_pdf(file_path: str) -> str:
-    text = "policy.pdf"
+    text = ""
     doc = fitz.open(file_path)
 
     for page in doc:
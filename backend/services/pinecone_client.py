@@ -1,29 +1,78 @@
+import asyncio
+import os
+import threading
 
+from services.embeddings import BatchEncoder, embedding_stats, encode_cached
 
-from sentence_transformers import SentenceTransformer
-from pinecone import Pinecone
-import os
+# VECTOR_BACKEND=pinecone queries the remote index; local searches the
+# mmap'd index built by `python -m services.vector_index build`, and falls
+# back to Pinecone (if PINECONE_API_KEY is set) until that index exists.
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone").lower()
+VECTOR_TOP_K = int(os.getenv("VECTOR_TOP_K", "1"))
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 
 _model = None
 _index = None
+_index_is_local = False
+_lock = threading.Lock()
 
 def get_model():
     global _model
-    if _model is None:
-        _model = SentenceTransformer("all-MiniLM-L6-v2")
+    with _lock:
+        if _model is None:
+            from sentence_transformers import SentenceTransformer
+
+            _model = SentenceTransformer(EMBEDDING_MODEL)
     return _model
 
+def _open_local_index():
+    from services.vector_index import LocalVectorIndex
+
+    try:
+        return LocalVectorIndex()
+    except FileNotFoundError as e:
+        if not os.getenv("PINECONE_API_KEY"):
+            raise RuntimeError(
+                f"VECTOR_BACKEND=local but there is no local index ({e}). "
+                "Build it with `python -m services.vector_index build`, or set PINECONE_API_KEY."
+            ) from e
+        print(f"[VECTOR] No local index ({e}); using Pinecone until one is built")
+        return None
+
 def get_index():
-    global _index
-    if _index is None:
-        pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-        _index = pc.Index("insurance-policies")
+    global _index, _index_is_local
+    with _lock:
+        if _index is None:
+            if VECTOR_BACKEND == "local":
+                _index = _open_local_index()
+                _index_is_local = _index is not None
+            if _index is None:
+                from pinecone import Pinecone
+
+                pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+                _index = pc.Index("insurance-policies")
     return _index
 
-def search_policy(query: str):
+# Concurrent async searches share one encode() batch
+encoder = BatchEncoder(get_model, EMBEDDING_MODEL)
+
+def search_policy(query: str, top_k: int = VECTOR_TOP_K):
     model = get_model()
     index = get_index()
 
-    vector = model.encode(query).tolist()
-    results = index.query(vector=vector, top_k=1, include_metadata=True)
+    vector = encode_cached(model, EMBEDDING_MODEL, query).tolist()
+    results = index.query(vector=vector, top_k=top_k, include_metadata=True)
     return results
+
+async def asearch_policy(query: str, top_k: int = VECTOR_TOP_K):
+    """search_policy for async callers: micro-batched encode, off the event loop."""
+    vector = (await encoder.encode(query)).tolist()
+    index = await asyncio.to_thread(get_index)
+
+    if _index_is_local:
+        # Sub-millisecond in-process search, no need for a thread hop
+        return index.query(vector=vector, top_k=top_k, include_metadata=True)
+    return await asyncio.to_thread(index.query, vector=vector, top_k=top_k, include_metadata=True)
+
+def search_stats():
+    return embedding_stats(encoder)
@@ -0,0 +1,282 @@
+"""
+Columnar, memory-mapped representation of POLICY_STORE.
+
+Each policy is stored as one row across fixed-width columns:
+integer policy number, dictionary-encoded type / insurer / status /
+customer name, premium, and start/expiry dates as day ordinals
+(~24 bytes per policy instead of a dict of strings). Dictionaries are
+stored in the same file as offset + UTF-8 blob pairs.
+
+The file is opened read-only with mmap, so every uvicorn worker on a
+host maps the same page-cache pages: one copy of the policy data per
+machine instead of one per worker. Files are named by the PDF's hash,
+so a new PDF produces a new file and workers still mapping the old one
+are never affected (this also keeps Windows happy, where a mapped file
+can't be replaced).
+"""
+import glob
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# =========================
+# LAYOUT
+# =========================
+MAGIC = b"POLCOL1\n"
+FORMAT_VERSION = 1
+DATE_FORMAT = "%d-%m-%y"
+ID_PREFIX = "POL"
+
+COLUMN_TYPES = {
+    "policy_num": "i",        # int32, sorted ascending
+    "policy_type": "B",       # uint8 dictionary code
+    "insurer": "H",           # uint16 dictionary code
+    "status": "B",            # uint8 dictionary code
+    "customer_name": "I",     # uint32 dictionary code
+    "premium": "i",           # int32
+    "start_day": "i",         # int32 date ordinal
+    "expiry_day": "i",        # int32 date ordinal
+}
+CATEGORICAL = ("policy_type", "insurer", "status", "customer_name")
+
+# Dictionaries up to this size are decoded once per worker;
+# larger ones (customer names) are decoded on access.
+EAGER_DICT_MAX = 4096
+
+
+def columns_path(index_path: str, pdf_sha256: str) -> str:
+    base = index_path[:-len(".index.sqlite")] if index_path.endswith(".index.sqlite") else index_path
+    return f"{base}.columns.{pdf_sha256[:16]}.bin"
+
+
+def _pad(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _day(value: str) -> int:
+    return datetime.strptime(value, DATE_FORMAT).date().toordinal()
+
+
+# =========================
+# WRITE
+# =========================
+def write_columns(policies: Iterable[Dict], path: str, source: Optional[Dict] = None) -> int:
+    """
+    Encode policy dicts into a columnar file (atomic replace).
+    Returns the number of rows written.
+    """
+    rows: List[Tuple[int, Dict]] = []
+    width = 0
+    for p in policies:
+        pid = p["policy_id"]
+        if not pid.startswith(ID_PREFIX) or not pid[len(ID_PREFIX):].isdigit():
+            raise ValueError(f"Unsupported policy id {pid!r}")
+        width = max(width, len(pid) - len(ID_PREFIX))
+        rows.append((int(pid[len(ID_PREFIX):]), p))
+    rows.sort(key=lambda r: r[0])
+
+    codes: Dict[str, Dict[str, int]] = {name: {} for name in CATEGORICAL}
+    columns = {name: array(tc) for name, tc in COLUMN_TYPES.items()}
+
+    for num, p in rows:
+        columns["policy_num"].append(num)
+        for name in CATEGORICAL:
+            table = codes[name]
+            value = p[name]
+            if value not in table:
+                table[value] = len(table)
+            columns[name].append(table[value])
+        columns["premium"].append(int(p["premium"]))
+        columns["start_day"].append(_day(p["start_date"]))
+        columns["expiry_day"].append(_day(p["expiry_date"]))
+
+    sections: List[Tuple[str, bytes]] = []
+    for name, values in columns.items():
+        sections.append((f"col:{name}", values.tobytes()))
+    for name, table in codes.items():
+        blob = bytearray()
+        offsets = array("I", [0])
+        for value in table:
+            blob += value.encode("utf-8")
+            offsets.append(len(blob))
+        sections.append((f"dict_offsets:{name}", offsets.tobytes()))
+        sections.append((f"dict_blob:{name}", bytes(blob)))
+
+    layout = {}
+    offset = 0
+    for key, data in sections:
+        layout[key] = [offset, len(data)]
+        offset = _pad(offset + len(data))
+
+    header = json.dumps({
+        "version": FORMAT_VERSION,
+        "byteorder": sys.byteorder,
+        "rows": len(rows),
+        "id_width": width,
+        "column_types": COLUMN_TYPES,
+        "dict_sizes": {name: len(table) for name, table in codes.items()},
+        "layout": layout,
+        "source": source or {},
+    }).encode("utf-8")
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(b"\0" * (_pad(f.tell()) - f.tell()))
+        data_start = f.tell()
+        for key, data in sections:
+            f.seek(data_start + layout[key][0])
+            f.write(data)
+        # Make sure the file covers the last (possibly empty) section
+        f.truncate(data_start + offset)
+
+    os.replace(tmp_path, path)
+    return len(rows)
+
+
+def remove_stale(path: str) -> None:
+    """Best-effort cleanup of column files for older PDFs."""
+    pattern = path.rsplit(".columns.", 1)[0] + ".columns.*.bin"
+    for other in glob.glob(pattern):
+        if os.path.abspath(other) != os.path.abspath(path):
+            try:
+                os.remove(other)
+            except OSError:
+                pass  # still mapped by a worker (Windows) - next build retries
+
+
+# =========================
+# READ
+# =========================
+class ColumnarPolicyStore:
+    """
+    Read-only, mmap-backed policy store with the same read interface as
+    the dict store: get(policy_id), keys(), values(), items(), len, in.
+    Rows are materialized into the usual policy dict on access.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a policy column file")
+
+        (header_len,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        self.header = json.loads(self._mm[header_start:header_start + header_len])
+
+        if self.header["version"] != FORMAT_VERSION or self.header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was written by an incompatible build")
+
+        data_start = _pad(header_start + header_len)
+        view = memoryview(self._mm)
+
+        def section(key: str) -> memoryview:
+            start, length = self.header["layout"][key]
+            return view[data_start + start:data_start + start + length]
+
+        self._rows = self.header["rows"]
+        self._width = self.header["id_width"]
+        self._cols = {
+            name: section(f"col:{name}").cast(tc)
+            for name, tc in self.header["column_types"].items()
+        }
+
+        self._dict_offsets = {name: section(f"dict_offsets:{name}").cast("I") for name in CATEGORICAL}
+        self._dict_blobs = {name: section(f"dict_blob:{name}") for name in CATEGORICAL}
+        self._decoded: Dict[str, List[str]] = {
+            name: [self._decode(name, code) for code in range(size)]
+            for name, size in self.header["dict_sizes"].items()
+            if size <= EAGER_DICT_MAX
+        }
+
+    # ---------- dictionaries ----------
+    def _decode(self, name: str, code: int) -> str:
+        offsets = self._dict_offsets[name]
+        return bytes(self._dict_blobs[name][offsets[code]:offsets[code + 1]]).decode("utf-8")
+
+    def _value(self, name: str, code: int) -> str:
+        decoded = self._decoded.get(name)
+        return decoded[code] if decoded is not None else self._decode(name, code)
+
+    def categories(self, name: str) -> List[str]:
+        """All distinct values of a categorical column."""
+        return [self._value(name, code) for code in range(self.header["dict_sizes"][name])]
+
+    # ---------- rows ----------
+    def _row_index(self, policy_id: str) -> Optional[int]:
+        if not isinstance(policy_id, str) or not policy_id.startswith(ID_PREFIX):
+            return None
+        digits = policy_id[len(ID_PREFIX):]
+        if not digits.isdigit():
+            return None
+        num = int(digits)
+        nums = self._cols["policy_num"]
+        i = bisect_left(nums, num)
+        return i if i < self._rows and nums[i] == num else None
+
+    def _policy_id(self, i: int) -> str:
+        return f"{ID_PREFIX}{self._cols['policy_num'][i]:0{self._width}d}"
+
+    def _row(self, i: int) -> Dict:
+        cols = self._cols
+        return {
+            "policy_id": self._policy_id(i),
+            "policy_type": self._value("policy_type", cols["policy_type"][i]),
+            "insurer": self._value("insurer", cols["insurer"][i]),
+            "premium": cols["premium"][i],
+            "start_date": date.fromordinal(cols["start_day"][i]).strftime(DATE_FORMAT),
+            "expiry_date": date.fromordinal(cols["expiry_day"][i]).strftime(DATE_FORMAT),
+            "status": self._value("status", cols["status"][i]),
+            "customer_name": self._value("customer_name", cols["customer_name"][i]),
+        }
+
+    def row(self, i: int) -> Dict:
+        """Policy dict for row i (rows are in policy-number order)."""
+        return self._row(i)
+
+    def get(self, policy_id: str, default=None) -> Optional[Dict]:
+        i = self._row_index(policy_id)
+        return self._row(i) if i is not None else default
+
+    def __getitem__(self, policy_id: str) -> Dict:
+        policy = self.get(policy_id)
+        if policy is None:
+            raise KeyError(policy_id)
+        return policy
+
+    def __contains__(self, policy_id: object) -> bool:
+        return self._row_index(policy_id) is not None
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        return self.keys()
+
+    def keys(self) -> Iterator[str]:
+        for i in range(self._rows):
+            yield self._policy_id(i)
+
+    def values(self) -> Iterator[Dict]:
+        for i in range(self._rows):
+            yield self._row(i)
+
+    def items(self) -> Iterator[Tuple[str, Dict]]:
+        for i in range(self._rows):
+            row = self._row(i)
+            yield row["policy_id"], row
+
+    def column(self, name: str) -> memoryview:
+        """Raw column (codes for categorical columns)."""
+        return self._cols[name]
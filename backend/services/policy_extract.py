@@ -0,0 +1,159 @@
+"""
+Streaming, parallel extraction of policy rows from policies.pdf.
+
+Pages are extracted in a process pool (pdfplumber is pure Python and
+CPU bound) and matched in page order as they come back. The tail of
+each page, from the last row that could still be incomplete, is carried
+into the next page so rows straddling a page break are matched whole.
+Records are yielded one at a time, so memory stays flat however large
+the document is.
+"""
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+# =========================
+# CONFIG
+# =========================
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "0"))   # 0 = cpu count
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+
+# Unmatched text kept between pages when no row was found at all.
+# A single row is ~100 characters, so this is generous.
+MAX_CARRY_CHARS = 2048
+
+# =========================
+# ROW PATTERN
+# =========================
+POLICY_ROW_PATTERN = re.compile(
+    r"(POL\d{4})\s+"                   # Policy ID
+    r"\w+\s+"                          # Customer ID (ignored)
+    r"(Health|Life|Vehicle)\s+"        # Policy Type
+    r"(.*?)\s+"                        # Insurer
+    r"(\d{4,6})\s+"                    # Premium
+    r"(\d{2}-\d{2}-\d{2})\s+"          # Start Date
+    r"(\d{2}-\d{2}-\d{2})\s+"          # Expiry Date
+    r"(Active|Expired|Expiring)\s+"    # Status
+    r"([A-Za-z ]+)"                    # Customer Name
+)
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def policy_from_match(match: "re.Match") -> Dict:
+    return {
+        "policy_id": match.group(1),
+        "policy_type": match.group(2),
+        "insurer": match.group(3).strip(),
+        "premium": int(match.group(4)),
+        "start_date": match.group(5),
+        "expiry_date": match.group(6),
+        "status": match.group(7),
+        "customer_name": match.group(8).strip(),
+    }
+
+
+# =========================
+# PAGE TEXT (WORKERS)
+# =========================
+_worker_pdf = None
+
+
+def _open_worker_pdf(pdf_path: str) -> None:
+    # Each worker process opens the PDF once and reuses it for all its tasks.
+    global _worker_pdf
+    import pdfplumber
+
+    _worker_pdf = pdfplumber.open(pdf_path)
+
+
+def _extract_pages(start: int, stop: int) -> List[str]:
+    texts = []
+    for page in _worker_pdf.pages[start:stop]:
+        texts.append(page.extract_text() or "")
+        # Drop the parsed layout so long documents don't pile up in memory
+        page.close()
+    return texts
+
+
+def page_count(pdf_path: str) -> int:
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def iter_page_texts(pdf_path: str, workers: Optional[int] = None, pages_per_task: int = PDF_PAGES_PER_TASK) -> Iterator[str]:
+    """
+    Yield the text of every page, in order. Only a bounded window of
+    page batches is in flight at once.
+    """
+    pages = page_count(pdf_path)
+    ranges = [(i, min(i + pages_per_task, pages)) for i in range(0, pages, pages_per_task)]
+
+    workers = workers or PDF_EXTRACT_WORKERS or os.cpu_count() or 1
+    workers = min(workers, len(ranges))
+
+    # Small documents: a pool costs more than it saves
+    if workers <= 1:
+        _open_worker_pdf(pdf_path)
+        try:
+            for start, stop in ranges:
+                yield from _extract_pages(start, stop)
+        finally:
+            _worker_pdf.close()
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_open_worker_pdf, initargs=(pdf_path,)) as pool:
+        pending = deque()
+        remaining = iter(ranges)
+
+        for start, stop in remaining:
+            pending.append(pool.submit(_extract_pages, start, stop))
+            if len(pending) >= workers * 2:
+                break
+
+        while pending:
+            texts = pending.popleft().result()
+            next_range = next(remaining, None)
+            if next_range is not None:
+                pending.append(pool.submit(_extract_pages, *next_range))
+            yield from texts
+
+
+# =========================
+# ROW MATCHING
+# =========================
+def iter_policies_from_texts(texts: Iterator[str]) -> Iterator[Dict]:
+    """
+    Match policy rows across a stream of page texts.
+
+    The last match on a page may still grow (e.g. the customer name
+    continues on the next page), so matching restarts from it once the
+    next page arrives. Rows before it are final and are yielded.
+    """
+    carry = ""
+
+    for text in texts:
+        buffer = WHITESPACE.sub(" ", f"{carry} {text}")
+        last = None
+
+        for match in POLICY_ROW_PATTERN.finditer(buffer):
+            if last is not None:
+                yield policy_from_match(last)
+            last = match
+
+        if last is not None:
+            carry = buffer[last.start():]
+        else:
+            carry = buffer[-MAX_CARRY_CHARS:]
+
+    for match in POLICY_ROW_PATTERN.finditer(carry):
+        yield policy_from_match(match)
+
+
+def iter_policies(pdf_path: str, workers: Optional[int] = None) -> Iterator[Dict]:
+    """Policy records from the PDF, one at a time."""
+    return iter_policies_from_texts(iter_page_texts(pdf_path, workers))
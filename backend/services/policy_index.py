@@ -0,0 +1,249 @@
+"""
+Persistent compiled index of the policies parsed from policies.pdf.
+
+Parsing the PDF takes seconds, so the parsed POLICY_STORE is written to
+a small SQLite file keyed by the PDF's mtime, size and SHA-256. Workers
+open the index in milliseconds and only re-parse when the PDF changes.
+By default workers serve a memory-mapped columnar copy of the index
+(services/policy_columns) shared by every worker on the host.
+
+Prebuild at deploy time (from backend/):
+    python -m services.policy_index build
+    python -m services.policy_index status
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+from typing import Dict, Optional
+
+from services.policy_columns import ColumnarPolicyStore, columns_path, remove_stale, write_columns
+
+# =========================
+# CONFIG
+# =========================
+PDF_PATH = os.path.join("data", "policies.pdf")
+INDEX_PATH = os.getenv("POLICY_INDEX_PATH", os.path.join("data", "policies.index.sqlite"))
+# columnar (mmap, shared across workers) | dict (per-worker dicts)
+POLICY_STORE_FORMAT = os.getenv("POLICY_STORE_FORMAT", "columnar").lower()
+
+# Bump when the row layout or parser output changes.
+INDEX_VERSION = "1"
+
+COLUMNS = (
+    "policy_id",
+    "policy_type",
+    "insurer",
+    "premium",
+    "start_date",
+    "expiry_date",
+    "status",
+    "customer_name",
+)
+
+
+# =========================
+# FINGERPRINT
+# =========================
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_meta(conn: sqlite3.Connection) -> Dict[str, str]:
+    try:
+        return dict(conn.execute("SELECT key, value FROM meta").fetchall())
+    except sqlite3.DatabaseError:
+        return {}
+
+
+def is_fresh(index_path: str, pdf_path: str) -> bool:
+    """
+    True when the index was built from the current PDF.
+    mtime/size are checked first; the hash is only computed when the
+    mtime moved (e.g. a fresh checkout), and a matching hash re-stamps
+    the index instead of rebuilding it.
+    """
+    if not os.path.exists(index_path):
+        return False
+
+    if not os.path.exists(pdf_path):
+        # Deployed with a prebuilt index only
+        return True
+
+    stat = os.stat(pdf_path)
+    with sqlite3.connect(index_path) as conn:
+        meta = _read_meta(conn)
+
+        if meta.get("version") != INDEX_VERSION or meta.get("pdf_size") != str(stat.st_size):
+            return False
+
+        if meta.get("pdf_mtime_ns") == str(stat.st_mtime_ns):
+            return True
+
+        if meta.get("pdf_sha256") != file_sha256(pdf_path):
+            return False
+
+        conn.execute(
+            "UPDATE meta SET value = ? WHERE key = 'pdf_mtime_ns'",
+            (str(stat.st_mtime_ns),),
+        )
+        return True
+
+
+# =========================
+# BUILD
+# =========================
+def build_index(pdf_path: str = PDF_PATH, index_path: str = INDEX_PATH) -> Dict[str, Dict]:
+    """
+    Parse the PDF and atomically replace the index file.
+    Workers holding the old file open keep reading it until they reopen.
+    """
+    from agents.policy_data_agent import load_policies_from_pdf
+
+    stat = os.stat(pdf_path)
+    sha256 = file_sha256(pdf_path)
+    policies = load_policies_from_pdf(pdf_path)
+
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.execute(
+            """
+            CREATE TABLE policies (
+                policy_id TEXT PRIMARY KEY,
+                policy_type TEXT NOT NULL,
+                insurer TEXT NOT NULL,
+                premium INTEGER NOT NULL,
+                start_date TEXT NOT NULL,
+                expiry_date TEXT NOT NULL,
+                status TEXT NOT NULL,
+                customer_name TEXT NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        conn.executemany(
+            f"INSERT INTO policies ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            (tuple(p[c] for c in COLUMNS) for p in policies.values()),
+        )
+        conn.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?)",
+            [
+                ("version", INDEX_VERSION),
+                ("pdf_path", os.path.abspath(pdf_path)),
+                ("pdf_size", str(stat.st_size)),
+                ("pdf_mtime_ns", str(stat.st_mtime_ns)),
+                ("pdf_sha256", sha256),
+                ("built_at", str(int(time.time()))),
+                ("policies", str(len(policies))),
+            ],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, index_path)
+    write_columnar(index_path, policies, sha256)
+    print(f"[POLICY_INDEX] Built {index_path} ({len(policies)} policies)")
+    return policies
+
+
+def write_columnar(index_path: str, policies: Dict[str, Dict], sha256: str) -> str:
+    path = columns_path(index_path, sha256)
+    write_columns(policies.values(), path, source={"pdf_sha256": sha256})
+    remove_stale(path)
+    return path
+
+
+# =========================
+# LOAD
+# =========================
+def read_index(index_path: str = INDEX_PATH) -> Dict[str, Dict]:
+    with sqlite3.connect(f"file:{index_path}?mode=ro", uri=True) as conn:
+        rows = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM policies").fetchall()
+    return {row[0]: dict(zip(COLUMNS, row)) for row in rows}
+
+
+def open_columnar_store(index_path: str = INDEX_PATH) -> ColumnarPolicyStore:
+    """
+    Map the column file for the current index, writing it from the
+    index first if it is missing or unreadable.
+    """
+    with sqlite3.connect(f"file:{index_path}?mode=ro", uri=True) as conn:
+        sha256 = _read_meta(conn)["pdf_sha256"]
+
+    path = columns_path(index_path, sha256)
+    if os.path.exists(path):
+        try:
+            return ColumnarPolicyStore(path)
+        except ValueError:
+            pass  # written by an incompatible build, rewrite below
+
+    return ColumnarPolicyStore(write_columnar(index_path, read_index(index_path), sha256))
+
+
+def load_policy_store(pdf_path: str = PDF_PATH, index_path: str = INDEX_PATH):
+    """
+    POLICY_STORE from the on-disk index, rebuilding it first when the
+    PDF changed. Falls back to an empty store if neither exists.
+    Returns a ColumnarPolicyStore, or a plain dict with
+    POLICY_STORE_FORMAT=dict; both support get/keys/values/items.
+    """
+    if not is_fresh(index_path, pdf_path):
+        if not os.path.exists(pdf_path):
+            print("[POLICY_DATA] policies.pdf not found")
+            return {}
+        policies = build_index(pdf_path, index_path)
+        if POLICY_STORE_FORMAT != "columnar":
+            return policies
+    elif POLICY_STORE_FORMAT != "columnar":
+        return read_index(index_path)
+
+    return open_columnar_store(index_path)
+
+
+def index_status(pdf_path: str = PDF_PATH, index_path: str = INDEX_PATH) -> Optional[Dict[str, str]]:
+    if not os.path.exists(index_path):
+        return None
+    with sqlite3.connect(index_path) as conn:
+        meta = _read_meta(conn)
+    meta["fresh"] = str(is_fresh(index_path, pdf_path))
+    return meta
+
+
+# =========================
+# CLI
+# =========================
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or inspect the compiled policy index.")
+    parser.add_argument("command", choices=["build", "status"])
+    parser.add_argument("--pdf", default=PDF_PATH)
+    parser.add_argument("--index", default=INDEX_PATH)
+    parser.add_argument("--force", action="store_true", help="rebuild even if the index is fresh")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if not args.force and is_fresh(args.index, args.pdf):
+            print(f"[POLICY_INDEX] {args.index} is up to date")
+            return
+        build_index(args.pdf, args.index)
+        return
+
+    status = index_status(args.pdf, args.index)
+    if status is None:
+        print(f"[POLICY_INDEX] {args.index} does not exist")
+        return
+    for key, value in status.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
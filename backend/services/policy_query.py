@@ -0,0 +1,354 @@
+"""
+Column indexes and a small structured query engine over POLICY_STORE.
+
+Answers questions such as
+    "Health policies expiring in the next 15 days"
+    "total premium by insurer"
+    "how many expired policies does TrustCover have"
+    "list policies of Pooja Sharma"
+directly from in-memory indexes, without an LLM round trip.
+
+Only questions about the book as a whole are answered here: there must
+be an aggregate, list or time-window signal, and first-person questions
+("is my health policy active?") never match, so a customer asking
+about their own policy is not shown everyone else's.
+"""
+import re
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Set
+
+import numpy as np
+
+from services.policy_columns import ColumnarPolicyStore
+
+# =========================
+# CONFIG
+# =========================
+DATE_FORMAT = "%d-%m-%y"        # dates as printed in policies.pdf
+MAX_LISTED = 20                 # rows shown before "... and N more"
+
+TYPE_SYNONYMS = {
+    "health": ("Health",),
+    "medical": ("Health",),
+    "life": ("Life",),
+    "vehicle": ("Vehicle", "Car"),
+    "car": ("Car", "Vehicle"),
+    "motor": ("Vehicle", "Car"),
+}
+STATUS_WORDS = {"active": "Active", "expired": "Expired", "expiring": "Expiring"}
+GROUP_FIELDS = {
+    "insurer": "insurer",
+    "insurers": "insurer",
+    "type": "policy_type",
+    "types": "policy_type",
+    "policy type": "policy_type",
+    "status": "status",
+    "customer": "customer_name",
+    "customers": "customer_name",
+}
+UNIT_DAYS = {"day": 1, "week": 7, "month": 30, "year": 365}
+
+WORD = re.compile(r"[a-z0-9]+")
+NEXT_WINDOW = re.compile(r"\b(?:in|within|over)\s+(?:the\s+)?next\s+(\d+)\s+(day|week|month|year)s?\b")
+LAST_WINDOW = re.compile(r"\b(?:in|within|over)\s+(?:the\s+)?(?:last|past)\s+(\d+)\s+(day|week|month|year)s?\b")
+GROUP_BY = re.compile(r"\b(?:by|per)\s+(policy type|insurers?|types?|status|customers?)\b")
+SUM = re.compile(r"\b(?:total|sum(?: of)?)\s+premiums?\b")
+AVG = re.compile(r"\b(?:average|avg|mean)\s+premiums?\b")
+COUNT = re.compile(r"\b(?:how many|count|number of)\b")
+LIST = re.compile(r"\b(?:list|show all|all|which policies)\b")
+PERSONAL = re.compile(r"\b(?:i|me|my|mine)\b")
+
+
+def parse_date(value: str) -> Optional[date]:
+    try:
+        return datetime.strptime(value, DATE_FORMAT).date()
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize(text: str) -> str:
+    return " ".join(WORD.findall(text.casefold()))
+
+
+def is_personal(text: str) -> bool:
+    """First-person question ("is my policy active?"), about one customer's own policy."""
+    return PERSONAL.search(normalize(text)) is not None
+
+
+# =========================
+# INDEXES
+# =========================
+CATEGORICAL = ("policy_type", "status", "insurer", "customer_name")
+NEVER = date.max.toordinal()     # sorts policies without an expiry date last
+
+
+class PolicyIndexes:
+    """
+    Column arrays over the policy store: a dictionary code per row for
+    type, status, insurer and customer name, plus premium and expiry
+    day. Filters are vectorized scans over these arrays.
+
+    For a ColumnarPolicyStore the arrays are the store's mmap'd columns
+    themselves, so a worker keeps only the (small) dictionaries and every
+    worker on the host shares one copy of the book. A dict store
+    (POLICY_STORE_FORMAT=dict) is encoded into the same arrays once.
+    Only the rows of the page being returned are ever materialized.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        if isinstance(store, ColumnarPolicyStore):
+            self._from_columns(store)
+        else:
+            self._from_dicts(store)
+
+        self.code_of = {
+            name: {value: code for code, value in enumerate(values)}
+            for name, values in self.values.items()
+        }
+
+        # normalized name -> codes, and name token -> normalized names
+        self.name_codes: Dict[str, Set[int]] = defaultdict(set)
+        self.name_tokens: Dict[str, Set[str]] = defaultdict(set)
+        for code, value in enumerate(self.values["customer_name"]):
+            name = normalize(value)
+            self.name_codes[name].add(code)
+            for token in name.split():
+                self.name_tokens[token].add(name)
+
+        # normalized insurer / first insurer word -> canonical insurer
+        self.insurer_names: Dict[str, str] = {}
+        first_words = defaultdict(set)
+        for insurer in self.values["insurer"]:
+            key = normalize(insurer)
+            self.insurer_names[key] = insurer
+            first_words[key.split()[0]].add(insurer)
+        for word, insurers in first_words.items():
+            if len(insurers) == 1 and len(word) > 3:
+                self.insurer_names.setdefault(word, next(iter(insurers)))
+
+    def _from_columns(self, store: ColumnarPolicyStore) -> None:
+        # Zero-copy views of the mmap'd file
+        self.codes = {name: np.asarray(store.column(name)) for name in CATEGORICAL}
+        self.premium = np.asarray(store.column("premium"))
+        self.expiry = np.asarray(store.column("expiry_day"))
+        self.values = {name: store.categories(name) for name in CATEGORICAL}
+        self.row = store.row
+
+    def _from_dicts(self, store: Dict[str, Dict]) -> None:
+        ids = sorted(store)
+        self.values = {name: [] for name in CATEGORICAL}
+        codes = {name: {} for name in CATEGORICAL}
+        columns = {name: np.empty(len(ids), dtype=np.int32) for name in CATEGORICAL}
+        self.premium = np.empty(len(ids), dtype=np.float64)
+        self.expiry = np.empty(len(ids), dtype=np.int64)
+
+        for i, pid in enumerate(ids):
+            policy = store[pid]
+            for name in CATEGORICAL:
+                value = policy[name]
+                if value not in codes[name]:
+                    codes[name][value] = len(self.values[name])
+                    self.values[name].append(value)
+                columns[name][i] = codes[name][value]
+            self.premium[i] = policy["premium"]
+            expires = parse_date(policy["expiry_date"])
+            self.expiry[i] = expires.toordinal() if expires is not None else NEVER
+
+        self.codes = columns
+        self.row = lambda i: store[ids[i]]
+
+    def __len__(self) -> int:
+        return len(self.premium)
+
+    def has(self, field: str, value: str) -> bool:
+        return value in self.code_of[field]
+
+    def mask(self, field: str, values: Set[str]) -> np.ndarray:
+        """Rows whose field is one of values."""
+        if field == "customer_name":
+            wanted = set().union(*(self.name_codes.get(v, set()) for v in values))
+        else:
+            wanted = {self.code_of[field][v] for v in values if v in self.code_of[field]}
+        return np.isin(self.codes[field], np.fromiter(wanted, dtype=np.int64, count=len(wanted)))
+
+    def expiring_between(self, start: date, end: date) -> np.ndarray:
+        """Mask of rows expiring in [start, end]."""
+        return (self.expiry >= start.toordinal()) & (self.expiry <= end.toordinal())
+
+    def customers_in(self, text: str) -> Set[str]:
+        """Known customer names whose every token appears in the text."""
+        words = set(text.split())
+        candidates = set()
+        for token in words:
+            candidates |= self.name_tokens.get(token, set())
+        return {name for name in candidates if set(name.split()) <= words}
+
+    def insurers_in(self, text: str) -> Set[str]:
+        padded = f" {text} "
+        return {
+            insurer for key, insurer in self.insurer_names.items()
+            if f" {key} " in padded
+        }
+
+
+# =========================
+# QUERY PARSER
+# =========================
+def parse_query(text: str, indexes: PolicyIndexes, today: Optional[date] = None) -> Optional[Dict]:
+    """
+    Turn a question into filters + an aggregate. Returns None when
+    nothing structured was recognised.
+    """
+    today = today or date.today()
+    if is_personal(text):
+        return None
+    text = normalize(text)
+    words = set(text.split())
+    query: Dict = {"filters": {}, "window": None, "metric": "list", "group_by": None}
+
+    types = set()
+    for word, candidates in TYPE_SYNONYMS.items():
+        if word in words:
+            # Unknown type still filters (to nothing) rather than being ignored
+            known = {t for t in candidates if indexes.has("policy_type", t)}
+            types |= known or {candidates[0]}
+    if types:
+        query["filters"]["policy_type"] = types
+
+    match = NEXT_WINDOW.search(text)
+    if match:
+        days = int(match.group(1)) * UNIT_DAYS[match.group(2)]
+        query["window"] = (today, today + timedelta(days=days))
+    else:
+        match = LAST_WINDOW.search(text)
+        if match:
+            days = int(match.group(1)) * UNIT_DAYS[match.group(2)]
+            query["window"] = (today - timedelta(days=days), today)
+
+    # "expiring in the next N days" is a date window, not the status column
+    statuses = {
+        status for word, status in STATUS_WORDS.items()
+        if word in words and not (query["window"] and word in ("expiring", "expired"))
+    }
+    if statuses:
+        query["filters"]["status"] = statuses
+
+    insurers = indexes.insurers_in(text)
+    if insurers:
+        query["filters"]["insurer"] = insurers
+
+    customers = indexes.customers_in(text)
+    if customers:
+        query["filters"]["customer_name"] = customers
+
+    match = GROUP_BY.search(text)
+    if match:
+        query["group_by"] = GROUP_FIELDS[match.group(1)]
+
+    if SUM.search(text):
+        query["metric"] = "sum"
+    elif AVG.search(text):
+        query["metric"] = "avg"
+    elif COUNT.search(text):
+        query["metric"] = "count"
+    elif query["group_by"]:
+        query["metric"] = "count"
+
+    # A type or status word alone ("is the health policy active?") is not a book-wide question
+    if query["metric"] == "list" and not query["window"] and not LIST.search(text):
+        return None
+
+    return query
+
+
+# =========================
+# EXECUTION
+# =========================
+def execute(query: Dict, indexes: PolicyIndexes) -> np.ndarray:
+    """Row positions matching the query; lists are ordered by expiry, then policy id."""
+    mask = np.ones(len(indexes), dtype=bool)
+    for field, values in query["filters"].items():
+        mask &= indexes.mask(field, values)
+    if query["window"]:
+        mask &= indexes.expiring_between(*query["window"])
+
+    rows = np.flatnonzero(mask)
+    if query["metric"] == "list" and not query["group_by"]:
+        # Rows are stored in policy id order, so this is (expiry, policy_id)
+        rows = rows[np.argsort(indexes.expiry[rows], kind="stable")]
+    return rows
+
+
+def _describe(query: Dict) -> str:
+    parts = []
+    for field in ("policy_type", "status", "insurer", "customer_name"):
+        values = query["filters"].get(field)
+        if values:
+            parts.append("/".join(sorted(values)).title() if field == "customer_name" else "/".join(sorted(values)))
+    if query["window"]:
+        start, end = query["window"]
+        parts.append(f"expiring {start.strftime(DATE_FORMAT)} to {end.strftime(DATE_FORMAT)}")
+    return ", ".join(parts) or "all policies"
+
+
+def _premium(value: float) -> str:
+    return f"₹{value:,.0f}"
+
+
+def format_answer(query: Dict, rows: np.ndarray, indexes: PolicyIndexes) -> str:
+    label = _describe(query)
+    metric = query["metric"]
+
+    if not len(rows):
+        return f"No policies found ({label})."
+
+    premiums = indexes.premium[rows].astype(np.float64)
+
+    if query["group_by"]:
+        field = query["group_by"]
+        codes = indexes.codes[field][rows]
+        counts = np.bincount(codes)
+        totals = np.bincount(codes, weights=premiums)
+        present = np.flatnonzero(counts)
+
+        heading = {"sum": "Total premium", "avg": "Average premium", "count": "Policies"}.get(metric, "Policies")
+        lines = [f"{heading} by {field.replace('_', ' ')} ({label}):"]
+        for code in present[np.argsort(-totals[present], kind="stable")]:
+            key = indexes.values[field][code]
+            if metric == "sum":
+                value = _premium(totals[code])
+            elif metric == "avg":
+                value = _premium(totals[code] / counts[code])
+            else:
+                lines.append(f"- {key}: **{counts[code]}**")
+                continue
+            lines.append(f"- {key}: **{value}** ({counts[code]} policies)")
+        return "\n".join(lines)
+
+    if metric == "sum":
+        return f"Total premium ({label}): **{_premium(premiums.sum())}** across {len(rows)} policies."
+    if metric == "avg":
+        return f"Average premium ({label}): **{_premium(premiums.mean())}** across {len(rows)} policies."
+    if metric == "count":
+        return f"**{len(rows)}** policies ({label})."
+
+    lines = [f"Found **{len(rows)}** policies ({label}):"]
+    for i in rows[:MAX_LISTED]:
+        p = indexes.row(int(i))
+        lines.append(
+            f"- {p['policy_id']} · {p['policy_type']} · {p['customer_name']} · "
+            f"{p['insurer']} · {_premium(p['premium'])} · {p['status']} · expires {p['expiry_date']}"
+        )
+    if len(rows) > MAX_LISTED:
+        lines.append(f"... and {len(rows) - MAX_LISTED} more.")
+    return "\n".join(lines)
+
+
+def answer_query(text: str, indexes: PolicyIndexes, today: Optional[date] = None) -> Optional[str]:
+    """Deterministic answer, or None if the question isn't structured."""
+    query = parse_query(text, indexes, today)
+    if query is None:
+        return None
+    return format_answer(query, execute(query, indexes), indexes)
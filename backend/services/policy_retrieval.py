@@ -0,0 +1,326 @@
+"""
+Chunked BM25 retrieval over the policy document (policy.pdf).
+
+The document is split once, offline, into section-sized chunks. Each
+chunk is prefixed with its policy's title line (policy number, holder,
+insurer) so a question about "Pooja's exclusions" still finds the
+exclusions section. A BM25 index over the chunks is persisted next to
+the other data files and keyed by the PDF's size, mtime and SHA-256,
+exactly like the policy index. Questions then send only the top-k
+chunks to the LLM instead of the whole document.
+
+Prebuild at deploy time (from backend/):
+    python -m services.policy_retrieval build
+    python -m services.policy_retrieval search "what is excluded for Pooja Sharma"
+"""
+import argparse
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from typing import Dict, List, Optional, Tuple
+
+from services.policy_index import file_sha256
+
+# =========================
+# CONFIG
+# =========================
+POLICY_DOC_PATH = "policy.pdf"
+CHUNKS_PATH = os.getenv("POLICY_CHUNKS_PATH", os.path.join("data", "policy.chunks.json"))
+TOP_K = int(os.getenv("POLICY_RETRIEVAL_TOP_K", "4"))
+CHUNK_WORDS = int(os.getenv("POLICY_CHUNK_WORDS", "160"))
+CHUNK_OVERLAP = 30
+
+# Bump when chunking or the stored layout changes.
+CHUNKS_VERSION = "1"
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+# Rough chars-per-token for prompt size estimates (no tokenizer needed)
+CHARS_PER_TOKEN = 4
+
+TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it my of on or "
+    "the this to under what when which who will with you your".split()
+)
+
+# Start of a policy in the document, e.g. "POLICY 04: HEALTH INSURANCE"
+DOC_HEADER = re.compile(r"^POLICY \d+:")
+# Section headings inside a policy: "6. Benefits Covered", "SECTION B: ..."
+SECTION_HEADER = re.compile(r"^(?:\d+\.\s+[A-Z]|SECTION [A-Z]:|DISCLAIMER\b)")
+# Schedule lines worth repeating in every chunk of a policy
+TITLE_FIELDS = re.compile(r"(Policy Number|Policy Holder Name|Insurer Name):\s*(.+)")
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN.findall(text.casefold()) if t not in STOPWORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+# =========================
+# CHUNKING
+# =========================
+def _clean_lines(text: str) -> List[str]:
+    lines = []
+    for line in text.replace("​", "").splitlines():
+        line = " ".join(line.split())
+        if line:
+            lines.append(line)
+    return lines
+
+
+def _split_documents(lines: List[str]) -> List[List[str]]:
+    """Front matter, then one document per "POLICY NN:" header."""
+    docs: List[List[str]] = [[]]
+    for line in lines:
+        if DOC_HEADER.match(line) and docs[-1]:
+            docs.append([])
+        docs[-1].append(line)
+    return [d for d in docs if d]
+
+
+def _title(doc: List[str]) -> str:
+    fields = {}
+    for line in doc:
+        match = TITLE_FIELDS.search(line)
+        if match and match.group(1) not in fields:
+            fields[match.group(1)] = match.group(2).strip()
+    parts = [doc[0]] + [f"{k}: {v}" for k, v in fields.items()]
+    return " | ".join(parts)
+
+
+def _sections(doc: List[str]) -> List[List[str]]:
+    sections: List[List[str]] = [[]]
+    for line in doc[1:]:
+        if SECTION_HEADER.match(line) and sections[-1]:
+            sections.append([])
+        sections[-1].append(line)
+    return [s for s in sections if s]
+
+
+def _word_windows(words: List[str], size: int, overlap: int) -> List[List[str]]:
+    if len(words) <= size:
+        return [words]
+    step = max(size - overlap, 1)
+    return [words[i:i + size] for i in range(0, len(words) - overlap, step)]
+
+
+def chunk_text(text: str, chunk_words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> List[Dict]:
+    """
+    Section-aware chunks: consecutive sections of a policy are packed
+    up to chunk_words; oversized sections are split into overlapping
+    word windows.
+    """
+    chunks = []
+    for doc in _split_documents(_clean_lines(text)):
+        title = _title(doc)
+        pending: List[str] = []
+
+        def flush():
+            if pending:
+                chunks.append({"title": title, "text": "\n".join(pending)})
+                pending.clear()
+
+        for section in _sections(doc) or [doc]:
+            words = sum(len(line.split()) for line in section)
+            if words > chunk_words:
+                flush()
+                for window in _word_windows(" ".join(section).split(), chunk_words, overlap):
+                    chunks.append({"title": title, "text": " ".join(window)})
+                continue
+            if sum(len(line.split()) for line in pending) + words > chunk_words:
+                flush()
+            pending.extend(section)
+        flush()
+
+    return chunks
+
+
+# =========================
+# INDEX
+# =========================
+class ChunkIndex:
+    """BM25 over policy chunks (title + text)."""
+
+    def __init__(self, chunks: List[Dict], meta: Optional[Dict] = None):
+        self.chunks = chunks
+        self.meta = meta or {}
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.lengths: List[int] = []
+
+        for i, chunk in enumerate(chunks):
+            terms = tokenize(f"{chunk['title']} {chunk['text']}")
+            self.lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                self.postings[term].append((i, tf))
+
+        n = len(chunks)
+        self.avgdl = (sum(self.lengths) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(posts) + 0.5) / (len(posts) + 0.5))
+            for term, posts in self.postings.items()
+        }
+        self.document_tokens = sum(estimate_tokens(self.render(i)) for i in range(n))
+
+    def render(self, i: int) -> str:
+        chunk = self.chunks[i]
+        return f"[{chunk['title']}]\n{chunk['text']}"
+
+    def search(self, query: str, k: int = TOP_K) -> List[Tuple[int, float]]:
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self.postings[term]:
+                norm = K1 * (1 - B + B * self.lengths[i] / self.avgdl)
+                scores[i] += idf * tf * (K1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:k]
+
+    def context_for(self, query: str, k: int = TOP_K) -> str:
+        """Top-k chunks in document order, ready to paste into a prompt."""
+        started = time.perf_counter()
+        hits = self.search(query, k)
+        # Nothing matched: the table of contents is the most useful fallback
+        ids = sorted(i for i, _ in hits) or list(range(min(1, len(self.chunks))))
+        context = "\n\n".join(self.render(i) for i in ids)
+        retrieval_stats.record(
+            (time.perf_counter() - started) * 1000,
+            estimate_tokens(context),
+            self.document_tokens,
+        )
+        return context
+
+
+# =========================
+# STATS
+# =========================
+class RetrievalStats:
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._latency_ms = deque(maxlen=window)
+        self.queries = 0
+        self.context_tokens = 0
+        self.tokens_saved = 0
+
+    def record(self, latency_ms: float, context_tokens: int, document_tokens: int) -> None:
+        with self._lock:
+            self.queries += 1
+            self._latency_ms.append(latency_ms)
+            self.context_tokens += context_tokens
+            self.tokens_saved += max(document_tokens - context_tokens, 0)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            latencies = sorted(self._latency_ms)
+            queries = self.queries
+            return {
+                "queries": queries,
+                "top_k": TOP_K,
+                "retrieval_ms_p50": round(latencies[len(latencies) // 2], 3) if latencies else None,
+                "retrieval_ms_max": round(latencies[-1], 3) if latencies else None,
+                "context_tokens_avg": round(self.context_tokens / queries) if queries else None,
+                "tokens_saved_total": self.tokens_saved,
+                "tokens_saved_avg": round(self.tokens_saved / queries) if queries else None,
+            }
+
+
+retrieval_stats = RetrievalStats()
+
+
+# =========================
+# BUILD / LOAD
+# =========================
+def _source_meta(pdf_path: str) -> Dict[str, str]:
+    stat = os.stat(pdf_path)
+    return {
+        "version": CHUNKS_VERSION,
+        "chunk_words": str(CHUNK_WORDS),
+        "pdf_size": str(stat.st_size),
+        "pdf_mtime_ns": str(stat.st_mtime_ns),
+    }
+
+
+def is_fresh(chunks_path: str, pdf_path: str) -> bool:
+    if not os.path.exists(chunks_path):
+        return False
+    if not os.path.exists(pdf_path):
+        return True
+
+    with open(chunks_path, encoding="utf-8") as f:
+        meta = json.load(f).get("meta", {})
+
+    current = _source_meta(pdf_path)
+    if any(meta.get(key) != current[key] for key in ("version", "chunk_words", "pdf_size")):
+        return False
+    return meta.get("pdf_mtime_ns") == current["pdf_mtime_ns"] or meta.get("pdf_sha256") == file_sha256(pdf_path)
+
+
+def build_chunks(pdf_path: str = POLICY_DOC_PATH, chunks_path: str = CHUNKS_PATH) -> ChunkIndex:
+    from services.pdf_parser import read_policy_pdf
+
+    meta = _source_meta(pdf_path)
+    meta["pdf_sha256"] = file_sha256(pdf_path)
+    meta["built_at"] = str(int(time.time()))
+    chunks = chunk_text(read_policy_pdf(pdf_path))
+
+    tmp_path = f"{chunks_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "chunks": chunks}, f, ensure_ascii=False)
+    os.replace(tmp_path, chunks_path)
+
+    print(f"[POLICY_RETRIEVAL] Built {chunks_path} ({len(chunks)} chunks)")
+    return ChunkIndex(chunks, meta)
+
+
+def load_chunk_index(pdf_path: str = POLICY_DOC_PATH, chunks_path: str = CHUNKS_PATH) -> ChunkIndex:
+    """Chunk index from disk, rebuilt first when the PDF changed."""
+    if is_fresh(chunks_path, pdf_path):
+        with open(chunks_path, encoding="utf-8") as f:
+            data = json.load(f)
+        return ChunkIndex(data["chunks"], data["meta"])
+
+    if not os.path.exists(pdf_path):
+        print(f"[POLICY_RETRIEVAL] {pdf_path} not found")
+        return ChunkIndex([])
+
+    return build_chunks(pdf_path, chunks_path)
+
+
+# =========================
+# CLI
+# =========================
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or query the policy document chunk index.")
+    parser.add_argument("command", choices=["build", "search"])
+    parser.add_argument("query", nargs="?", default="")
+    parser.add_argument("--pdf", default=POLICY_DOC_PATH)
+    parser.add_argument("--chunks", default=CHUNKS_PATH)
+    parser.add_argument("-k", type=int, default=TOP_K)
+    parser.add_argument("--force", action="store_true", help="rebuild even if the index is fresh")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if not args.force and is_fresh(args.chunks, args.pdf):
+            print(f"[POLICY_RETRIEVAL] {args.chunks} is up to date")
+            return
+        build_chunks(args.pdf, args.chunks)
+        return
+
+    index = load_chunk_index(args.pdf, args.chunks)
+    for i, score in index.search(args.query, args.k):
+        chunk = index.chunks[i]
+        print(f"{score:7.3f}  #{i}  {chunk['title']}\n         {chunk['text'][:120]!r}")
+
+
+if __name__ == "__main__":
+    main()
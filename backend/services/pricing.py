@@ -0,0 +1,39 @@
+"""
+Renewal pricing: base premium by policy type, scaled by age, city,
+claims history and inflation.
+
+The single-quote agent and the bulk engine (services/bulk_quotes) both
+price from these tables, so a quote is the same whichever path made it.
+"""
+import os
+from datetime import date
+from typing import Dict, Optional
+
+BASE_PREMIUM: Dict[str, int] = {"Health": 15000, "Life": 10000, "Car": 8000}
+DEFAULT_BASE = 12000
+
+DEFAULT_AGE = 30
+AGE_PIVOT = 25           # no age loading up to this age
+AGE_RATE = 0.015         # per year above the pivot
+
+CITY_FACTOR: Dict[str, float] = {"Delhi": 1.10, "Mumbai": 1.15, "Bangalore": 1.05}
+CLAIMS_RATE = 0.20       # per past claim
+INFLATION = 1.06
+
+# Effective date of the tables above; change it with them so cached quotes are repriced
+PRICING_VERSION = os.getenv("PRICING_VERSION", "2025-04-01")
+QUOTE_VALIDITY_DAYS = 15
+
+
+def premium(policy_type: str, age: Optional[int] = None, city: Optional[str] = None,
+            claims: Optional[int] = None) -> int:
+    """Yearly premium, in rupees."""
+    base = BASE_PREMIUM.get(policy_type, DEFAULT_BASE)
+    age_f = 1 + max(0, ((DEFAULT_AGE if age is None else age) - AGE_PIVOT) * AGE_RATE)
+    city_f = CITY_FACTOR.get(city, 1.0)
+    claims_f = 1 + (claims or 0) * CLAIMS_RATE
+    return round(base * age_f * city_f * claims_f * INFLATION)
+
+
+def quote_id(customer_id: str, today: Optional[date] = None) -> str:
+    return f"Q{customer_id[-3:]}-{(today or date.today()).strftime('%y%m')}"
@@ -0,0 +1,84 @@
+"""
+Finished quotes, reused for as long as a quote is valid.
+
+Quotes are keyed by (customer_id, policy_type, PRICING_VERSION), so a
+repeat request is answered from memory without running the quote graph
+or reading Supabase, and new pricing tables (a new PRICING_VERSION)
+are never served from old entries. Entries live QUOTE_VALIDITY_DAYS
+and are dropped early when a "customer" or "policy" change is
+published for the customer by any worker on the host, or when the data
+loaders bump the data version (see services/invalidation). Callers
+re-stamp the quote id on a hit, since it carries the issue date.
+"""
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional, Set
+
+from services.invalidation import CUSTOMER, POLICY, data_version, subscribe
+from services.llm_cache import MemoryCache
+from services.pricing import PRICING_VERSION, QUOTE_VALIDITY_DAYS
+
+# =========================
+# CONFIG
+# =========================
+QUOTE_CACHE_SIZE = int(os.getenv("QUOTE_CACHE_SIZE", "10000"))
+
+
+class QuoteCache:
+    """One entry per quote shape ("agent", "tool") and customer/policy type."""
+
+    def __init__(self, validity_days: int = QUOTE_VALIDITY_DAYS, max_size: int = QUOTE_CACHE_SIZE):
+        self.cache = MemoryCache(max_size=max_size, ttl=validity_days * 86400)
+        self.invalidations = 0
+        self.reloads = 0
+        self._keys: Dict[str, Set[str]] = defaultdict(set)   # customer_id -> cache keys
+        self._lock = threading.Lock()
+        self._version = data_version()
+
+    @staticmethod
+    def key(source: str, customer_id: str, policy_type: Optional[str]) -> str:
+        return f"{source}:{customer_id.upper()}:{(policy_type or '*').lower()}:{PRICING_VERSION}"
+
+    def get(self, source: str, customer_id: str, policy_type: Optional[str]) -> Optional[Any]:
+        self._check_data_version()
+        return self.cache.get(self.key(source, customer_id, policy_type))
+
+    def set(self, source: str, customer_id: str, policy_type: Optional[str], quote: Any) -> None:
+        key = self.key(source, customer_id, policy_type)
+        self.cache.set(key, quote)
+        with self._lock:
+            self._keys[customer_id.upper()].add(key)
+
+    # ---------- invalidation ----------
+    def invalidate(self, record: Dict) -> None:
+        customer_id = record.get("customer_id") if isinstance(record, dict) else record
+        if not customer_id:
+            return
+        with self._lock:
+            keys = self._keys.pop(str(customer_id).upper(), ())
+        for key in keys:
+            if self.cache.delete(key):
+                self.invalidations += 1
+
+    def _check_data_version(self) -> None:
+        version = data_version()
+        if version != self._version:
+            with self._lock:
+                self._version = version
+                self._keys.clear()
+            self.cache.clear()
+            self.reloads += 1
+
+    def stats(self) -> Dict:
+        return {
+            **self.cache.stats(),
+            "invalidations": self.invalidations,
+            "reloads": self.reloads,
+            "pricing_version": PRICING_VERSION,
+        }
+
+
+quote_cache = QuoteCache()
+subscribe(CUSTOMER, quote_cache.invalidate)
+subscribe(POLICY, quote_cache.invalidate)
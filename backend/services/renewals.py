@@ -0,0 +1,395 @@
+"""
+Renewal scheduler.
+
+Policies are loaded once into an index bucketed by expiry date. When
+the day rolls over only two buckets change state: policies expiring
+yesterday become Expired and those expiring EXPIRING_WINDOW_DAYS from
+now become Expiring. The stored status column is updated for just
+those rows, so `.eq("status", "Expiring")` stays correct. Reminders
+are queued in the outbox for the buckets RENEWAL_REMINDER_OFFSETS days
+ahead (campaign "renewal-<n>d"), for every day since the last run, so
+days missed while no worker was up still get their reminders; the
+outbox's idempotency keys make a repeated or concurrent run a no-op.
+
+The table is read again only every RENEWAL_RESYNC_SECONDS, or just
+the changed rows when it has an updated_at column, with a full reload
+every RENEWAL_FULL_RESYNC_EVERY syncs to drop deleted policies.
+
+Every uvicorn worker starts the scheduler, but only the one holding a
+lease in a SQLite file (RENEWAL_LEASE_PATH) runs it; if that worker
+dies another takes over within RENEWAL_LEASE_SECONDS.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from services.clients import get_async_supabase, use_fake
+from services.invalidation import POLICY, publish, subscribe
+from services.listing import EXPIRING_WINDOW_DAYS, policy_status, to_date
+from services.whatsapp import queue_reminders, reminder_item
+
+# =========================
+# CONFIG
+# =========================
+RENEWAL_SCHEDULER = os.getenv("RENEWAL_SCHEDULER", "on").lower() not in ("0", "off", "false", "no")
+RENEWAL_REMINDER_OFFSETS = sorted(
+    {int(d) for d in os.getenv("RENEWAL_REMINDER_OFFSETS", "30,7,1").split(",") if d.strip()},
+    reverse=True,
+)
+RENEWAL_RESYNC_SECONDS = float(os.getenv("RENEWAL_RESYNC_SECONDS", "21600"))   # 6 h
+# Incremental syncs can't see deleted rows; reload fully every N
+RENEWAL_FULL_RESYNC_EVERY = 10
+RENEWAL_LEASE_PATH = os.getenv(
+    "RENEWAL_LEASE_PATH",
+    os.path.join("data", "renewals.fake.sqlite" if use_fake("supabase") else "renewals.sqlite"),
+)
+RENEWAL_LEASE_SECONDS = float(os.getenv("RENEWAL_LEASE_SECONDS", "300"))
+RENEWAL_PAGE_SIZE = 1000
+STATUS_UPDATE_CHUNK = 100
+
+POLICY_COLUMNS = "policy_id, customer_id, policy_type, policy_expiry, status, customers(name, phone)"
+
+
+def seconds_until_tomorrow(now: Optional[datetime] = None) -> float:
+    now = now or datetime.now()
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    # A second past midnight so date.today() has already moved on
+    return (tomorrow - now).total_seconds() + 1
+
+
+# =========================
+# LEADER LEASE
+# =========================
+class SchedulerLease:
+    """
+    Of the processes sharing `path`, only the lease holder runs the
+    scheduler. A lease not renewed within `ttl` seconds is taken over.
+    The row also keeps the last day the scheduler ran.
+    """
+
+    def __init__(self, path: str = RENEWAL_LEASE_PATH, ttl: float = RENEWAL_LEASE_SECONDS,
+                 name: str = "renewals"):
+        self.path = path
+        self.ttl = ttl
+        self.name = name
+        self.owner = uuid.uuid4().hex
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened on first use so importing the module touches no files
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases "
+                "(name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL, last_run TEXT)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def acquire(self) -> bool:
+        """Take or renew the lease; True while this process holds it."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT owner, expires FROM leases WHERE name = ?", (self.name,)).fetchone()
+                now = time.time()
+                held = row is None or row[0] == self.owner or row[1] < now
+                if held:
+                    conn.execute(
+                        "INSERT INTO leases (name, owner, expires) VALUES (?, ?, ?) "
+                        "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires = excluded.expires",
+                        (self.name, self.owner, now + self.ttl),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return held
+
+    def release(self) -> None:
+        with self._lock:
+            self._connect().execute(
+                "UPDATE leases SET expires = 0 WHERE name = ? AND owner = ?", (self.name, self.owner)
+            )
+
+    def last_run(self) -> Optional[date]:
+        with self._lock:
+            row = self._connect().execute("SELECT last_run FROM leases WHERE name = ?", (self.name,)).fetchone()
+        return date.fromisoformat(row[0]) if row and row[0] else None
+
+    def record_run(self, day: date) -> None:
+        with self._lock:
+            self._connect().execute(
+                "UPDATE leases SET last_run = ? WHERE name = ? AND owner = ?",
+                (day.isoformat(), self.name, self.owner),
+            )
+
+
+# =========================
+# SCHEDULER
+# =========================
+class RenewalScheduler:
+    def __init__(self, offsets: List[int] = RENEWAL_REMINDER_OFFSETS,
+                 resync_seconds: float = RENEWAL_RESYNC_SECONDS,
+                 lease: Optional[SchedulerLease] = None):
+        self.offsets = offsets
+        self.resync_seconds = resync_seconds
+        self.lease = lease or SchedulerLease()
+        self.leader = False
+        self.policies: Dict[str, Dict] = {}
+        self.buckets: Dict[date, Set[str]] = defaultdict(set)
+        self.today: Optional[date] = None
+        self.loaded_at: Optional[float] = None
+        self.updated_since: Optional[str] = None
+        self.incremental = False
+        self.syncs = 0
+        self.transitions = 0
+        self.reminders_queued = 0
+        self.last_error: Optional[str] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    # ---------- index ----------
+    def _remove(self, policy_id: str) -> None:
+        record = self.policies.pop(policy_id, None)
+        if record is None:
+            return
+        expiry = to_date(record.get("policy_expiry"))
+        if expiry is not None:
+            self.buckets[expiry].discard(policy_id)
+            if not self.buckets[expiry]:
+                del self.buckets[expiry]
+
+    def upsert(self, record: Dict) -> None:
+        policy_id = record.get("policy_id")
+        if not policy_id:
+            return
+        self._remove(policy_id)
+        self.policies[policy_id] = record
+        expiry = to_date(record.get("policy_expiry"))
+        if expiry is not None:
+            self.buckets[expiry].add(policy_id)
+
+    def bucket(self, day: date) -> List[Dict]:
+        return [self.policies[p] for p in sorted(self.buckets.get(day, ()))]
+
+    def due_by(self, threshold: date, customer_id: Optional[str] = None) -> List[Dict]:
+        """Policies expiring on or before `threshold`, optionally for one customer."""
+        rows = [
+            record
+            for day in sorted(d for d in self.buckets if d <= threshold)
+            for record in self.bucket(day)
+        ]
+        if customer_id:
+            rows = [r for r in rows if r.get("customer_id") == customer_id]
+        return rows
+
+    def expiring(self, today: Optional[date] = None) -> List[Dict]:
+        """Policies whose status is Expiring today (what `.eq("status", "Expiring")` selects)."""
+        today = today or date.today()
+        return [
+            r for r in self.due_by(today + timedelta(days=EXPIRING_WINDOW_DAYS))
+            if policy_status(r.get("policy_expiry"), today) == "Expiring"
+        ]
+
+    # ---------- loading ----------
+    async def _fetch(self, since: Optional[str] = None) -> List[Dict]:
+        supabase = await get_async_supabase()
+        columns = POLICY_COLUMNS + (", updated_at" if self.incremental else "")
+        rows: List[Dict] = []
+        start = 0
+        while True:
+            query = supabase.table("policies").select(columns)
+            if since is not None:
+                query = query.gte("updated_at", since)
+            page = (
+                await query.order("policy_id")
+                .range(start, start + RENEWAL_PAGE_SIZE - 1)
+                .execute()
+            ).data or []
+            rows.extend(page)
+            if len(page) < RENEWAL_PAGE_SIZE:
+                return rows
+            start += RENEWAL_PAGE_SIZE
+
+    async def _detect_updated_at(self) -> bool:
+        supabase = await get_async_supabase()
+        try:
+            await supabase.table("policies").select("updated_at").limit(1).execute()
+            return True
+        except Exception:
+            return False
+
+    async def sync(self, full: bool = False) -> List[Dict]:
+        """Load the index (full) or apply rows changed since the last sync; returns the rows read."""
+        if self.loaded_at is None:
+            self.incremental = await self._detect_updated_at()
+
+        if full or not self.incremental or self.updated_since is None:
+            rows = await self._fetch()
+            seen = {r.get("policy_id") for r in rows}
+            for policy_id in set(self.policies) - seen:
+                self._remove(policy_id)
+            changed: List[Dict] = []
+        else:
+            rows = changed = await self._fetch(self.updated_since)
+
+        for row in rows:
+            self.upsert(row)
+        # Let the quote, list-page and customer caches drop what changed elsewhere
+        for row in changed:
+            publish(POLICY, row)
+        stamps = [r["updated_at"] for r in rows if r.get("updated_at")]
+        if stamps:
+            self.updated_since = max([self.updated_since or ""] + stamps)
+        self.loaded_at = time.monotonic()
+        self.syncs += 1
+        return rows
+
+    def apply_update(self, record: Dict) -> None:
+        """Reflect a policy write made through this process immediately."""
+        if self.loaded and record.get("policy_id"):
+            current = self.policies.get(record["policy_id"], {})
+            self.upsert({**current, **record})
+
+    # ---------- daily run ----------
+    async def _set_status(self, changes: Dict[str, List[str]]) -> None:
+        supabase = await get_async_supabase()
+        for status, ids in changes.items():
+            for i in range(0, len(ids), STATUS_UPDATE_CHUNK):
+                chunk = ids[i:i + STATUS_UPDATE_CHUNK]
+                await supabase.table("policies").update({"status": status}).in_("policy_id", chunk).execute()
+                for policy_id in chunk:
+                    self.policies[policy_id]["status"] = status
+                self.transitions += len(chunk)
+
+    def _status_changes(self, records: List[Dict], today: date) -> Dict[str, List[str]]:
+        changes: Dict[str, List[str]] = defaultdict(list)
+        for record in records:
+            status = policy_status(record.get("policy_expiry"), today, record.get("status") or "Active")
+            if status != record.get("status"):
+                changes[status].append(record["policy_id"])
+        return changes
+
+    async def _roll_statuses(self, today: date, synced: List[Dict]) -> None:
+        if self.today is None:
+            # First run: fix whatever went stale since the last load
+            records = list(self.policies.values())
+        else:
+            # Rows just (re)read, plus two buckets for each day that passed
+            records = [self.policies[r["policy_id"]] for r in synced if r.get("policy_id") in self.policies]
+            day = self.today
+            while day < today:
+                day += timedelta(days=1)
+                records += self.bucket(day - timedelta(days=1))                  # -> Expired
+                records += self.bucket(day + timedelta(days=EXPIRING_WINDOW_DAYS))  # -> Expiring
+        await self._set_status(self._status_changes(records, today))
+
+    async def _queue_reminders(self, today: date, since: Optional[date] = None) -> None:
+        """
+        Queue the reminders due on each day in (since, today], or just
+        today on a first run. A policy that missed several offsets gets
+        only the nearest one.
+        """
+        first = since + timedelta(days=1) if since else today
+        reminded: Set[str] = set()
+        for offset in sorted(self.offsets):
+            rows = []
+            day = first
+            while day <= today:
+                rows += [
+                    r for r in self.bucket(day + timedelta(days=offset))
+                    if r["policy_id"] not in reminded and (r.get("customers") or {}).get("phone")
+                ]
+                day += timedelta(days=1)
+            reminded.update(r["policy_id"] for r in rows)
+            if rows:
+                queued = await queue_reminders(
+                    [reminder_item(r, today) for r in rows], campaign=f"renewal-{offset}d"
+                )
+                self.reminders_queued += queued["queued"]
+
+    async def tick(self, today: Optional[date] = None) -> None:
+        """Resync if due, roll statuses forward to `today` and queue its reminders."""
+        today = today or date.today()
+        async with self._lock:
+            try:
+                synced: List[Dict] = []
+                if self.loaded_at is None or time.monotonic() - self.loaded_at > self.resync_seconds:
+                    synced = await self.sync(full=self.syncs % RENEWAL_FULL_RESYNC_EVERY == 0)
+                since = self.today or await asyncio.to_thread(self.lease.last_run)
+                await self._roll_statuses(today, synced)
+                await self._queue_reminders(today, since)
+                self.today = today
+                await asyncio.to_thread(self.lease.record_run, today)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"[RENEWALS] run failed: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self.leader = await asyncio.to_thread(self.lease.acquire)
+            except Exception as e:
+                self.leader = False
+                self.last_error = str(e)
+                print(f"[RENEWALS] lease check failed: {e}")
+            if self.leader:
+                await self.tick()
+            # Woken often enough to renew the lease (a tick with nothing due is cheap)
+            await asyncio.sleep(min(seconds_until_tomorrow(), self.resync_seconds, self.lease.ttl / 3))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.leader:
+            self.leader = False
+            try:
+                # Let another worker take over without waiting out the lease
+                await asyncio.to_thread(self.lease.release)
+            except Exception as e:
+                print(f"[RENEWALS] lease release failed: {e}")
+
+    def stats(self) -> Dict:
+        counts: Dict[str, int] = defaultdict(int)
+        for record in self.policies.values():
+            counts[record.get("status") or "unknown"] += 1
+        return {
+            "enabled": self._task is not None,
+            "leader": self.leader,
+            "policies": len(self.policies),
+            "buckets": len(self.buckets),
+            "today": str(self.today) if self.today else None,
+            "offsets": self.offsets,
+            "status": dict(counts),
+            "transitions": self.transitions,
+            "reminders_queued": self.reminders_queued,
+            "incremental": self.incremental,
+            "syncs": self.syncs,
+            "last_error": self.last_error,
+        }
+
+
+renewal_scheduler = RenewalScheduler()
+subscribe(POLICY, renewal_scheduler.apply_update)
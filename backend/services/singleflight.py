@@ -0,0 +1,51 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+# =========================
+# SINGLE-FLIGHT
+# =========================
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls: the first caller for a key
+    starts the work, everyone else arriving while it is in flight
+    awaits the same result instead of repeating the upstream call.
+
+    Results are shared between callers, so treat them as read-only.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+
+        if task is None:
+            self.calls += 1
+            # Run as its own task so one caller disconnecting
+            # does not cancel the work for the others.
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every caller went away.
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
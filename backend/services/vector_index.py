@@ -0,0 +1,292 @@
+"""
+Local, memory-mapped vector index for policy search.
+
+Two layouts, both persisted as .npy files and opened with
+np.load(mmap_mode="r") so every worker shares the same pages:
+
+    flat  exact brute-force cosine search over all vectors
+    ivf   inverted file: vectors are clustered with k-means and stored
+          contiguously per cluster; a query scans only the nprobe
+          closest clusters
+
+Either layout can store int8 codes with a per-vector scale instead of
+float32 (--quantize), a quarter of the size at a small recall cost.
+
+Vectors are L2-normalised at build time, so the inner product is the
+cosine similarity, the same metric as the Pinecone index.
+
+Each build is written to its own directory (policy.vectors.v<ns>) and
+made current by atomically replacing one pointer file
+(policy.vectors.current), so a worker opening the index never sees a
+half-swapped build; the previous build is kept for workers still
+mapping it.
+
+Build from the policy document chunks (from backend/):
+    python -m services.vector_index build
+    python -m services.vector_index build --kind ivf --quantize
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# =========================
+# CONFIG
+# =========================
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", os.path.join("data", "policy.vectors"))
+VECTOR_NPROBE = int(os.getenv("VECTOR_NPROBE", "8"))
+
+INDEX_VERSION = 1
+KMEANS_ITERATIONS = 20
+
+
+def _pointer(path: str) -> str:
+    return f"{path}.current"
+
+
+def resolve_index_dir(path: str = VECTOR_INDEX_PATH) -> str:
+    """Directory of the current build of the index at `path`."""
+    pointer = _pointer(path)
+    if os.path.exists(pointer):
+        with open(pointer, encoding="utf-8") as f:
+            return os.path.join(os.path.dirname(path), f.read().strip())
+    if os.path.isdir(path):
+        # Built before versioned directories
+        return path
+    raise FileNotFoundError(f"no vector index at {path}")
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _quantize(vectors: np.ndarray):
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.round(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _kmeans(vectors: np.ndarray, nlist: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means (cosine), returns unit-length centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+
+    for _ in range(KMEANS_ITERATIONS):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = vectors[assign == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+            else:
+                # Re-seed empty clusters from a random vector
+                centroids[c] = vectors[rng.integers(len(vectors))]
+        centroids = normalize_rows(centroids)
+
+    return centroids
+
+
+# =========================
+# BUILD
+# =========================
+def build_vector_index(
+    vectors: np.ndarray,
+    records: Sequence[Dict],
+    path: str = VECTOR_INDEX_PATH,
+    kind: str = "flat",
+    quantize: bool = False,
+    nlist: Optional[int] = None,
+    model: str = "",
+) -> Dict:
+    """
+    Write a new build of the index. records[i] is {"id": ..., "metadata": {...}}
+    for vectors[i]. The build becomes current with a single pointer
+    swap; workers still mapping the previous build keep reading it.
+    """
+    if kind not in ("flat", "ivf"):
+        raise ValueError(f"Unknown index kind {kind!r}")
+    if len(vectors) != len(records):
+        raise ValueError("vectors and records differ in length")
+
+    vectors = normalize_rows(vectors)
+    records = list(records)
+    meta = {
+        "version": INDEX_VERSION,
+        "kind": kind,
+        "count": len(records),
+        "dim": int(vectors.shape[1]) if len(vectors) else 0,
+        "quantized": quantize,
+        "model": model,
+        "built_at": int(time.time()),
+    }
+
+    arrays = {}
+    if kind == "ivf" and len(vectors):
+        nlist = min(nlist or max(1, int(np.sqrt(len(vectors)))), len(vectors))
+        centroids = _kmeans(vectors, nlist)
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        # Cluster members stored contiguously: list c is order[offsets[c]:offsets[c + 1]]
+        order = np.argsort(assign, kind="stable")
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(assign, minlength=nlist))
+        vectors = vectors[order]
+        records = [records[i] for i in order]
+        arrays["centroids"] = centroids
+        arrays["offsets"] = offsets
+        meta["nlist"] = nlist
+
+    if quantize:
+        arrays["vectors"], arrays["scales"] = _quantize(vectors)
+    else:
+        arrays["vectors"] = vectors
+
+    build_dir = f"{path}.v{time.time_ns()}"
+    os.makedirs(build_dir)
+
+    for name, array in arrays.items():
+        np.save(os.path.join(build_dir, f"{name}.npy"), array)
+    with open(os.path.join(build_dir, "records.json"), "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False)
+    with open(os.path.join(build_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    try:
+        previous = resolve_index_dir(path)
+    except FileNotFoundError:
+        previous = None
+    tmp_pointer = f"{_pointer(path)}.{os.getpid()}.tmp"
+    with open(tmp_pointer, "w", encoding="utf-8") as f:
+        f.write(os.path.basename(build_dir))
+    os.replace(tmp_pointer, _pointer(path))
+    _prune_builds(path, keep={build_dir, previous})
+
+    print(f"[VECTOR_INDEX] Built {build_dir} ({kind}, {len(records)} vectors, quantized={quantize})")
+    return meta
+
+
+def _prune_builds(path: str, keep) -> None:
+    """Remove builds older than the previous one."""
+    parent = os.path.dirname(path) or "."
+    base = os.path.basename(path)
+    for name in os.listdir(parent):
+        build = os.path.join(os.path.dirname(path), name)
+        if (name == base or name.startswith(f"{base}.v")) and os.path.isdir(build) and build not in keep:
+            shutil.rmtree(build, ignore_errors=True)
+
+
+# =========================
+# SEARCH
+# =========================
+class LocalVectorIndex:
+    """Read-only, mmap-backed flat or IVF index."""
+
+    def __init__(self, path: str = VECTOR_INDEX_PATH, nprobe: int = VECTOR_NPROBE):
+        self.path = path
+        self.nprobe = nprobe
+        path = resolve_index_dir(path)
+
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"{path} was written by an incompatible build")
+
+        with open(os.path.join(path, "records.json"), encoding="utf-8") as f:
+            self.records: List[Dict] = json.load(f)
+
+        def load(name: str) -> Optional[np.ndarray]:
+            file = os.path.join(path, f"{name}.npy")
+            return np.load(file, mmap_mode="r") if os.path.exists(file) else None
+
+        self.vectors = load("vectors")
+        self.scales = load("scales")
+        self.centroids = load("centroids")
+        self.offsets = load("offsets")
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _scores(self, start: int, stop: int, query: np.ndarray) -> np.ndarray:
+        block = self.vectors[start:stop]
+        if self.scales is None:
+            return block @ query
+        return (block.astype(np.float32) @ query) * self.scales[start:stop]
+
+    def _candidates(self, query: np.ndarray):
+        """(row ids, scores) of the rows scanned for this query."""
+        if self.centroids is None:
+            return np.arange(len(self.records)), self._scores(0, len(self.records), query)
+
+        nprobe = min(self.nprobe, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        ids, scores = [], []
+        for c in lists:
+            start, stop = int(self.offsets[c]), int(self.offsets[c + 1])
+            if stop > start:
+                ids.append(np.arange(start, stop))
+                scores.append(self._scores(start, stop, query))
+        if not ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return np.concatenate(ids), np.concatenate(scores)
+
+    def query(self, vector, top_k: int = 1, include_metadata: bool = True) -> Dict:
+        """Same shape as a Pinecone query response: {"matches": [{id, score, metadata}]}."""
+        if not self.records or top_k <= 0:
+            return {"matches": [], "namespace": ""}
+
+        query = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        ids, scores = self._candidates(query)
+        k = min(top_k, len(ids))
+        if k == 0:
+            return {"matches": [], "namespace": ""}
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        matches = []
+        for i in top:
+            record = self.records[int(ids[i])]
+            match = {"id": record["id"], "score": float(scores[i])}
+            if include_metadata:
+                match["metadata"] = record.get("metadata", {})
+            matches.append(match)
+        return {"matches": matches, "namespace": ""}
+
+
+# =========================
+# CLI
+# =========================
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the local policy vector index from policy.pdf chunks.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--path", default=VECTOR_INDEX_PATH)
+    parser.add_argument("--kind", choices=["flat", "ivf"], default="flat")
+    parser.add_argument("--quantize", action="store_true", help="store int8 codes instead of float32")
+    parser.add_argument("--nlist", type=int, help="IVF clusters (default sqrt(n))")
+    args = parser.parse_args()
+
+    from services.pinecone_client import EMBEDDING_MODEL, get_model
+    from services.policy_retrieval import load_chunk_index
+
+    chunks = load_chunk_index().chunks
+    texts = [f"{c['title']}\n{c['text']}" for c in chunks]
+    vectors = get_model().encode(texts, batch_size=64, convert_to_numpy=True)
+    records = [
+        {"id": f"chunk-{i}", "metadata": {"title": c["title"], "text": c["text"]}}
+        for i, c in enumerate(chunks)
+    ]
+    build_vector_index(vectors, records, args.path, args.kind, args.quantize, args.nlist, EMBEDDING_MODEL)
+
+
+if __name__ == "__main__":
+    main()
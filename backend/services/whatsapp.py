@@ -1,69 +1,61 @@
 from pydantic import BaseModel
-from twilio.rest import Client
 import os
 
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from datetime import date, timedelta
-from supabase import create_client
+from services.clients import get_async_supabase, get_twilio
+from services.dispatcher import dispatcher
+from services.outbox import idempotency_key, outbox
 
 # --- Configuration (Pulled from Environment) ---
-ACC_SID = os.getenv('ACC_SID')
-AUTH_TOKEN = os.getenv('AUTH_TOKEN')
 TWILIO_WHATSAPP_NUMBER = os.getenv('TWILIO_WHATSAPP_NUMBER')
 
 
-client = Client(ACC_SID, AUTH_TOKEN)
-supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
 class Message(BaseModel):
     phone: str 
     message: str
 
  
-def send_whatsapp_message(msg: Message):
+async def deliver_whatsapp(phone: str, text: str) -> str:
+    """Send one message and return its SID; raises on any Twilio error."""
     from_num = 'whatsapp:+14155238886'  # YOUR sandbox number
-    to_num = f'whatsapp:+{msg.phone}'
-    
-    body_text = f"Insurance Copilot\n{msg.message}"
-    
+    to_num = f'whatsapp:+{str(phone).lstrip("+")}'
+
+    message = await get_twilio().messages.create_async(
+        body=f"Insurance Copilot\n{text}",
+        from_=from_num,
+        to=to_num
+    )
+    return message.sid
+
+
+async def send_whatsapp_message(msg: Message):
+    """One immediate send, under the same shared rate limit and retries as the outbox."""
     try:
-        message = client.messages.create(
-            body=body_text,
-            from_=from_num,
-            to=to_num
-        )
-        print(f"✅ SUCCESS SID: {message.sid}")
-        return {"status": "sent", "sid": message.sid}
+        sid = await dispatcher.send(lambda: deliver_whatsapp(msg.phone, msg.message))
+        print(f"✅ SUCCESS SID: {sid}")
+        return {"status": "sent", "sid": sid}
     except Exception as e:
         print(f"❌ FULL ERROR: {e}")
         return {"error": str(e)}
 
-def send_renewal_reminder(customer_id: Optional[str] = None) -> Dict:
-    """Send reminders to expiring policies (batch or single)."""
-    today = date.today()
-    expiry_threshold = today + timedelta(days=30)  # 30 days
-    
-    # Get expiring policies
-    query = supabase.table("policies").select("""
-        *,
-        customers(name, phone)
-    """).lte("policy_expiry", str(expiry_threshold))
-    
-    if customer_id:
-        query = query.eq("customer_id", customer_id)
-    
-    data = query.execute().data
-    
-    if not data:
-        return {"status": "no_targets", "message": "No expiring policies found"}
-    
-    results = []
-    for row in data:
-        phone = row["customers"]["phone"]
-        name = row["customers"]["name"]
-        policy_id = row["policy_id"]
-        expiry = row["policy_expiry"]
-        
-        msg_body = f"""
+
+RENEWAL_CAMPAIGN = "renewal"
+
+
+async def queue_reminders(items: List[Dict], campaign: str = RENEWAL_CAMPAIGN) -> Dict:
+    """
+    Put reminder items ({"ref": policy_id, "expiry", "phone", "message"})
+    in the durable outbox. A policy already reminded for the same expiry
+    in this campaign is skipped, so repeated runs don't send twice.
+    """
+    for item in items:
+        item["key"] = idempotency_key(item["ref"], item["expiry"], campaign)
+    return await outbox.submit(items, campaign)
+
+
+def renewal_message(name: str, policy_id: str, expiry, today: date) -> str:
+    msg_body = f"""
 Hi {name}! 
 
 Your policy {policy_id} expires on {expiry}.
@@ -72,21 +64,69 @@ Renew now to avoid lapse → bit.ly/renewal-link
 Insurance Copilot
 Sent: {today.strftime('%d %b %Y')}
         """
-        
-        msg = Message(phone=phone, message=msg_body.strip())
-        result = send_whatsapp_message(msg)
-        results.append(result)
+    return msg_body.strip()
+
+
+def reminder_item(row: Dict, today: date) -> Dict:
+    """Outbox item for a policy row joined with customers(name, phone)."""
+    return {
+        "ref": row["policy_id"],
+        "expiry": row["policy_expiry"],
+        "phone": row["customers"]["phone"],
+        "message": renewal_message(row["customers"]["name"], row["policy_id"], row["policy_expiry"], today),
+    }
+
+
+async def send_renewal_reminder(customer_id: Optional[str] = None) -> Dict:
+    """
+    Send reminders to expiring policies (batch or single).
+
+    Reminders go through the durable outbox. A single customer's are
+    awaited; a full batch is drained in the background and the job id
+    is returned for polling via /jobs/{id}.
+    """
+    from services.renewals import renewal_scheduler
+
+    today = date.today()
+    expiry_threshold = today + timedelta(days=30)  # 30 days
+
+    if renewal_scheduler.loaded:
+        # Answered from the scheduler's expiry index, no table scan
+        data = renewal_scheduler.due_by(expiry_threshold, customer_id)
+    else:
+        # Get expiring policies
+        supabase = await get_async_supabase()
+        query = supabase.table("policies").select("""
+            *,
+            customers(name, phone)
+        """).lte("policy_expiry", str(expiry_threshold))
+
+        if customer_id:
+            query = query.eq("customer_id", customer_id)
+
+        data = (await query.execute()).data
     
-    success = len([r for r in results if r["status"] == "sent"])
+    if not data:
+        return {"status": "no_targets", "message": "No expiring policies found"}
+    
+    items = [reminder_item(row, today) for row in data]
+
+    queued = await queue_reminders(items)
+    if not customer_id:
+        return {"status": "queued", "targets": len(data), **queued}
+
+    job = await outbox.wait(queued["job_id"]) or {"sent": 0, "total": 0, "errors": []}
     return {
         "status": "completed",
-        "sent": success,
-        "total": len(results),
+        "sent": job["sent"],
+        "total": job["total"],
         "targets": len(data),
-        "results": results[-5:]  # Last 5 for demo
+        "duplicates": queued["duplicates"],
+        "job_id": queued["job_id"],
+        "errors": job["errors"][-5:]
     }
 
-def send_quote_whatsapp(quote_data: dict) -> str:
+async def send_quote_whatsapp(quote_data: dict) -> str:
     """Send quote via WhatsApp."""
     message = f"""✅ Quote Ready {quote_data['customer_name']}! 
 
@@ -98,7 +138,7 @@ def send_quote_whatsapp(quote_data: dict) -> str:
 
 Insurer: {quote_data['current_insurer']}"""
     
-    client.messages.create(
+    await get_twilio().messages.create_async(
         body=message,
         from_="whatsapp:+14155238886",  # Sandbox
         to=f"whatsapp:{quote_data['customer_phone']}"
@@ -0,0 +1,16 @@
+from services.crm_data import CustomerIndex
+
+
+def test_status_index_follows_upserts_and_removals():
+    index = CustomerIndex()
+    index.upsert({"customer_id": "CUST0002", "name": "Aman Gupta", "status": "Active"})
+    index.upsert({"customer_id": "CUST0001", "name": "Pooja Sharma", "status": "Active"})
+    index.upsert({"customer_id": "CUST0003", "name": "Ravi Kumar", "status": "Inactive"})
+
+    assert [c["customer_id"] for c in index.with_status("Active")] == ["CUST0001", "CUST0002"]
+
+    index.upsert({"customer_id": "CUST0002", "name": "Aman Gupta", "status": "Inactive"})
+    index.remove("CUST0001")
+
+    assert index.with_status("Active") == []
+    assert [c["customer_id"] for c in index.with_status("Inactive")] == ["CUST0002", "CUST0003"]
@@ -0,0 +1,21 @@
+from services.dispatcher import TokenBucket
+
+
+def test_buckets_on_one_file_share_tokens(tmp_path):
+    path = str(tmp_path / "rate.sqlite")
+    a = TokenBucket(rate=1, capacity=2, path=path)
+    b = TokenBucket(rate=1, capacity=2, path=path)
+
+    assert a.take() == 0
+    assert b.take() == 0
+    assert 0 < a.take() <= 1
+    assert 0 < b.take() <= 1
+
+
+def test_buckets_by_name_are_separate(tmp_path):
+    path = str(tmp_path / "rate.sqlite")
+    a = TokenBucket(rate=1, capacity=1, path=path, name="a")
+    b = TokenBucket(rate=1, capacity=1, path=path, name="b")
+
+    assert a.take() == 0
+    assert b.take() == 0
@@ -0,0 +1,59 @@
+import asyncio
+
+from services import invalidation
+from services.invalidation import ChangeLog, ChangeLogStore
+from services.quote_cache import QuoteCache
+
+
+def test_change_log_replays_other_workers_changes(tmp_path):
+    path = str(tmp_path / "changes.sqlite")
+    worker_a, worker_b = ChangeLogStore(path), ChangeLogStore(path)
+
+    worker_a.append([("customer", {"customer_id": "CUST0001"})])
+
+    assert worker_b.read() == [("customer", {"customer_id": "CUST0001"})]
+    assert worker_b.read() == []
+    assert worker_a.read() == []     # its own change was handled locally
+
+
+def test_published_change_evicts_quotes_in_another_worker(tmp_path, monkeypatch):
+    path = str(tmp_path / "changes.sqlite")
+    quotes = QuoteCache()
+    quotes.set("agent", "CUST0001", "Health", {"premium": 1})
+    monkeypatch.setitem(invalidation._handlers, "customer", [quotes.invalidate])
+
+    async def run():
+        sender = ChangeLog(path)
+        sender._task = object()     # queue like a running log, flush by hand
+        receiver = ChangeLog(path)
+        await receiver.poll()       # start reading after this point
+
+        sender.add("customer", {"customer_id": "CUST0001"})
+        await sender.poll()
+        await receiver.poll()
+        return receiver
+
+    receiver = asyncio.run(run())
+    assert receiver.received == 1
+    assert quotes.get("agent", "CUST0001", "Health") is None
+    assert quotes.invalidations == 1
+
+
+def test_invalidations_count_only_evicted_entries():
+    quotes = QuoteCache()
+    quotes.invalidate({"customer_id": "CUST0002"})
+    assert quotes.invalidations == 0
+
+
+def test_data_version_bump_clears_customer_loader(tmp_path, monkeypatch):
+    from services.customer_loader import CustomerLoader
+
+    monkeypatch.setattr(invalidation, "DATA_VERSION_PATH", str(tmp_path / ".data_version"))
+    loader = CustomerLoader()
+    loader.cache.set("CUST0001", {"customer_id": "CUST0001"})
+
+    invalidation.bump_data_version()
+    loader._check_data_version()
+
+    assert loader.cache.get("CUST0001") is None
+    assert loader.reloads == 1
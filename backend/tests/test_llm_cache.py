@@ -0,0 +1,31 @@
+from langchain_core.language_models import FakeListChatModel
+
+from services import llm_cache
+from services.llm_cache import SQLiteCache, llm_cache_key, normalize_prompt
+
+
+def test_normalize_prompt_collapses_whitespace_but_keeps_case():
+    assert normalize_prompt("  Is policy\n  POL123   active? ") == "Is policy POL123 active?"
+    assert llm_cache_key(None, "Is US covered") != llm_cache_key(None, "is us covered")
+
+
+def test_bound_runnables_key_on_model_and_bound_kwargs():
+    llm = FakeListChatModel(responses=["ok"])
+    prompt = "Remind CUST0001"
+
+    assert llm_cache_key(llm.bind(stop=["\n"]), prompt) != llm_cache_key(llm, prompt)
+    assert llm_cache_key(llm.bind(tools=[{"name": "a"}]), prompt) != llm_cache_key(llm.bind(tools=[{"name": "b"}]), prompt)
+    assert llm_cache_key(llm.bind(stop=["\n"]), prompt) == llm_cache_key(llm.bind(stop=["\n"]), prompt)
+
+
+def test_sqlite_cache_trims_periodically(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "SQLITE_TRIM_EVERY", 4)
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite"), max_size=2, ttl=60)
+
+    for i in range(3):
+        cache.set(f"k{i}", i)
+    assert len(cache) == 3
+
+    cache.set("k3", 3)
+    assert len(cache) == 2
+    assert cache.get("k3") == 3
@@ -0,0 +1,35 @@
+from services.outbox import OutboxStore
+
+
+def _item(key):
+    return {"key": key, "ref": key, "phone": "+910000000000", "message": "Renewal reminder"}
+
+
+def _fail_all(store):
+    for row in store.claim():
+        store.mark_failed(row, "boom")
+
+
+def test_enqueue_requeues_failed_keys_only(tmp_path):
+    store = OutboxStore(str(tmp_path / "outbox.sqlite"))
+    store.enqueue([_item("a"), _item("b")], "renewal", "job1")
+    rows = store.claim()
+    store.mark_sent(rows[0], "SM1")
+    store.mark_failed(rows[1], "boom")
+
+    added, duplicates = store.enqueue([_item("a"), _item("b")], "renewal", "job2")
+
+    assert (added, duplicates) == (1, 1)
+    assert store.counts("job2") == {"pending": 1, "sending": 0, "sent": 0, "failed": 0}
+    assert store.counts("job1")["sent"] == 1
+
+
+def test_retry_failed_for_one_job(tmp_path):
+    store = OutboxStore(str(tmp_path / "outbox.sqlite"))
+    store.enqueue([_item("a")], "renewal", "job1")
+    store.enqueue([_item("b")], "renewal", "job2")
+    _fail_all(store)
+
+    assert store.retry_failed("job1") == 1
+    assert store.counts("job1")["pending"] == 1
+    assert store.counts("job2")["failed"] == 1
@@ -0,0 +1,62 @@
+from datetime import date
+
+import pytest
+
+from services.policy_query import PolicyIndexes, answer_query, is_personal
+
+TODAY = date(2026, 1, 10)
+
+
+def _policy(pid, policy_type, insurer, premium, expiry, status, name):
+    return {
+        "policy_id": pid, "policy_type": policy_type, "insurer": insurer, "premium": premium,
+        "start_date": "01-01-25", "expiry_date": expiry, "status": status, "customer_name": name,
+    }
+
+
+@pytest.fixture
+def indexes():
+    store = {p["policy_id"]: p for p in [
+        _policy("POL1001", "Health", "TrustCover Ltd", 12000, "15-01-26", "Active", "Pooja Sharma"),
+        _policy("POL1002", "Health", "SecureLife Insurance", 15000, "20-03-26", "Active", "Vikas Malhotra"),
+        _policy("POL1003", "Life", "TrustCover Ltd", 9000, "01-01-26", "Expired", "Aman Gupta"),
+        _policy("POL1004", "Car", "AutoShield Inc", 8000, "18-01-26", "Expiring", "Neha Verma"),
+    ]}
+    return PolicyIndexes(store)
+
+
+@pytest.mark.parametrize("question", [
+    "Is my health policy active?",
+    "when does my life policy expire",
+    "I want to know about my car insurance",
+    "is the health policy active?",
+])
+def test_personal_or_unscoped_questions_are_not_book_queries(indexes, question):
+    assert answer_query(question, indexes, TODAY) is None
+
+
+def test_count_by_status(indexes):
+    assert answer_query("how many active health policies", indexes, TODAY) == \
+        "**2** policies (Health, Active)."
+
+
+def test_expiry_window_lists_in_expiry_order(indexes):
+    answer = answer_query("policies expiring in the next 10 days", indexes, TODAY)
+    assert answer.startswith("Found **2** policies")
+    assert answer.index("POL1001") < answer.index("POL1004")
+
+
+def test_total_premium_by_insurer(indexes):
+    answer = answer_query("total premium by insurer", indexes, TODAY)
+    assert "- TrustCover Ltd: **₹21,000** (2 policies)" in answer
+
+
+def test_list_policies_of_customer(indexes):
+    answer = answer_query("list policies of Pooja Sharma", indexes, TODAY)
+    assert "Found **1** policies" in answer and "POL1001" in answer
+
+
+def test_is_personal():
+    assert is_personal("Is my health policy active?")
+    assert is_personal("I need my policy status")
+    assert not is_personal("how many health policies are active")
@@ -0,0 +1,70 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from services import renewals
+from services.renewals import RenewalScheduler, SchedulerLease
+
+TODAY = date(2025, 6, 10)
+
+
+def _policy(policy_id, days):
+    return {
+        "policy_id": policy_id,
+        "customer_id": "CUST0001",
+        "policy_expiry": str(TODAY + timedelta(days=days)),
+        "status": "Active",
+        "customers": {"name": "Asha", "phone": "+910000000000"},
+    }
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    """Reminder refs by campaign, instead of the outbox."""
+    queued = {}
+
+    async def fake_queue(items, campaign):
+        queued[campaign] = sorted(item["ref"] for item in items)
+        return {"queued": len(items)}
+
+    monkeypatch.setattr(renewals, "queue_reminders", fake_queue)
+    return queued
+
+
+def test_only_one_lease_holder(tmp_path):
+    path = str(tmp_path / "renewals.sqlite")
+    a, b = SchedulerLease(path), SchedulerLease(path)
+
+    assert a.acquire()
+    assert not b.acquire()
+    assert a.acquire()
+    a.release()
+    assert b.acquire()
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    path = str(tmp_path / "renewals.sqlite")
+    a, b = SchedulerLease(path, ttl=-1), SchedulerLease(path)
+
+    assert a.acquire()
+    assert b.acquire()
+
+
+def test_reminders_catch_up_missed_days(tmp_path, queued):
+    scheduler = RenewalScheduler(offsets=[30, 7], lease=SchedulerLease(str(tmp_path / "r.sqlite")))
+    for policy_id, days in [("P40", 40), ("P30", 30), ("P28", 28), ("P6", 6), ("P4", 4)]:
+        scheduler.upsert(_policy(policy_id, days))
+
+    # Down for four days: P30 and P28 passed their 30-day mark meanwhile,
+    # P6 and P4 their 7-day one
+    asyncio.run(scheduler._queue_reminders(TODAY, since=TODAY - timedelta(days=4)))
+    assert queued == {"renewal-30d": ["P28", "P30"], "renewal-7d": ["P4", "P6"]}
+
+
+def test_reminders_send_only_the_nearest_missed_offset(tmp_path, queued):
+    scheduler = RenewalScheduler(offsets=[30, 7], lease=SchedulerLease(str(tmp_path / "r.sqlite")))
+    scheduler.upsert(_policy("P6", 6))
+
+    asyncio.run(scheduler._queue_reminders(TODAY, since=TODAY - timedelta(days=30)))
+    assert queued == {"renewal-7d": ["P6"]}
@@ -0,0 +1,33 @@
+import pytest
+
+from agents.supervisor import EXAMPLES, explain_route, route_task
+
+
+@pytest.mark.parametrize("text,task", EXAMPLES)
+def test_router_samples(text, task):
+    assert route_task(text) == task
+
+
+@pytest.mark.parametrize("text", [
+    "Is my health policy active?",
+    "is my car insurance still valid?",
+    "when does my life policy expire",
+])
+def test_own_policy_questions_take_the_policy_number_path(text):
+    route = explain_route(text)
+    assert route["task"] == "POLICY_DATA"
+    assert route["source"] == "matcher"
+
+
+@pytest.mark.parametrize("text,task", [
+    ("premium for CUST0001 health", "QUOTE"),
+    ("what is the premium for cust0002 life", "QUOTE"),
+    ("quote for CUST0003 car", "QUOTE"),
+    ("price of a health policy for CUST0004", "QUOTE"),
+    ("show customer CUST0005", "CRM"),
+    ("update phone number for CUST0001", "CRM"),
+])
+def test_customer_ids_do_not_outweigh_quote_signals(text, task):
+    route = explain_route(text)
+    assert route["task"] == task
+    assert route["source"] == "matcher"
@@ -0,0 +1,33 @@
+import os
+
+import numpy as np
+import pytest
+
+from services.vector_index import LocalVectorIndex, build_vector_index, resolve_index_dir
+
+
+def _build(path, seed):
+    vectors = np.random.default_rng(seed).normal(size=(20, 8))
+    records = [{"id": f"chunk-{i}", "metadata": {}} for i in range(20)]
+    build_vector_index(vectors, records, path)
+    return vectors
+
+
+def test_missing_index_raises_file_not_found(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        LocalVectorIndex(str(tmp_path / "policy.vectors"))
+
+
+def test_rebuild_swaps_pointer_and_keeps_previous_build(tmp_path):
+    path = str(tmp_path / "policy.vectors")
+    _build(path, 0)
+    first = resolve_index_dir(path)
+    _build(path, 1)
+    _build(path, 2)
+    vectors = _build(path, 3)
+
+    builds = sorted(name for name in os.listdir(tmp_path) if name.startswith("policy.vectors.v"))
+    assert len(builds) == 2
+    assert not os.path.exists(first)
+    assert os.path.basename(resolve_index_dir(path)) == builds[-1]
+    assert LocalVectorIndex(path).query(vectors[5])["matches"][0]["id"] == "chunk-5"
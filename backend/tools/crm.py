@@ -1,10 +1,8 @@
 from langchain_core.tools import tool
 from pydantic import BaseModel, Field, validator
 from typing import Optional
-from supabase import create_client
-import os
-
-supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+from services.clients import get_supabase
+from services.invalidation import CUSTOMER, publish
 
 class UpdateCustomer(BaseModel):
     """Update customer details."""
@@ -25,6 +23,8 @@ def crm_update(input: UpdateCustomer) -> str:
     
     Example: customer_id='CUST0001', phone='9876543210'
     """
+    supabase = get_supabase()
+
     # Fetch current customer
     existing = supabase.table("customers").select("*").eq("customer_id", input.customer_id).execute().data
     
@@ -49,6 +49,8 @@ def crm_update(input: UpdateCustomer) -> str:
     result = supabase.table("customers").update(updates).eq("customer_id", input.customer_id).execute()
     
     if result.data:
+        # CRM index, quote data and list pages pick up the change
+        publish(CUSTOMER, result.data[0])
         return f"""
 CRM Update Complete!
 {input.customer_id}
@@ -1,29 +1,30 @@
 from langchain_core.tools import tool
-from supabase import create_client
-import os
+from services.customer_loader import customer_loader, policy_of_type
+from services.pricing import QUOTE_VALIDITY_DAYS
+from services.quote_cache import quote_cache
 from datetime import date, timedelta
 
-supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+
+def quote_id(customer_id: str) -> str:
+    return f"Q{date.today().strftime('%y%m%d')}{customer_id[-3:]}"
+
 
 @tool
 def get_quote(customer_id: str, policy_type: str = None) -> str:
     """Generate renewal quote for customer."""
-    
-    # Fetch customer
-    customer = supabase.table("customers").eq("customer_id", customer_id).execute().data
+    cached = quote_cache.get("tool", customer_id, policy_type)
+    if cached is not None:
+        return {**cached, "quote_id": quote_id(customer_id)}
+
+    # Customer and policies in one (cached) query
+    customer = customer_loader.load_sync(customer_id)
     if not customer:
         return f"❌ Customer {customer_id} not found"
-    customer = customer[0]
-    
-    # Fetch current policy
-    policy_query = supabase.table("policies").eq("customer_id", customer_id)
-    if policy_type:
-        policy_query = policy_query.eq("policy_type", policy_type)
-    policy = policy_query.execute().data
     
+    # Current policy
+    policy = policy_of_type(customer, policy_type)
     if not policy:
         return f"❌ No {policy_type or 'active'} policy for {customer_id}"
-    policy = policy[0]
     
     # Calculate renewal quote (5% inflation + age factor)
     current_premium = float(policy["premium"])
@@ -34,12 +35,12 @@ def get_quote(customer_id: str, policy_type: str = None) -> str:
     hike_percent = round(((new_premium / current_premium) - 1) * 100)
     
     # Expiry + renewal dates
-    expiry_date = date.fromisoformat(policy["expiry_date"].replace('/', '-'))
+    expiry_date = date.fromisoformat(str(policy.get("policy_expiry") or policy["expiry_date"]).replace('/', '-')[:10])
     renewal_start = expiry_date + timedelta(days=1)
     renewal_end = renewal_start + timedelta(days=365)
     
     quote = {
-        "quote_id": f"Q{date.today().strftime('%y%m%d')}{customer_id[-3:]}",
+        "quote_id": quote_id(customer_id),
         "customer_name": customer["name"],
         "customer_phone": customer["phone"],
         "policy_type": policy["policy_type"],
@@ -49,9 +50,10 @@ def get_quote(customer_id: str, policy_type: str = None) -> str:
         "hike_percent": f"{hike_percent}% ↑",
         "coverage_amount": "₹10 Lakhs",  # From your sample
         "tenure": "1 Year",
-        "validity_days": 15,
+        "validity_days": QUOTE_VALIDITY_DAYS,
         "renewal_start": renewal_start.strftime("%d/%m/%Y"),
         "expiry_date": expiry_date.strftime("%d/%m/%Y")
     }
     
-    return quote
+    quote_cache.set("tool", customer_id, policy_type, quote)
+    return dict(quote)
@@ -3,7 +3,7 @@ from services.whatsapp import send_renewal_reminder
 from datetime import date, timedelta
 
 @tool
-def reminder_tool(customer_id: str = None) -> str:
+async def reminder_tool(customer_id: str = None) -> str:
     """Send WhatsApp renewal reminders to expiring policies (batch/single).
     
     Args:
@@ -11,17 +11,26 @@ def reminder_tool(customer_id: str = None) -> str:
     
     Returns batch results.
     """
-    result = send_renewal_reminder(customer_id)
+    result = await send_renewal_reminder(customer_id)
     
     if result["status"] == "no_targets":
         return "ℹ No expiring policies found (within 30 days)."
     
+    if result["status"] == "queued":
+        return f"""
+Reminder Agent Started!
+Queued: {result['queued']} reminders ({result['duplicates']} already sent or queued)
+Job: {result['job_id']} (poll /jobs/{result['job_id']} for progress)
+Threshold: 30 days from today
+"""
+
     return f"""
 Reminder Agent Complete!
 Sent: {result['sent']}/{result['total']}
+Skipped (already reminded): {result['duplicates']}
 Targets: {result['targets']}
 Threshold: 30 days from today
 
-Last 3 results:
-{chr(10).join([f"• {r['phone'][:8]}...: {r['status']}" for r in result.get('results', [])[-3:]])}
+Failures:
+{chr(10).join([f"• {e['item']}: {e['error']}" for e in result['errors'][-3:]]) or "• none"}
 """